@@ -1,8 +1,12 @@
 import os
 from flask import Flask
 from flask import render_template
+from sqlalchemy.engine import make_url
 from dotenv import load_dotenv
 from .extensions import db
+from .dbpool import install_pool_logging
+from .routing import REPLICA_PREFIX, install_routing
+from . import student_cache, instrumentation, stats, rendering, roster, changelog, pagination  # noqa: F401 (changelog 导入即注册变更记录钩子)
 from flask_wtf.csrf import CSRFProtect
 
 
@@ -16,22 +20,155 @@ def _make_database_uri() -> str:
     return f"mysql+pymysql://{user}:{password}@{host}:{port}/{database}?charset=utf8mb4"
 
 
-def create_app() -> Flask:
+def _make_replica_binds() -> dict:
+    """只读副本：DB_REPLICA_URIS（逗号分隔的完整连接串）或 MYSQL_REPLICA_HOSTS（host[:port]，沿用主库账号和库名）"""
+    uris = [u.strip() for u in os.getenv("DB_REPLICA_URIS", "").split(",") if u.strip()]
+    if not uris:
+        primary = make_url(_make_database_uri())
+        for item in [h.strip() for h in os.getenv("MYSQL_REPLICA_HOSTS", "").split(",") if h.strip()]:
+            host, _, port = item.partition(":")
+            uris.append(primary.set(host=host, port=int(port) if port else primary.port).render_as_string(hide_password=False))
+    return {f"{REPLICA_PREFIX}{i}": uri for i, uri in enumerate(uris)}
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value not in (None, "") else default
+
+
+def _gunicorn_worker() -> tuple:
+    """返回 (worker_class, threads)；优先 GUNICORN_WORKER_CLASS/GUNICORN_THREADS，其次解析 GUNICORN_CMD_ARGS"""
+    worker_class = os.getenv("GUNICORN_WORKER_CLASS", "")
+    threads = os.getenv("GUNICORN_THREADS", "")
+    args = os.getenv("GUNICORN_CMD_ARGS", "").split()
+    for i, arg in enumerate(args):
+        value = args[i + 1] if i + 1 < len(args) else ""
+        if "=" in arg:
+            arg, value = arg.split("=", 1)
+        if arg in ("-k", "--worker-class") and not worker_class:
+            worker_class = value
+        elif arg == "--threads" and not threads:
+            threads = value
+    worker_class = (worker_class or "sync").rsplit(".", 1)[-1].lower()
+    threads = int(threads) if threads else 1
+    # gunicorn 在 sync 下指定 --threads > 1 时会自动切换为 gthread
+    if worker_class == "sync" and threads > 1:
+        worker_class = "gthread"
+    return worker_class, threads
+
+
+def _make_engine_options(uri: str) -> dict:
+    """连接池参数：默认值按 gunicorn worker 类型计算，均可用 DB_* 环境变量覆盖
+
+    只用于 MySQL 等服务端数据库；SQLite 由 SQLAlchemy 自行选择连接池（内存库为 StaticPool，不接受 QueuePool 参数）。
+    """
+    if make_url(uri).get_backend_name() == "sqlite":
+        return {}
+    worker_class, threads = _gunicorn_worker()
+    if worker_class == "gthread":
+        # 每个线程最多同时占用一个连接，另留少量溢出给后台任务
+        pool_size, max_overflow = threads, max(threads // 2, 2)
+    elif worker_class in ("gevent", "eventlet"):
+        # 协程 worker 并发数不受线程限制，给较大的池并依靠 pool_timeout 排队
+        pool_size, max_overflow = 10, 10
+    else:
+        # sync worker 同一时刻只处理一个请求
+        pool_size, max_overflow = 2, 2
+    options = {
+        "pool_size": _env_int("DB_POOL_SIZE", pool_size),
+        "max_overflow": _env_int("DB_MAX_OVERFLOW", max_overflow),
+        "pool_timeout": _env_int("DB_POOL_TIMEOUT", 10),
+        # 小于 MySQL/代理的空闲断开时间，避免拿到已被服务端关闭的连接（"MySQL server has gone away"）
+        "pool_recycle": _env_int("DB_POOL_RECYCLE", 280),
+        "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "1") != "0",
+    }
+    if uri.startswith("mysql"):
+        options["connect_args"] = {
+            "connect_timeout": _env_int("DB_CONNECT_TIMEOUT", 5),
+            "read_timeout": _env_int("DB_READ_TIMEOUT", 30),
+            "write_timeout": _env_int("DB_WRITE_TIMEOUT", 30),
+        }
+    return options
+
+
+def create_app(config: dict | None = None) -> Flask:
+    """config 用于覆盖默认配置（如基准测试指定 SQLite 库、关闭 CSRF）"""
     load_dotenv()
 
     app = Flask(__name__, template_folder="templates", static_folder="static")
     app.config["SECRET_KEY"] = os.getenv("SECRET_KEY", "dev-secret")
     app.config["SQLALCHEMY_DATABASE_URI"] = _make_database_uri()
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = _make_engine_options(app.config["SQLALCHEMY_DATABASE_URI"])
+    app.config["SQLALCHEMY_BINDS"] = _make_replica_binds()
+    # 提交写操作后该浏览器会话固定走主库的秒数
+    app.config["DB_READ_YOUR_WRITES"] = _env_int("DB_READ_YOUR_WRITES", 5)
+    # 学号查询缓存：none（默认）/ local（进程内，单 worker 时使用）/ redis（多 worker 与命令行共享，提交后统一失效）
+    app.config["STUDENT_CACHE"] = os.getenv("STUDENT_CACHE", "none")
+    app.config["STUDENT_CACHE_TTL"] = _env_int("STUDENT_CACHE_TTL", 60)
+    app.config["STUDENT_CACHE_SIZE"] = _env_int("STUDENT_CACHE_SIZE", 10000)
+    app.config["STUDENT_CACHE_REDIS_URL"] = os.getenv("STUDENT_CACHE_REDIS_URL", "redis://127.0.0.1:6379/0")
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    # 列表搜索是否使用全文索引（索引不存在时自动退回 LIKE）
+    app.config["SEARCH_FULLTEXT"] = os.getenv("SEARCH_FULLTEXT", "1") != "0"
+    # 列表分页方式：keyset（默认，游标分页）或 offset（页码分页）
+    app.config["LIST_PAGINATION"] = os.getenv("LIST_PAGINATION", "keyset")
+    # 批量导入任务：thread（默认，本进程线程池后台执行）或 inline（请求内同步执行，用于基准测试/调试）
+    app.config["IMPORT_EXECUTOR"] = os.getenv("IMPORT_EXECUTOR", "thread")
+    app.config["IMPORT_WORKERS"] = _env_int("IMPORT_WORKERS", 1)
+    # 上传文件与错误报告的存放目录，默认 instance/imports
+    app.config["IMPORT_DIR"] = os.getenv("IMPORT_DIR", "")
+    # 上传文件与报告的保留秒数（未确认的预览到期后需重新上传）
+    app.config["IMPORT_FILE_RETENTION"] = _env_int("IMPORT_FILE_RETENTION", 86400)
+    # 未完成任务超过该秒数没有进度更新即视为中断
+    app.config["IMPORT_JOB_STALE"] = _env_int("IMPORT_JOB_STALE", 600)
+    # 列表页行片段缓存条数（0 关闭）与 Jinja 字节码缓存目录（默认 instance/jinja_cache，off 关闭）
+    app.config["LIST_ROW_CACHE_SIZE"] = _env_int("LIST_ROW_CACHE_SIZE", 5000)
+    app.config["JINJA_BYTECODE_CACHE_DIR"] = os.getenv("JINJA_BYTECODE_CACHE_DIR", "")
+    # 统计看板汇总表的刷新方式：background（默认）/ inline / off
+    app.config["STATS_REFRESH"] = os.getenv("STATS_REFRESH", "background")
+    app.config["STATS_REFRESH_DELAY"] = _env_int("STATS_REFRESH_DELAY", 2)
+    app.config["STATS_REFRESH_INTERVAL"] = _env_int("STATS_REFRESH_INTERVAL", 300)
+    # 所有 worker 合计：写入触发的重建最多每这么多秒一次
+    app.config["STATS_REFRESH_MIN_INTERVAL"] = _env_int("STATS_REFRESH_MIN_INTERVAL", 30)
+    # 请求级 SQL/模板耗时统计：默认关闭，开启后按比例抽样
+    app.config["INSTRUMENTATION"] = os.getenv("INSTRUMENTATION", "0") == "1"
+    app.config["INSTRUMENTATION_SAMPLE_RATE"] = float(os.getenv("INSTRUMENTATION_SAMPLE_RATE", "0.1"))
+    app.config["INSTRUMENTATION_SLOW_TOP"] = _env_int("INSTRUMENTATION_SLOW_TOP", 3)
+    # 非空时 /admin/metrics 也接受 "Authorization: Bearer <token>"，供 Prometheus 抓取
+    app.config["METRICS_TOKEN"] = os.getenv("METRICS_TOKEN", "")
+    # /api/v1 的访问令牌（逗号分隔），供下游系统以 "Authorization: Bearer <token>" 调用；管理员登录会话也可访问
+    app.config["API_TOKENS"] = [t.strip() for t in os.getenv("API_TOKENS", "").split(",") if t.strip()]
+    # 进程内名册快照：列表筛选/搜索/分页在本进程内完成（默认关闭，设为 0 即可随时关闭）
+    app.config["ROSTER_SNAPSHOT"] = os.getenv("ROSTER_SNAPSHOT", "0") == "1"
+    app.config["ROSTER_SNAPSHOT_MAX_MB"] = _env_int("ROSTER_SNAPSHOT_MAX_MB", 64)
+    app.config["ROSTER_SNAPSHOT_MAX_LAG"] = _env_int("ROSTER_SNAPSHOT_MAX_LAG", 1)
+    # 批量删除每个事务删除的行数（见 app/bulk.py 的 purge）
+    app.config["PURGE_CHUNK_SIZE"] = _env_int("PURGE_CHUNK_SIZE", 500)
+    # 变更流只返回该秒数之前的变更记录，须大于最长写事务的耗时（见 app/changelog.py）
+    app.config["CHANGE_FEED_LAG"] = _env_int("CHANGE_FEED_LAG", 5)
+    if config:
+        app.config.update(config)
+        if "SQLALCHEMY_DATABASE_URI" in config and "SQLALCHEMY_ENGINE_OPTIONS" not in config:
+            app.config["SQLALCHEMY_ENGINE_OPTIONS"] = _make_engine_options(config["SQLALCHEMY_DATABASE_URI"])
 
     db.init_app(app)
     CSRFProtect(app)
+    install_pool_logging(app)
+    install_routing(app)
+    student_cache.init_app(app)
+    pagination.init_app(app)
+    stats.init_app(app)
+    rendering.init_app(app)
+    roster.init_app(app)
+    instrumentation.init_app(app)
 
     from .views.student import bp as student_bp
     from .views.admin import bp as admin_bp
+    from .views.api import bp as api_bp
 
     app.register_blueprint(student_bp)
     app.register_blueprint(admin_bp, url_prefix="/admin")
+    app.register_blueprint(api_bp, url_prefix="/api/v1")
 
     @app.errorhandler(404)
     def not_found(_):
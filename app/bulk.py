@@ -0,0 +1,119 @@
+"""管理端批量操作：按集合执行的 UPDATE/DELETE，不逐行加载 ORM 对象。
+
+edit_class 由调用方负责 commit（与变更日志同一事务）以及 commit 后的 notify_students_changed；
+purge 按主键分块，每块自行提交并通知。
+"""
+import time
+from datetime import datetime
+from sqlalchemy import delete, func, update
+from .extensions import db
+from .models import Student
+from . import changelog
+from .signals import notify_students_changed
+
+
+# 单条 UPDATE ... WHERE id IN (...) 的最大 id 数
+UPDATE_CHUNK = 1000
+
+
+class BulkEditResult:
+    __slots__ = ("selected", "updated", "student_ids")
+
+    def __init__(self, selected, updated, student_ids):
+        self.selected = selected
+        self.updated = updated
+        # 实际被修改的学号，用于变更通知
+        self.student_ids = student_ids
+
+    @property
+    def unchanged(self) -> int:
+        return self.selected - self.updated
+
+    def to_dict(self) -> dict:
+        return {"selected": self.selected, "updated": self.updated, "unchanged": self.unchanged}
+
+
+def edit_class(stmt, major=None, clazz=None) -> BulkEditResult:
+    """把 stmt（select(Student) 加上勾选/筛选条件）匹配的学生改到新的专业和/或班级，并在 SQL 中重算行政班级。
+
+    先锁定匹配行并跳过已是目标值的行，再按 id 分块执行 UPDATE（通常只有一块）；
+    未修改的学生不更新 updated_at，也不写变更日志。
+    """
+    rows = db.session.execute(
+        stmt.with_only_columns(Student.id, Student.student_id, Student.major, Student.clazz).with_for_update()
+    ).all()
+    changed = [r for r in rows if (major and r.major != major) or (clazz and r.clazz != clazz)]
+    if changed:
+        values = {}
+        if major:
+            values["major"] = major
+        if clazz:
+            values["clazz"] = clazz
+        values["admin_class"] = Student.admin_class_expr(major or Student.major, clazz or Student.clazz)
+        values["updated_at"] = datetime.utcnow()
+        ids = [r.id for r in changed]
+        for start in range(0, len(ids), UPDATE_CHUNK):
+            db.session.execute(
+                update(Student).where(Student.id.in_(ids[start:start + UPDATE_CHUNK])).values(**values),
+                execution_options={"synchronize_session": False},
+            )
+        changelog.record([r.student_id for r in changed], changelog.UPSERT)
+    return BulkEditResult(len(rows), len(changed), [r.student_id for r in changed])
+
+
+# 批量删除每个事务删除的行数；每块单独提交，行锁只持有一块的时间
+PURGE_CHUNK = 500
+
+
+class PurgeResult:
+    __slots__ = ("matched", "deleted", "chunks")
+
+    def __init__(self, matched):
+        self.matched = matched
+        self.deleted = 0
+        self.chunks = 0
+
+    def to_dict(self) -> dict:
+        return {"matched": self.matched, "deleted": self.deleted, "chunks": self.chunks}
+
+
+def count(stmt) -> int:
+    return db.session.execute(stmt.with_only_columns(func.count(Student.id)).order_by(None)).scalar() or 0
+
+
+def purge(stmt, chunk_size=PURGE_CHUNK, pause=0.0, on_chunk=None) -> PurgeResult:
+    """按主键分块删除 stmt（select(Student) 加上勾选/筛选条件）匹配的学生。
+
+    每块：锁定下一批主键 -> DELETE -> 写删除墓碑 -> commit -> 通知，事务只覆盖一块；
+    块之间可 sleep(pause) 让出给在线写入。中途失败时之前的块已提交，异常向上抛出，result 中有已删除数。
+    on_chunk(result) 在每块提交后调用，用于进度显示。
+    """
+    result = PurgeResult(count(stmt))
+    last_id = 0
+    while True:
+        rows = db.session.execute(
+            stmt.with_only_columns(Student.id, Student.student_id)
+            .where(Student.id > last_id)
+            .order_by(Student.id.asc())
+            .limit(chunk_size)
+            .with_for_update()
+        ).all()
+        if not rows:
+            db.session.rollback()
+            return result
+        ids = [r.id for r in rows]
+        sids = [r.student_id for r in rows]
+        res = db.session.execute(
+            delete(Student).where(Student.id.in_(ids)),
+            execution_options={"synchronize_session": False},
+        )
+        changelog.record(sids, changelog.DELETE)
+        db.session.commit()
+        notify_students_changed(sids)
+        result.deleted += res.rowcount
+        result.chunks += 1
+        last_id = ids[-1]
+        if on_chunk is not None:
+            on_chunk(result)
+        if pause and len(rows) == chunk_size:
+            time.sleep(pause)
@@ -0,0 +1,211 @@
+"""离线名册导入（flask import-roster）：整份文件先暂存到临时表，再用集合 SQL 合并到 students，不限行数。
+
+- 表头别名、补零、校验与网页导入相同（importer.normalize_headers / prepared_batches），文件内重复学号以最后一行为准；
+- 暂存：默认多行 INSERT（每批 STAGE_BATCH 行）；MySQL 下 load_infile=True 时先写成 TSV，再用 LOAD DATA LOCAL INFILE 一次装入；
+- 合并：按行号分块，每块一个事务：先在临时表上标出本块的 insert/update（与库中比较字段，NULL 与空串视为相同），
+  紧接着执行 INSERT ... SELECT 与多表 UPDATE 并写入变更日志；内容未变的学号不写入。
+  标记放在每块写入之前而不是合并开始时一次标完，合并期间网页端或导入任务新增的学号会按 update 处理；
+  INSERT 带 ON DUPLICATE KEY UPDATE（SQLite 为 ON CONFLICT），标记与写入之间被并发插入的学号同样不会报唯一键冲突。
+临时表属于连接，整个过程固定使用同一条连接。
+"""
+import os
+import tempfile
+from datetime import datetime
+from sqlalchemy import (Column, DateTime, Index, Integer, MetaData, String, Table, create_engine, delete, exists,
+                        func, insert, literal, or_, select, text, update)
+from sqlalchemy.pool import NullPool
+from .extensions import db
+from .models import Student, StudentChange
+from . import importer
+from .importer import COMPARE_FIELDS, ImportResult
+
+
+STAGING_TABLE = "tmp_roster_import"
+# 暂存阶段每条多行 INSERT 的行数
+STAGE_BATCH = 5000
+# 合并阶段每个事务覆盖的行号范围
+MERGE_CHUNK = 5000
+MERGE_FIELDS = ("student_id",) + COMPARE_FIELDS
+
+
+def _staging_table():
+    students = Student.__table__
+    columns = [Column("row_no", Integer, primary_key=True, autoincrement=False)]
+    columns += [Column(f, String(students.c[f].type.length)) for f in MERGE_FIELDS]
+    columns.append(Column("op", String(10), nullable=True))
+    return Table(STAGING_TABLE, MetaData(), *columns, Index(f"ix_{STAGING_TABLE}_student_id", "student_id"),
+                 prefixes=["TEMPORARY"])
+
+
+def _engine(load_infile):
+    if not load_infile:
+        return db.engine
+    if db.engine.dialect.name != "mysql":
+        raise ValueError("LOAD DATA LOCAL INFILE 仅支持 MySQL")
+    # 需要服务端 local_infile=ON；客户端单独建一条允许 LOCAL INFILE 的连接
+    return create_engine(db.engine.url, connect_args={"local_infile": True}, poolclass=NullPool)
+
+
+def _tsv_value(value):
+    return (value or "").replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+
+class _Stager:
+    """逐行接收通过校验的记录并写入临时表；记录被后面同学号行覆盖的行号，暂存结束后删除"""
+
+    def __init__(self, conn, table, load_infile):
+        self.conn = conn
+        self.table = table
+        self.buffer = []
+        self.last_row = {}
+        self.superseded = []
+        self.tsv = None
+        if load_infile:
+            fd, self.tsv_path = tempfile.mkstemp(prefix="roster_", suffix=".tsv")
+            self.tsv = os.fdopen(fd, "w", encoding="utf-8", newline="")
+
+    def add(self, idx, record):
+        sid = record["student_id"]
+        prev = self.last_row.get(sid)
+        if prev is not None:
+            self.superseded.append(prev)
+        self.last_row[sid] = idx
+        if self.tsv is not None:
+            self.tsv.write("\t".join([str(idx)] + [_tsv_value(record[f]) for f in MERGE_FIELDS]) + "\n")
+            return
+        row = {f: record[f] for f in MERGE_FIELDS}
+        row["row_no"] = idx
+        self.buffer.append(row)
+        if len(self.buffer) >= STAGE_BATCH:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            self.conn.execute(insert(self.table), self.buffer)
+            self.buffer = []
+
+    def finish(self):
+        if self.tsv is not None:
+            self.tsv.close()
+            try:
+                self.conn.execute(
+                    text(
+                        f"LOAD DATA LOCAL INFILE :path INTO TABLE {STAGING_TABLE} CHARACTER SET utf8mb4 "
+                        "FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' LINES TERMINATED BY '\\n' "
+                        f"(row_no, {', '.join(MERGE_FIELDS)})"
+                    ),
+                    {"path": self.tsv_path},
+                )
+            finally:
+                os.remove(self.tsv_path)
+        self.flush()
+        for start in range(0, len(self.superseded), STAGE_BATCH):
+            chunk = self.superseded[start:start + STAGE_BATCH]
+            self.conn.execute(delete(self.table).where(self.table.c.row_no.in_(chunk)))
+        self.conn.commit()
+
+    def discard(self):
+        if self.tsv is not None and not self.tsv.closed:
+            self.tsv.close()
+            os.remove(self.tsv_path)
+
+
+def _stage(conn, table, path, result, load_infile, on_progress):
+    ext = os.path.splitext(path)[1].lower()
+    stager = _Stager(conn, table, load_infile)
+    try:
+        with open(path, "rb") as fh:
+            headers, row_iter, is_excel = importer.open_rows(fh, ext)
+            norm_headers = importer.normalize_headers(headers)
+            batches = importer.prepared_batches(row_iter, norm_headers, is_excel)
+            try:
+                for batch in batches:
+                    for idx, sid, record, reason in batch:
+                        if reason:
+                            result.fail(idx, sid, reason)
+                        else:
+                            stager.add(idx, record)
+                            result.processed += 1
+                    if on_progress:
+                        on_progress("stage", len(batch), None)
+            finally:
+                batches.close()
+        stager.finish()
+    except BaseException:
+        stager.discard()
+        raise
+
+
+def _insert_from_staging(conn, students, columns, rows):
+    """INSERT ... SELECT，学号已存在时改为更新（SQLite 下为 ON CONFLICT DO UPDATE）"""
+    update_cols = [c for c in columns if c not in ("student_id", "created_at")]
+    if conn.dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        stmt = dialect_insert(students).from_select(columns, rows)
+        return stmt.on_conflict_do_update(index_elements=[students.c.student_id],
+                                          set_={c: stmt.excluded[c] for c in update_cols})
+    from sqlalchemy.dialects.mysql import insert as dialect_insert
+    stmt = dialect_insert(students).from_select(columns, rows)
+    return stmt.on_duplicate_key_update({c: stmt.inserted[c] for c in update_cols})
+
+
+def _merge(conn, table, result, on_progress):
+    students = Student.__table__
+    t = table
+    match = students.c.student_id == t.c.student_id
+    differs = or_(*[func.coalesce(students.c[f], "") != func.coalesce(t.c[f], "") for f in COMPARE_FIELDS])
+    low, high = conn.execute(select(func.min(t.c.row_no), func.max(t.c.row_no))).one()
+    if low is None:
+        return
+    staged = conn.execute(select(func.count()).select_from(t)).scalar()
+    now = datetime.utcnow()
+    now_literal = literal(now, DateTime)
+    for start in range(low, high + 1, MERGE_CHUNK):
+        in_chunk = t.c.row_no.between(start, start + MERGE_CHUNK - 1)
+        # 写入前按库中当前数据标记本块，与写入在同一事务
+        conn.execute(update(t).where(in_chunk, ~exists().where(match)).values(op="insert"))
+        conn.execute(update(t).where(in_chunk, exists().where(match).where(differs)).values(op="update"))
+        counts = dict(conn.execute(select(t.c.op, func.count()).where(in_chunk).group_by(t.c.op)).all())
+        result.inserted += counts.get("insert", 0)
+        result.updated += counts.get("update", 0)
+        result.unchanged += counts.get(None, 0)
+
+        conn.execute(insert(StudentChange.__table__).from_select(
+            ["student_id", "action", "changed_at"],
+            select(t.c.student_id, literal(StudentChange.ACTION_UPSERT), now_literal).where(in_chunk, t.c.op.isnot(None)),
+        ))
+        conn.execute(_insert_from_staging(
+            conn, students, list(MERGE_FIELDS) + ["created_at", "updated_at"],
+            select(*[t.c[f] for f in MERGE_FIELDS], now_literal, now_literal).where(in_chunk, t.c.op == "insert"),
+        ))
+        values = {f: t.c[f] for f in COMPARE_FIELDS}
+        values["updated_at"] = now
+        conn.execute(update(students).where(match, in_chunk, t.c.op == "update").values(values))
+        conn.commit()
+        if on_progress:
+            on_progress("merge", sum(counts.values()), staged)
+
+
+def import_roster(path, load_infile=False, on_progress=None) -> ImportResult:
+    """导入一个名册文件（CSV/Excel），返回计数与失败行；on_progress(phase, rows, total) 中 phase 为 stage（解析暂存，total 为 None）或 merge（合并，total 为暂存行数）。
+
+    合并前暂存失败不会改动 students；合并按块提交，中途失败时之前的块已生效，重新执行同一文件即可补齐。
+    """
+    result = ImportResult()
+    table = _staging_table()
+    engine = _engine(load_infile)
+    try:
+        with engine.connect() as conn:
+            table.create(conn)
+            try:
+                _stage(conn, table, path, result, load_infile, on_progress)
+                _merge(conn, table, result, on_progress)
+            finally:
+                conn.rollback()
+                table.drop(conn)
+                conn.commit()
+    finally:
+        if engine is not db.engine:
+            engine.dispose()
+    return result
+
@@ -0,0 +1,106 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """进程内 LRU 缓存，条目超过 ttl 秒后失效；线程安全"""
+
+    def __init__(self, maxsize=1024, ttl=60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            expires, value = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def get_many(self, keys):
+        return [self.get(key) for key in keys]
+
+    def incr(self, key, ttl=None):
+        """计数器自增，用于缓存代数；ttl 为 None 时不过期，否则每次自增后重新计时"""
+        with self._lock:
+            item = self._data.get(key)
+            value = (item[1] if item and item[0] >= time.monotonic() else 0) + 1
+            self._data[key] = (float("inf") if ttl is None else time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            return value
+
+    def get_or_set(self, key, factory, ttl=None):
+        value = self.get(key)
+        if value is None:
+            value = factory()
+            self.set(key, value, ttl)
+        return value
+
+    def __len__(self):
+        return len(self._data)
+
+
+class RedisCache:
+    """共享缓存后端（多进程/多机共用），接口与 TTLCache 相同；值以 JSON 存储
+
+    连接/读写超时设得很短：Redis 不可用时调用方应尽快放弃缓存、直接查库，而不是把请求卡住。
+    client 可传入已有的 redis.Redis（或接口兼容的对象），此时忽略 url。
+    """
+
+    def __init__(self, url=None, prefix="sis:", ttl=60.0, timeout=0.5, client=None):
+        if client is None:
+            import redis
+            client = redis.Redis.from_url(url, socket_timeout=timeout, socket_connect_timeout=timeout)
+        self._redis = client
+        self.prefix = prefix
+        self.ttl = ttl
+
+    def get(self, key, default=None):
+        raw = self._redis.get(self.prefix + key)
+        return default if raw is None else json.loads(raw)
+
+    def get_many(self, keys):
+        return [None if raw is None else json.loads(raw) for raw in self._redis.mget([self.prefix + k for k in keys])]
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        self._redis.set(self.prefix + key, json.dumps(value, ensure_ascii=False), ex=max(int(ttl), 1))
+
+    def delete(self, key):
+        self._redis.delete(self.prefix + key)
+
+    def incr(self, key, ttl=None):
+        if ttl is None:
+            return self._redis.incr(self.prefix + key)
+        pipe = self._redis.pipeline()
+        pipe.incr(self.prefix + key)
+        pipe.expire(self.prefix + key, max(int(ttl), 1))
+        return pipe.execute()[0]
+
+    def clear(self):
+        for key in self._redis.scan_iter(match=self.prefix + "*"):
+            self._redis.delete(key)
@@ -0,0 +1,138 @@
+"""学生变更日志（student_changes）与增量变更流。
+
+写入：
+- ORM 写路径（学生自助登记/修改、管理端新增/编辑/删除）由 before_flush 钩子自动记录，与业务数据同一事务提交；
+- 绕过 ORM 的批量写（导入 upsert、批量删除）在执行语句的同一事务内调用 record()。
+删除和学号变更都会留下 delete 墓碑，下游据此删除本地副本。
+
+读取：按自增 id 游标分页（read_page），同一页内同一学号只返回最后一次变更，upsert 附带学生当前数据。
+自增 id 在插入时分配、提交顺序可能不同，因此只返回 CHANGE_FEED_LAG 秒之前的记录，避免游标越过尚未提交的小 id。
+"""
+import json
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import delete, event, func, inspect, insert, select
+from .extensions import db
+from .models import Student, StudentChange
+from .routing import RoutingSession
+from .student_cache import StudentSnapshot
+
+
+UPSERT = StudentChange.ACTION_UPSERT
+DELETE = StudentChange.ACTION_DELETE
+
+
+def record(student_ids, action, session=None):
+    """在当前事务中为一批学号追加变更记录（一条多行 INSERT），随调用方的 commit 一起提交"""
+    session = session or db.session
+    now = datetime.utcnow()
+    rows = [{"student_id": sid, "action": action, "changed_at": now} for sid in dict.fromkeys(student_ids) if sid]
+    if rows:
+        session.execute(insert(StudentChange), rows)
+    return len(rows)
+
+
+@event.listens_for(Student.student_id, "set", active_history=True)
+def _load_previous_student_id(target, value, oldvalue, initiator):
+    """active_history：赋值前先加载旧学号。commit 后对象已过期，否则改学号时 history 里没有旧值，旧学号不会留下墓碑"""
+
+
+@event.listens_for(RoutingSession, "before_flush")
+def _record_orm_changes(session, flush_context, instances):
+    now = datetime.utcnow()
+    changes = []
+    for obj in session.new:
+        if isinstance(obj, Student):
+            changes.append((obj.student_id, UPSERT))
+    for obj in session.dirty:
+        if isinstance(obj, Student) and session.is_modified(obj):
+            # 学号被修改：旧学号对下游而言等同于删除
+            changes.extend((sid, DELETE) for sid in inspect(obj).attrs.student_id.history.deleted if sid)
+            changes.append((obj.student_id, UPSERT))
+    for obj in session.deleted:
+        if isinstance(obj, Student):
+            changes.append((obj.student_id, DELETE))
+    session.add_all(StudentChange(student_id=sid, action=action, changed_at=now) for sid, action in changes if sid)
+
+
+def _cutoff():
+    return datetime.utcnow() - timedelta(seconds=current_app.config["CHANGE_FEED_LAG"])
+
+
+def head() -> int:
+    """当前最大的变更 id；下游做全量同步时先记下它，之后从这里开始增量拉取"""
+    return db.session.execute(select(func.max(StudentChange.id))).scalar() or 0
+
+
+def visible_head(cursor=0) -> int:
+    """游标之后、已过 CHANGE_FEED_LAG 的最大 id；与 cursor 相等表示没有新变更"""
+    stmt = select(func.max(StudentChange.id)).where(StudentChange.id > cursor, StudentChange.changed_at <= _cutoff())
+    return db.session.execute(stmt).scalar() or cursor
+
+
+class ChangePage:
+    __slots__ = ("items", "next_cursor", "has_more")
+
+    def __init__(self, items, next_cursor, has_more):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.has_more = has_more
+
+    def to_dict(self) -> dict:
+        return {"items": self.items, "next_cursor": self.next_cursor, "has_more": self.has_more}
+
+
+def read_page(cursor=0, limit=200) -> ChangePage:
+    """读取 id > cursor 的一页变更；下一页用返回的 next_cursor 继续，直到 has_more 为 False"""
+    entries = db.session.execute(
+        select(StudentChange)
+        .where(StudentChange.id > cursor, StudentChange.changed_at <= _cutoff())
+        .order_by(StudentChange.id.asc())
+        .limit(limit + 1)
+    ).scalars().all()
+    has_more = len(entries) > limit
+    entries = entries[:limit]
+    # 同一页内同一学号只保留最后一次变更（按 id 排序）
+    latest = {}
+    for entry in entries:
+        latest.pop(entry.student_id, None)
+        latest[entry.student_id] = entry
+    upserts = [sid for sid, entry in latest.items() if entry.action == UPSERT]
+    current = {}
+    if upserts:
+        for stu in db.session.execute(select(Student).where(Student.student_id.in_(upserts))).scalars():
+            current[stu.student_id] = StudentSnapshot.from_model(stu).to_dict()
+    items = []
+    for sid, entry in latest.items():
+        student = current.get(sid) if entry.action == UPSERT else None
+        items.append({
+            "seq": entry.id,
+            "student_id": sid,
+            # 之后又被删除的学生这里已查不到，按删除返回，后续页还会再出现一次墓碑
+            "action": entry.action if entry.action == DELETE or student is not None else DELETE,
+            "changed_at": entry.changed_at.isoformat(),
+            "student": student,
+        })
+    next_cursor = entries[-1].id if entries else cursor
+    return ChangePage(items, next_cursor, has_more)
+
+
+def dump(out, cursor=0, limit=1000):
+    """从 cursor 开始逐页读取全部可见变更，每条一行 JSON 写入 out；返回 (条数, 新游标)，供 CLI 使用"""
+    count = 0
+    while True:
+        page = read_page(cursor, limit)
+        for item in page.items:
+            out.write(json.dumps(item, ensure_ascii=False) + "\n")
+        count += len(page.items)
+        cursor = page.next_cursor
+        if not page.has_more:
+            return count, cursor
+
+
+def prune(days) -> int:
+    """删除 days 天之前的变更记录；落后超过保留期的下游需要重新全量同步"""
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    res = db.session.execute(delete(StudentChange).where(StudentChange.changed_at < cutoff))
+    db.session.commit()
+    return res.rowcount
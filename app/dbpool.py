@@ -0,0 +1,53 @@
+import time
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from .extensions import db
+
+
+# 同一条告警最多每隔多少秒记录一次，避免高峰期刷屏
+_WARN_INTERVAL = 30.0
+
+
+def pool_stats(engine) -> dict:
+    """当前连接池状态；非 QueuePool（如 SQLite 内存库）只返回类型"""
+    pool = engine.pool
+    stats = {"pool": type(pool).__name__}
+    if hasattr(pool, "checkedout"):
+        stats.update(
+            size=pool.size(),
+            max_overflow=getattr(pool, "_max_overflow", 0),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+            timeout=pool.timeout(),
+        )
+    return stats
+
+
+def install_pool_logging(app):
+    """连接池接近耗尽或取连接超时时记录日志，让排队等待不再只表现为“请求变慢”"""
+    last_warned = {"at": 0.0}
+
+    with app.app_context():
+        engines = list(db.engines.values())
+
+    def _listener(engine):
+        def _on_checkout(dbapi_conn, conn_record, conn_proxy):
+            pool = engine.pool
+            if not hasattr(pool, "checkedout"):
+                return
+            capacity = pool.size() + max(getattr(pool, "_max_overflow", 0), 0)
+            if pool.checkedout() >= capacity:
+                now = time.monotonic()
+                if now - last_warned["at"] >= _WARN_INTERVAL:
+                    last_warned["at"] = now
+                    app.logger.warning("[DB POOL] Pool at capacity: %s", pool.status())
+        return _on_checkout
+
+    for engine in engines:
+        event.listen(engine, "checkout", _listener(engine))
+
+    @app.errorhandler(PoolTimeoutError)
+    def _pool_timeout(e):
+        app.logger.error("[DB POOL] Timed out waiting for a connection: %s", {k: pool_stats(v) for k, v in db.engines.items()})
+        return "服务繁忙，请稍后重试", 503
@@ -0,0 +1,70 @@
+"""用 EXPLAIN 检查列表页/导出的典型查询是否命中索引（python run.py explain）"""
+from sqlalchemy import select, text
+from .extensions import db
+from .models import Student
+from .queries import StudentFilter
+from .search import has_fulltext_index
+
+
+def used_indexes(stmt):
+    """返回执行计划中用到的索引名集合"""
+    conn = db.session.connection()
+    compiled = stmt.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True})
+    if conn.dialect.name == "mysql":
+        rows = conn.execute(text(f"EXPLAIN {compiled}")).mappings().all()
+        return {r["key"] for r in rows if r["key"]}
+    if conn.dialect.name == "sqlite":
+        rows = conn.execute(text(f"EXPLAIN QUERY PLAN {compiled}")).all()
+        names = set()
+        for row in rows:
+            detail = row[-1]
+            for marker in ("USING INDEX ", "USING COVERING INDEX "):
+                if marker in detail:
+                    names.add(detail.split(marker, 1)[1].split(" ")[0])
+            if "USING INTEGER PRIMARY KEY" in detail:
+                names.add("PRIMARY")
+        return names
+    raise RuntimeError(f"EXPLAIN check not supported for dialect {conn.dialect.name}")
+
+
+def _list_stmt(filters, per_page=40):
+    return filters.apply(select(Student)).order_by(Student.student_id.asc()).limit(per_page + 1)
+
+
+def _export_stmt(filters):
+    return filters.apply(select(Student)).order_by(Student.updated_at.desc())
+
+
+def plan_checks():
+    """(说明, 语句, 可接受的索引)。
+
+    按学号排序且带 LIMIT 的列表查询，优化器可能选择筛选列索引，也可能顺着学号索引扫描到够一页为止，
+    两者都不是全表扫描；导出同理（筛选列索引或 updated_at 排序索引）。
+    检查的目的是发现没有任何索引可用（key 为空 / SCAN students）的查询。不带条件的全量导出本就要读全表，不做检查。
+    """
+    by_sid = {"ix_students_student_id"}
+    by_filter = {"ix_students_major_clazz_student_id", "ix_students_clazz_student_id"}
+    checks = [
+        ("list: first page", _list_stmt(StudentFilter()), by_sid),
+        ("list: seek page", _list_stmt(StudentFilter()).where(Student.student_id > "2000000000"), by_sid),
+        ("list: major filter", _list_stmt(StudentFilter(majors=["物理学"])), by_filter | by_sid),
+        ("list: major + clazz filter", _list_stmt(StudentFilter(majors=["物理学"], clazz="20231,20232")), by_filter | by_sid),
+        ("list: clazz filter", _list_stmt(StudentFilter(clazz="20231")), by_filter | by_sid),
+        ("export: major filter", _export_stmt(StudentFilter(majors=["物理学"])), by_filter | {"ix_students_updated_at"}),
+        ("export: major + clazz filter", _export_stmt(StudentFilter(majors=["物理学"], clazz="20231")), by_filter | {"ix_students_updated_at"}),
+        ("export: checked ids", select(Student).where(Student.id.in_([1, 2, 3])).order_by(Student.updated_at.desc()), {"PRIMARY"}),
+        ("export: recent changes", _export_stmt(StudentFilter()).where(Student.updated_at >= "2024-01-01"), {"ix_students_updated_at"}),
+    ]
+    if db.engine.dialect.name == "mysql" and has_fulltext_index():
+        checks.append(("list: fulltext search", _list_stmt(StudentFilter(q="张三")), {"ft_students_search"}))
+    return checks
+
+
+def run_checks(log=print) -> bool:
+    ok = True
+    for label, stmt, expected in plan_checks():
+        used = used_indexes(stmt)
+        passed = bool(used & expected)
+        ok = ok and passed
+        log(f"[{'OK' if passed else 'FAIL'}] {label}: used={sorted(used) or '-'} allowed {sorted(expected)}")
+    return ok
@@ -0,0 +1,190 @@
+import csv
+import io
+import os
+import tempfile
+from .extensions import db
+from .models import Student
+
+
+EXPORT_BATCH = 1000
+
+EXPORT_FIELDS = [
+    "student_id", "name", "gender", "ethnicity", "hometown", "political_status", "id_card", "phone", "major", "clazz", "admin_class", "created_at", "updated_at"
+]
+
+FIELD_MAP = {
+    "student_id": "学号",
+    "name": "姓名",
+    "gender": "性别",
+    "ethnicity": "民族",
+    "hometown": "籍贯",
+    "political_status": "政治面貌",
+    "id_card": "身份证号码",
+    "phone": "电话号码",
+    "major": "专业",
+    "clazz": "班级",
+    "admin_class": "行政班级",
+    "created_at": "创建时间",
+    "updated_at": "更新时间",
+}
+
+XLSX_MIMETYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# 列式导出（需要 pyarrow）：format -> (扩展名, MIME)；Arrow 使用 IPC 流格式，每批可以有各自的字典
+COLUMNAR_FORMATS = {
+    "parquet": ("parquet", "application/vnd.apache.parquet"),
+    "arrow": ("arrows", "application/vnd.apache.arrow.stream"),
+}
+# 每个 RecordBatch / Parquet row group 的行数，决定导出时的峰值内存
+ARROW_BATCH = 10000
+# 取值重复度高的列做字典编码
+DICTIONARY_FIELDS = ("major", "clazz", "admin_class")
+
+
+def select_fields(req_fields):
+    """只用 intersection 部分, 且用页面顺序排序；未指定或没有一个已知字段时导出全部字段（查询至少要有一列）"""
+    fields = [f for f in EXPORT_FIELDS if f in (req_fields or ())]
+    return fields or list(EXPORT_FIELDS)
+
+
+def headers_for(fields):
+    return [FIELD_MAP.get(field, field) for field in fields]
+
+
+DATETIME_FIELDS = ("created_at", "updated_at")
+
+
+def iter_rows(stmt, fields, on_progress=None):
+    """按批从服务端游标读取（yield_per），逐行产出导出单元格，不持有完整结果集
+
+    stmt 为带筛选/排序条件的 select(Student)，这里改为只查询 fields 对应的列，得到 Core Row 而不是 ORM 对象。
+    on_progress(rows) 在每批读出后调用（命令行进度条用）。
+    """
+    stmt = stmt.with_only_columns(*[getattr(Student, field) for field in fields])
+    dt_positions = [i for i, field in enumerate(fields) if field in DATETIME_FIELDS]
+    result = db.session.execute(stmt.execution_options(yield_per=EXPORT_BATCH))
+    for part in result.partitions(EXPORT_BATCH):
+        for row in part:
+            cells = list(row)
+            for i in dt_positions:
+                v = cells[i]
+                cells[i] = v.strftime("%Y-%m-%d %H:%M:%S") if v else ""
+            yield cells
+        if on_progress:
+            on_progress(len(part))
+
+
+def iter_column_batches(stmt, fields, batch_size=ARROW_BATCH, on_progress=None):
+    """按批读取所选列并转成列式，每批产出与 fields 对应的值元组列表；时间保持 datetime"""
+    stmt = stmt.with_only_columns(*[getattr(Student, field) for field in fields])
+    result = db.session.execute(stmt.execution_options(yield_per=batch_size))
+    for part in result.partitions(batch_size):
+        yield list(zip(*part))
+        if on_progress:
+            on_progress(len(part))
+
+
+def columnar_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _arrow_schema(pa, fields):
+    """字段名用英文列名（稳定、便于分析脚本引用），中文表头放在字段元数据 label 中；时间为 UTC 时间戳"""
+    out = []
+    for field in fields:
+        if field in DATETIME_FIELDS:
+            typ = pa.timestamp("us", tz="UTC")
+        elif field in DICTIONARY_FIELDS:
+            typ = pa.dictionary(pa.int32(), pa.string())
+        else:
+            typ = pa.string()
+        out.append(pa.field(field, typ, metadata={"label": FIELD_MAP.get(field, field)}))
+    return pa.schema(out)
+
+
+def _record_batch(pa, schema, columns):
+    arrays = []
+    for field, values in zip(schema, columns):
+        if pa.types.is_dictionary(field.type):
+            arrays.append(pa.array(values, type=pa.string()).dictionary_encode())
+        else:
+            arrays.append(pa.array(values, type=field.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def write_columnar(stmt, fields, fmt, on_progress=None):
+    """按批写入 Parquet（每批一个 row group）或 Arrow IPC 流（均为 zstd 压缩）到临时文件，返回路径（调用方负责删除）"""
+    import pyarrow as pa
+    schema = _arrow_schema(pa, fields)
+    fd, path = tempfile.mkstemp(prefix="students_", suffix="." + COLUMNAR_FORMATS[fmt][0])
+    os.close(fd)
+    try:
+        if fmt == "parquet":
+            import pyarrow.parquet as pq
+            with pq.ParquetWriter(path, schema, compression="zstd") as writer:
+                for columns in iter_column_batches(stmt, fields, on_progress=on_progress):
+                    writer.write_batch(_record_batch(pa, schema, columns))
+        else:
+            options = pa.ipc.IpcWriteOptions(compression="zstd")
+            with pa.OSFile(path, "wb") as sink, pa.ipc.new_stream(sink, schema, options=options) as writer:
+                for columns in iter_column_batches(stmt, fields, on_progress=on_progress):
+                    writer.write_batch(_record_batch(pa, schema, columns))
+    except Exception:
+        os.remove(path)
+        raise
+    return path
+
+
+def stream_csv(stmt, fields, on_progress=None):
+    """CSV 生成器：每攒够一批行输出一次，带 UTF-8 BOM 便于 Excel 打开"""
+    buf = io.StringIO()
+    w = csv.writer(buf)
+    w.writerow(headers_for(fields))
+    yield buf.getvalue().encode("utf-8-sig")
+    buf.seek(0)
+    buf.truncate()
+    n = 0
+    for row in iter_rows(stmt, fields, on_progress):
+        w.writerow(row)
+        n += 1
+        if n % EXPORT_BATCH == 0:
+            yield buf.getvalue().encode("utf-8")
+            buf.seek(0)
+            buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode("utf-8")
+
+
+def write_xlsx(stmt, fields, on_progress=None):
+    """openpyxl write-only 模式写入临时文件，返回文件路径（调用方负责删除）"""
+    from openpyxl import Workbook
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("学生信息")
+    ws.append(headers_for(fields))
+    for row in iter_rows(stmt, fields, on_progress):
+        ws.append(row)
+    fd, path = tempfile.mkstemp(prefix="students_", suffix=".xlsx")
+    os.close(fd)
+    try:
+        wb.save(path)
+    except Exception:
+        os.remove(path)
+        raise
+    return path
+
+
+def stream_file(path, chunk_size=64 * 1024):
+    """逐块读出临时文件，读完（或客户端断开）后删除"""
+    try:
+        with open(path, "rb") as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+    finally:
+        os.remove(path)
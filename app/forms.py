@@ -1,17 +1,20 @@
 from flask_wtf import FlaskForm
-from wtforms import StringField, SelectField, PasswordField, FileField
+from wtforms import StringField, SelectField, PasswordField, FileField, BooleanField
 from wtforms.validators import DataRequired, Length, Regexp, ValidationError, Optional
-from .validators import is_valid_china_id18
+from .validators import is_valid_china_id18, NAME_PATTERN, STUDENT_ID_PATTERN, PHONE_PATTERN, CLAZZ_PATTERN
+
+
+MAJOR_CHOICES = [("物理学", "物理学"), ("光电信息科学与工程", "光电信息科学与工程"), ("量子信息科学", "量子信息科学")]
 
 
 class StudentCreateForm(FlaskForm):
-    name = StringField("姓名", validators=[DataRequired(), Regexp(r"^[\u4e00-\u9fa5]{2,4}$", message="请输入2-4个中文姓名")])
+    name = StringField("姓名", validators=[DataRequired(), Regexp(NAME_PATTERN, message="请输入2-4个中文姓名")])
     gender = SelectField("性别", choices=[("男", "男"), ("女", "女")])
-    student_id = StringField("学号", validators=[DataRequired(), Regexp(r"^\d{10}$", message="学号为10位数字")])
+    student_id = StringField("学号", validators=[DataRequired(), Regexp(STUDENT_ID_PATTERN, message="学号为10位数字")])
     id_card = StringField("身份证号码")
-    phone = StringField("电话号码", validators=[Optional(), Regexp(r"^1\d{10}$", message="手机号为1开头11位数字")])
-    major = SelectField("专业", choices=[("物理学", "物理学"), ("光电信息科学与工程", "光电信息科学与工程"), ("量子信息科学", "量子信息科学")])
-    clazz = StringField("班级", validators=[Optional(), Regexp(r"^\d{5}$", message="班级为5位数字")])
+    phone = StringField("电话号码", validators=[Optional(), Regexp(PHONE_PATTERN, message="手机号为1开头11位数字")])
+    major = SelectField("专业", choices=MAJOR_CHOICES)
+    clazz = StringField("班级", validators=[Optional(), Regexp(CLAZZ_PATTERN, message="班级为5位数字")])
     ethnicity = StringField("民族", validators=[Optional(), Length(max=50)])
     hometown = StringField("籍贯", validators=[Optional(), Length(max=100)])
     political_status = StringField("政治面貌", validators=[Optional(), Length(max=50)])
@@ -24,12 +27,12 @@ class StudentCreateForm(FlaskForm):
 
 
 class StudentEditForm(FlaskForm):
-    name = StringField("姓名", validators=[DataRequired(), Regexp(r"^[\u4e00-\u9fa5]{2,4}$")])
+    name = StringField("姓名", validators=[DataRequired(), Regexp(NAME_PATTERN)])
     gender = SelectField("性别", choices=[("男", "男"), ("女", "女")])
     id_card = StringField("身份证号码")
-    phone = StringField("电话号码", validators=[Optional(), Regexp(r"^1\d{10}$")])
-    major = SelectField("专业", choices=[("物理学", "物理学"), ("光电信息科学与工程", "光电信息科学与工程"), ("量子信息科学", "量子信息科学")])
-    clazz = StringField("班级", validators=[Optional(), Regexp(r"^\d{5}$")])
+    phone = StringField("电话号码", validators=[Optional(), Regexp(PHONE_PATTERN)])
+    major = SelectField("专业", choices=MAJOR_CHOICES)
+    clazz = StringField("班级", validators=[Optional(), Regexp(CLAZZ_PATTERN)])
     ethnicity = StringField("民族", validators=[Optional(), Length(max=50)])
     hometown = StringField("籍贯", validators=[Optional(), Length(max=100)])
     political_status = StringField("政治面貌", validators=[Optional(), Length(max=50)])
@@ -48,10 +51,26 @@ class AdminLoginForm(FlaskForm):
 
 class BulkImportForm(FlaskForm):
     file = FileField("文件", validators=[DataRequired()])
+    dry_run = BooleanField("先预览差异")
+
+
+class BulkEditForm(FlaskForm):
+    """批量修改勾选（或全部筛选结果）学生的专业/班级；留空的字段不修改"""
+    new_major = SelectField("专业", choices=[("", "不修改")] + MAJOR_CHOICES, default="")
+    new_clazz = StringField("班级", validators=[Optional(), Regexp(CLAZZ_PATTERN, message="班级为5位数字")])
+    scope = SelectField("范围", choices=[("selected", "选中的行"), ("filter", "全部筛选结果")])
+
+    def validate(self, extra_validators=None):
+        if not super().validate(extra_validators):
+            return False
+        if not (self.new_major.data or (self.new_clazz.data or "").strip()):
+            self.new_major.errors.append("请至少填写专业或班级之一")
+            return False
+        return True
 
 
 class StudentLoginForm(FlaskForm):
-    student_id = StringField("学号", validators=[DataRequired(), Regexp(r"^\d{10}$", message="学号为10位数字")])
+    student_id = StringField("学号", validators=[DataRequired(), Regexp(STUDENT_ID_PATTERN, message="学号为10位数字")])
     verify_last4 = StringField("校验码", validators=[DataRequired(), Regexp(r"^[0-9Xx]{4}$", message="身份证后四位")])
 
 
@@ -0,0 +1,198 @@
+"""按请求统计 SQL 条数/耗时、模板渲染耗时和响应大小（INSTRUMENTATION=1 开启）。
+
+- 所有请求都计入总耗时、状态码、响应大小（开销极小）；
+- 按 INSTRUMENTATION_SAMPLE_RATE 抽样的请求额外记录 SQL 和模板耗时，返回 Server-Timing 头并输出一行结构化日志；
+- 汇总指标以 Prometheus 文本格式从 /admin/metrics 导出（每个进程独立统计）。
+
+流式响应（CSV 导出等）在响应体生成过程中执行的 SQL 发生在 after_request 之后，不计入该请求。
+"""
+import json
+import random
+import threading
+import time
+from collections import defaultdict
+from flask import g, has_request_context, request, before_render_template, template_rendered
+from sqlalchemy import event
+from .extensions import db
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class RequestMetrics:
+    __slots__ = ("queries", "db_time", "slowest", "template_time", "_template_starts")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.slowest = []
+        self.template_time = 0.0
+        self._template_starts = []
+
+
+class EndpointStats:
+    __slots__ = ("requests", "errors", "seconds", "buckets", "response_bytes", "sampled", "queries", "db_seconds", "template_seconds")
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.seconds = 0.0
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        self.response_bytes = 0
+        self.sampled = 0
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.template_seconds = 0.0
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = defaultdict(EndpointStats)
+
+    def observe(self, endpoint, status, seconds, size, metrics=None):
+        with self._lock:
+            st = self._stats[endpoint]
+            st.requests += 1
+            if status >= 500:
+                st.errors += 1
+            st.seconds += seconds
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    st.buckets[i] += 1
+            if size > 0:
+                st.response_bytes += size
+            if metrics is not None:
+                st.sampled += 1
+                st.queries += metrics.queries
+                st.db_seconds += metrics.db_time
+                st.template_seconds += metrics.template_time
+
+    def render_prometheus(self) -> str:
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(samples)
+
+        with self._lock:
+            items = sorted(self._stats.items())
+            label = lambda ep: f'endpoint="{ep}"'
+            metric("sis_requests_total", "counter", "Requests handled by this worker.",
+                   [f"sis_requests_total{{{label(ep)}}} {st.requests}" for ep, st in items])
+            metric("sis_request_errors_total", "counter", "Requests answered with a 5xx status.",
+                   [f"sis_request_errors_total{{{label(ep)}}} {st.errors}" for ep, st in items])
+            samples = []
+            for ep, st in items:
+                for bound, count in zip(LATENCY_BUCKETS, st.buckets):
+                    samples.append(f'sis_request_duration_seconds_bucket{{{label(ep)},le="{bound}"}} {count}')
+                samples.append(f'sis_request_duration_seconds_bucket{{{label(ep)},le="+Inf"}} {st.requests}')
+                samples.append(f"sis_request_duration_seconds_sum{{{label(ep)}}} {st.seconds:.6f}")
+                samples.append(f"sis_request_duration_seconds_count{{{label(ep)}}} {st.requests}")
+            metric("sis_request_duration_seconds", "histogram", "Request latency (until the response is returned to the WSGI server).", samples)
+            metric("sis_response_bytes_total", "counter", "Response body bytes with a known Content-Length.",
+                   [f"sis_response_bytes_total{{{label(ep)}}} {st.response_bytes}" for ep, st in items])
+            metric("sis_sampled_requests_total", "counter", "Requests with SQL/template instrumentation.",
+                   [f"sis_sampled_requests_total{{{label(ep)}}} {st.sampled}" for ep, st in items])
+            metric("sis_db_queries_total", "counter", "SQL statements executed by sampled requests.",
+                   [f"sis_db_queries_total{{{label(ep)}}} {st.queries}" for ep, st in items])
+            metric("sis_db_seconds_total", "counter", "SQL execution time of sampled requests.",
+                   [f"sis_db_seconds_total{{{label(ep)}}} {st.db_seconds:.6f}" for ep, st in items])
+            metric("sis_template_seconds_total", "counter", "Template render time of sampled requests.",
+                   [f"sis_template_seconds_total{{{label(ep)}}} {st.template_seconds:.6f}" for ep, st in items])
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+def _current():
+    if not has_request_context():
+        return None
+    return g.get("_metrics")
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # 开始时间记在本次执行的 context 上：语句出错时 after_cursor_execute 不会触发，
+    # 记在池化连接上的话残留的开始时间会被后续查询错配，并在请求之间不断累积
+    if context is not None and _current() is not None:
+        context._sis_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    metrics = _current()
+    if metrics is None:
+        return
+    start = getattr(context, "_sis_start", None)
+    if start is None:
+        return
+    elapsed = time.perf_counter() - start
+    metrics.queries += 1
+    metrics.db_time += elapsed
+    metrics.slowest.append((elapsed, statement))
+    metrics.slowest.sort(key=lambda item: item[0], reverse=True)
+    del metrics.slowest[g.get("_metrics_top", 3):]
+
+
+def _before_render(sender, template, context, **extra):
+    metrics = _current()
+    if metrics is not None:
+        metrics._template_starts.append(time.perf_counter())
+
+
+def _rendered(sender, template, context, **extra):
+    metrics = _current()
+    if metrics is not None and metrics._template_starts:
+        metrics.template_time += time.perf_counter() - metrics._template_starts.pop()
+
+
+def init_app(app):
+    if not app.config.get("INSTRUMENTATION"):
+        return
+    rate = float(app.config.get("INSTRUMENTATION_SAMPLE_RATE", 0.1))
+    top = int(app.config.get("INSTRUMENTATION_SLOW_TOP", 3))
+
+    with app.app_context():
+        engines = list(db.engines.values())
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    before_render_template.connect(_before_render, app, weak=False)
+    template_rendered.connect(_rendered, app, weak=False)
+
+    @app.before_request
+    def _start():
+        g._metrics_start = time.perf_counter()
+        if random.random() < rate:
+            g._metrics = RequestMetrics()
+            g._metrics_top = top
+
+    @app.after_request
+    def _finish(response):
+        start = g.get("_metrics_start")
+        if start is None:
+            return response
+        total = time.perf_counter() - start
+        size = response.content_length or 0
+        endpoint = request.endpoint or "unknown"
+        metrics = g.pop("_metrics", None)
+        registry.observe(endpoint, response.status_code, total, size, metrics)
+        if metrics is not None:
+            response.headers["Server-Timing"] = ", ".join([
+                f'db;dur={metrics.db_time * 1000:.2f};desc="{metrics.queries} queries"',
+                f"tpl;dur={metrics.template_time * 1000:.2f}",
+                f"total;dur={total * 1000:.2f}",
+            ])
+            app.logger.info("[METRICS] %s", json.dumps({
+                "endpoint": endpoint,
+                "method": request.method,
+                "status": response.status_code,
+                "ms": round(total * 1000, 2),
+                "queries": metrics.queries,
+                "db_ms": round(metrics.db_time * 1000, 2),
+                "template_ms": round(metrics.template_time * 1000, 2),
+                "bytes": size if size else None,
+                "slowest": [{"ms": round(t * 1000, 2), "sql": " ".join(sql.split())[:200]} for t, sql in metrics.slowest],
+            }, ensure_ascii=False))
+        return response
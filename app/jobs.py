@@ -0,0 +1,279 @@
+"""批量导入后台任务：上传文件先落盘并登记 ImportJob，由本进程的线程池执行导入。
+
+每写完一块（importer.CHUNK_SIZE 行）就提交一次并更新进度，其他 worker 轮询 import_jobs 表即可看到进度；
+取消在块之间生效，取消前已提交的数据保留。
+
+预览任务（dry_run）只对比差异、生成差异明细，上传文件保留到确认导入时交给新任务执行。
+"""
+import csv
+import os
+import time
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import update
+from .extensions import db
+from .models import ImportJob
+from . import importer
+from .exporter import FIELD_MAP
+from .signals import notify_students_changed
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+class ImportCancelled(Exception):
+    pass
+
+
+def _get_executor(app):
+    # 延迟创建：gunicorn --preload 时在 fork 之后的 worker 里各自建池
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=app.config["IMPORT_WORKERS"], thread_name_prefix="import")
+        return _executor
+
+
+def job_dir(app) -> str:
+    path = app.config.get("IMPORT_DIR") or os.path.join(app.instance_path, "imports")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _ext(job) -> str:
+    return os.path.splitext(job.filename)[1].lower()
+
+
+def upload_path(app, job) -> str:
+    return os.path.join(job_dir(app), f"{job.id}{_ext(job)}")
+
+
+def error_report_path(app, job) -> str:
+    return os.path.join(job_dir(app), f"{job.id}.errors.csv")
+
+
+def diff_report_path(app, job) -> str:
+    return os.path.join(job_dir(app), f"{job.id}.diff.csv")
+
+
+def _cleanup(app):
+    """删除超过保留期的上传文件和报告（未确认的预览、旧的错误报告）"""
+    cutoff = time.time() - app.config["IMPORT_FILE_RETENTION"]
+    with os.scandir(job_dir(app)) as entries:
+        for entry in entries:
+            try:
+                if entry.is_file() and entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+            except OSError:
+                pass
+
+
+def submit(file, filename, created_by=None, dry_run=False):
+    """保存上传文件并排队执行，返回 ImportJob；IMPORT_EXECUTOR=inline 时在当前请求内同步执行"""
+    app = current_app._get_current_object()
+    _cleanup(app)
+    job = ImportJob(id=uuid.uuid4().hex, filename=filename, status=ImportJob.STATUS_QUEUED,
+                    created_by=created_by, dry_run=dry_run)
+    file.save(upload_path(app, job))
+    db.session.add(job)
+    db.session.commit()
+    _enqueue(app, job)
+    return job
+
+
+def confirm(job_id, created_by=None):
+    """确认已完成的预览：把上传文件移交给新的导入任务；预览不存在、未完成或已确认过时返回 None"""
+    app = current_app._get_current_object()
+    preview = db.session.get(ImportJob, job_id)
+    if preview is None or not preview.dry_run or preview.status != ImportJob.STATUS_DONE:
+        return None
+    job = ImportJob(id=uuid.uuid4().hex, filename=preview.filename, status=ImportJob.STATUS_QUEUED, created_by=created_by)
+    try:
+        # 原子移动，同一预览只能确认一次
+        os.replace(upload_path(app, preview), upload_path(app, job))
+    except OSError:
+        return None
+    db.session.add(job)
+    db.session.commit()
+    _enqueue(app, job)
+    return job
+
+
+def _enqueue(app, job):
+    if app.config.get("IMPORT_EXECUTOR") == "inline":
+        run_job(app, job.id)
+        db.session.refresh(job)
+    else:
+        _get_executor(app).submit(run_job, app, job.id)
+
+
+def _transition(job_id, from_status, to_status, **values) -> bool:
+    """条件更新状态，避免取消与开始执行互相覆盖"""
+    if isinstance(from_status, str):
+        from_status = (from_status,)
+    res = db.session.execute(
+        update(ImportJob)
+        .where(ImportJob.id == job_id, ImportJob.status.in_(from_status))
+        .values(status=to_status, updated_at=datetime.utcnow(), **values)
+    )
+    db.session.commit()
+    return res.rowcount == 1
+
+
+def write_error_report(path, errors):
+    with open(path, "w", encoding="utf-8-sig", newline="") as fh:
+        w = csv.writer(fh)
+        w.writerow(["行号", "学号", "原因"])
+        w.writerows(errors)
+
+
+DIFF_ACTIONS = {"insert": "新增", "update": "更新"}
+
+
+def _write_diff_report(path, changes):
+    """每个变化字段一行；新增的学号只占一行"""
+    with open(path, "w", encoding="utf-8-sig", newline="") as fh:
+        w = csv.writer(fh)
+        w.writerow(["行号", "学号", "操作", "字段", "原值", "新值"])
+        for row, sid, action, fields in changes:
+            if not fields:
+                w.writerow([row, sid, DIFF_ACTIONS[action], "", "", ""])
+            for field, (old, new) in fields.items():
+                w.writerow([row, sid, DIFF_ACTIONS[action], FIELD_MAP.get(field, field), old, new])
+
+
+def diff_sample(job, limit=20):
+    """差异明细的前 limit 行，供页面直接展示"""
+    path = diff_report_path(current_app, job)
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8-sig", newline="") as fh:
+        reader = csv.reader(fh)
+        next(reader, None)
+        keys = ("row", "student_id", "action", "field", "old", "new")
+        return [dict(zip(keys, line)) for line, _ in zip(reader, range(limit))]
+
+
+def run_job(app, job_id):
+    """在后台线程中执行导入；所有异常都记录到任务上，不向线程池抛出"""
+    with app.app_context():
+        logger = app.logger
+        if not _transition(job_id, ImportJob.STATUS_QUEUED, ImportJob.STATUS_RUNNING):
+            return  # 已在排队时取消
+        job = db.session.get(ImportJob, job_id)
+        path = upload_path(app, job)
+        ext = _ext(job)
+        state = {"result": None, "wrote": False}
+        logger.info("[IMPORT] Job %s started: filename=%s", job_id, job.filename)
+
+        def on_chunk(result):
+            # 本块数据与进度在同一事务中提交
+            state["result"] = result
+            job.processed = result.processed
+            job.inserted = result.inserted
+            job.updated = result.updated
+            job.unchanged = result.unchanged
+            job.failed = result.failed
+            db.session.commit()
+            state["wrote"] = True
+            # commit 后对象已过期，访问 status 会重新读取，能看到其他 worker 写入的取消请求
+            if job.status == ImportJob.STATUS_CANCELLING:
+                raise ImportCancelled()
+
+        final_status, message = ImportJob.STATUS_DONE, None
+        try:
+            job.total = importer.count_rows(path, ext)
+            db.session.commit()
+            with open(path, "rb") as fh:
+                headers, row_iter, is_excel = importer.open_rows(fh, ext)
+                norm_headers = importer.normalize_headers(headers)
+                logger.info("[IMPORT] Job %s headers: %s -> %s", job_id, headers, norm_headers)
+                result = importer.run_import(row_iter, norm_headers, is_excel, logger=logger,
+                                             on_chunk=on_chunk, dry_run=job.dry_run)
+            if result.processed >= importer.MAX_ROWS:
+                message = f"已达单次导入上限 {importer.MAX_ROWS} 行，其余行未导入"
+        except ImportCancelled:
+            final_status, message = ImportJob.STATUS_CANCELLED, "已取消，取消前已写入的数据保留"
+        except Exception as e:
+            db.session.rollback()
+            final_status, message = ImportJob.STATUS_FAILED, f"导入失败: {e}"
+            logger.exception("[IMPORT] Job %s failed: %s", job_id, e)
+
+        result = state["result"]
+        if result is not None and result.errors:
+            try:
+                write_error_report(error_report_path(app, job), result.errors)
+            except OSError:
+                logger.exception("[IMPORT] Job %s failed to write error report", job_id)
+        if result is not None and result.changes:
+            try:
+                _write_diff_report(diff_report_path(app, job), result.changes)
+            except OSError:
+                logger.exception("[IMPORT] Job %s failed to write diff report", job_id)
+        job = db.session.get(ImportJob, job_id)
+        job.status = final_status
+        job.message = message
+        job.finished_at = datetime.utcnow()
+        db.session.commit()
+        if not (job.dry_run and final_status == ImportJob.STATUS_DONE):
+            _remove(path)
+        if state["wrote"] and not job.dry_run:
+            notify_students_changed()
+        logger.info("[IMPORT] Job %s %s%s: inserted=%d, updated=%d, unchanged=%d, failed=%d",
+                    job_id, final_status, " (dry run)" if job.dry_run else "",
+                    job.inserted, job.updated, job.unchanged, job.failed)
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def get_job(job_id):
+    """读取任务；执行中长时间没有进度更新的任务（进程退出等）标记为失败
+
+    只看 running/cancelling：排队中的任务在开始执行前不会更新 updated_at，排在其他导入后面等待多久都不算中断；
+    进程退出后遗留的排队任务可以在任务页取消。
+    """
+    job = db.session.get(ImportJob, job_id)
+    if job is None or job.finished:
+        return job
+    stale = timedelta(seconds=current_app.config["IMPORT_JOB_STALE"])
+    active = (ImportJob.STATUS_RUNNING, ImportJob.STATUS_CANCELLING)
+    if job.status in active and job.updated_at and datetime.utcnow() - job.updated_at > stale:
+        if _transition(job_id, active, ImportJob.STATUS_FAILED,
+                       message="任务中断（进程退出或长时间无进度）", finished_at=datetime.utcnow()):
+            _remove(upload_path(current_app, job))
+        job = db.session.get(ImportJob, job_id, populate_existing=True)
+    return job
+
+
+def cancel(job_id):
+    """排队中的任务直接取消；执行中的任务标记为 cancelling，在下一块写入后停止"""
+    job = db.session.get(ImportJob, job_id)
+    if job is None or job.finished:
+        return job
+    if _transition(job_id, ImportJob.STATUS_QUEUED, ImportJob.STATUS_CANCELLED,
+                   message="已取消", finished_at=datetime.utcnow()):
+        _remove(upload_path(current_app, job))
+    else:
+        _transition(job_id, ImportJob.STATUS_RUNNING, ImportJob.STATUS_CANCELLING)
+    return db.session.get(ImportJob, job_id, populate_existing=True)
+
+
+def has_error_report(job) -> bool:
+    return job.finished and os.path.exists(error_report_path(current_app, job))
+
+
+def has_diff_report(job) -> bool:
+    return job.finished and os.path.exists(diff_report_path(current_app, job))
+
+
+def can_confirm(job) -> bool:
+    return job.dry_run and job.status == ImportJob.STATUS_DONE and os.path.exists(upload_path(current_app, job))
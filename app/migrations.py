@@ -0,0 +1,101 @@
+"""轻量级结构迁移：create_all() 只会建新表，无法给已有表加索引/列，
+这里按版本号顺序执行迁移，并把已执行的版本记录在 schema_migrations 表中。
+
+每个迁移都应当是幂等的（先检查再修改），这样新库 create_all() 之后执行也不会出错。
+"""
+from datetime import datetime
+from sqlalchemy import inspect, text
+from .extensions import db
+from .models import Student, ImportJob
+
+
+class SchemaMigration(db.Model):
+    __tablename__ = "schema_migrations"
+
+    version = db.Column(db.String(50), primary_key=True)
+    description = db.Column(db.String(255), nullable=False, default="")
+    applied_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+
+def _index_names(conn, table):
+    return {ix["name"] for ix in inspect(conn).get_indexes(table)}
+
+
+def _create_missing_indexes(conn, table, names):
+    existing = _index_names(conn, table.name)
+    for ix in table.indexes:
+        if ix.name in names and ix.name not in existing:
+            ix.create(conn)
+
+
+def _m0001_fulltext(conn):
+    if conn.dialect.name != "mysql":
+        return
+    _create_missing_indexes(conn, Student.__table__, {"ft_students_search"})
+
+
+def _m0002_filter_indexes(conn):
+    _create_missing_indexes(conn, Student.__table__, {
+        "ix_students_major_clazz_student_id",
+        "ix_students_clazz_student_id",
+        "ix_students_admin_class",
+        "ix_students_updated_at",
+    })
+
+
+def _add_missing_columns(conn, table, names):
+    existing = {c["name"] for c in inspect(conn).get_columns(table.name)}
+    for name in names:
+        if name in existing:
+            continue
+        col = table.c[name]
+        ddl = f"ALTER TABLE {table.name} ADD COLUMN {col.name} {col.type.compile(conn.dialect)}"
+        if col.server_default is not None:
+            ddl += f" NOT NULL DEFAULT {col.server_default.arg}"
+        conn.execute(text(ddl))
+
+
+def _m0003_import_job_preview(conn):
+    _add_missing_columns(conn, ImportJob.__table__, ["dry_run", "unchanged"])
+
+
+# (版本, 说明, 执行函数)；只能追加，不要修改已发布的版本
+MIGRATIONS = [
+    ("0001", "students: ngram fulltext index for list search", _m0001_fulltext),
+    ("0002", "students: composite indexes for list filters and export sort", _m0002_filter_indexes),
+    ("0003", "import_jobs: dry_run and unchanged columns for import preview", _m0003_import_job_preview),
+]
+
+
+def applied_versions(conn):
+    SchemaMigration.__table__.create(conn, checkfirst=True)
+    return set(conn.execute(text("SELECT version FROM schema_migrations")).scalars())
+
+
+def upgrade(log=print):
+    """执行尚未执行的迁移，返回本次执行的版本列表"""
+    done = []
+    with db.engine.connect() as conn:
+        applied = applied_versions(conn)
+        conn.commit()
+        for version, description, fn in MIGRATIONS:
+            if version in applied:
+                continue
+            log(f"Applying migration {version}: {description}")
+            # MySQL 的 DDL 会隐式提交，这里每个迁移单独提交
+            fn(conn)
+            conn.execute(
+                SchemaMigration.__table__.insert().values(
+                    version=version, description=description, applied_at=datetime.utcnow()
+                )
+            )
+            conn.commit()
+            done.append(version)
+    return done
+
+
+def pending():
+    with db.engine.connect() as conn:
+        applied = applied_versions(conn)
+        conn.commit()
+    return [(v, d) for v, d, _ in MIGRATIONS if v not in applied]
@@ -21,20 +21,40 @@ class Student(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __table_args__ = (
+        # 列表页按专业/班级筛选并按学号排序、导出按更新时间排序；已有表通过 app/migrations.py 补建
+        db.Index("ix_students_major_clazz_student_id", "major", "clazz", "student_id"),
+        db.Index("ix_students_clazz_student_id", "clazz", "student_id"),
+        db.Index("ix_students_admin_class", "admin_class"),
+        db.Index("ix_students_updated_at", "updated_at"),
+        # 列表搜索用的 ngram 全文索引（仅 MySQL），见 app/search.py
+        db.Index(
+            "ft_students_search", "name", "student_id", "id_card", "phone", "major", "clazz",
+            mysql_prefix="FULLTEXT", mysql_with_parser="ngram",
+        ).ddl_if(dialect="mysql"),
+    )
+
     def last4_of_id(self) -> str:
         return (self.id_card or "")[-4:]
 
+    # 专业 -> 行政班级前缀；未列出的专业直接用专业名
+    ADMIN_CLASS_PREFIX = {"物理学": "物理", "光电信息科学与工程": "光电", "量子信息科学": "量信"}
+
     @staticmethod
     def generate_admin_class(major: str, clazz: str) -> str:
         """根据专业和班级生成行政班级"""
-        if major == "物理学":
-            return f"物理{clazz}"
-        elif major == "光电信息科学与工程":
-            return f"光电{clazz}"
-        elif major == "量子信息科学":
-            return f"量信{clazz}"
+        return f"{Student.ADMIN_CLASS_PREFIX.get(major, major)}{clazz}"
+
+    @classmethod
+    def admin_class_expr(cls, major, clazz):
+        """generate_admin_class 的 SQL 版本，供批量 UPDATE 使用；major/clazz 可以是列或新值"""
+        if isinstance(major, str):
+            prefix = db.literal(cls.ADMIN_CLASS_PREFIX.get(major, major))
         else:
-            return f"{major}{clazz}"
+            prefix = db.case(*[(major == m, p) for m, p in cls.ADMIN_CLASS_PREFIX.items()], else_=major)
+        if isinstance(clazz, str):
+            clazz = db.literal(clazz)
+        return prefix + clazz
 
     def update_admin_class(self):
         """更新行政班级"""
@@ -56,3 +76,90 @@ class Admin(db.Model):
         return check_password_hash(self.password_hash, password)
 
 
+
+
+class ImportJob(db.Model):
+    """后台批量导入任务；进度与计数保存在库里，任意 worker 都能查询"""
+    __tablename__ = "import_jobs"
+
+    STATUS_QUEUED = "queued"
+    STATUS_RUNNING = "running"
+    STATUS_CANCELLING = "cancelling"
+    STATUS_CANCELLED = "cancelled"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+    FINISHED = (STATUS_CANCELLED, STATUS_DONE, STATUS_FAILED)
+
+    id = db.Column(db.String(32), primary_key=True)
+    filename = db.Column(db.String(255), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default=STATUS_QUEUED)
+    # 预览任务只计算差异不写入，确认后由新任务按同一文件执行导入
+    dry_run = db.Column(db.Boolean, nullable=False, default=False, server_default=db.text("0"))
+    total = db.Column(db.Integer, nullable=True)
+    processed = db.Column(db.Integer, nullable=False, default=0)
+    inserted = db.Column(db.Integer, nullable=False, default=0)
+    updated = db.Column(db.Integer, nullable=False, default=0)
+    unchanged = db.Column(db.Integer, nullable=False, default=0, server_default=db.text("0"))
+    failed = db.Column(db.Integer, nullable=False, default=0)
+    message = db.Column(db.Text, nullable=True)
+    created_by = db.Column(db.String(50), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    finished_at = db.Column(db.DateTime, nullable=True)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in self.FINISHED
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "filename": self.filename,
+            "status": self.status,
+            "dry_run": self.dry_run,
+            "total": self.total,
+            "processed": self.processed,
+            "inserted": self.inserted,
+            "updated": self.updated,
+            "unchanged": self.unchanged,
+            "failed": self.failed,
+            "message": self.message,
+            "finished": self.finished,
+        }
+
+
+class StudentStat(db.Model):
+    """按 专业/行政班级/性别/政治面貌 预聚合的人数，由 stats 模块整表重建"""
+    __tablename__ = "student_stats"
+
+    id = db.Column(db.Integer, primary_key=True)
+    major = db.Column(db.String(100), nullable=False)
+    admin_class = db.Column(db.String(100), nullable=False)
+    gender = db.Column(db.String(10), nullable=False)
+    political_status = db.Column(db.String(50), nullable=False, default="")
+    count = db.Column(db.Integer, nullable=False)
+    refreshed_at = db.Column(db.DateTime, nullable=False)
+
+
+class StatsMeta(db.Model):
+    """汇总表的单行元数据（id=1）：各进程重建前 FOR UPDATE 锁住这一行，串行判断是否需要重建"""
+    __tablename__ = "stats_meta"
+
+    id = db.Column(db.Integer, primary_key=True)
+    refreshed_at = db.Column(db.DateTime, nullable=True)
+
+
+class StudentChange(db.Model):
+    """学生变更日志：每次新增/修改记一条 upsert，删除（含学号被改掉的旧学号）记一条 delete 墓碑。
+
+    id 自增，下游按 id 游标增量拉取，见 app/changelog.py。
+    """
+    __tablename__ = "student_changes"
+
+    ACTION_UPSERT = "upsert"
+    ACTION_DELETE = "delete"
+
+    id = db.Column(db.BigInteger().with_variant(db.Integer, "sqlite"), primary_key=True, autoincrement=True)
+    student_id = db.Column(db.String(20), nullable=False)
+    action = db.Column(db.String(10), nullable=False)
+    changed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
@@ -0,0 +1,115 @@
+import base64
+import json
+from sqlalchemy import func, select
+from .cache import TTLCache
+from .extensions import db
+from .models import Student
+from .signals import students_changed
+
+
+# 筛选条件 -> 总条数，短时缓存，避免每次翻页都执行 COUNT(*)；本进程写入后整体清空，TTL 只兜底其他进程的写入
+_count_cache = TTLCache(maxsize=256, ttl=60.0)
+
+
+def encode_cursor(key: str, direction: str, page: int) -> str:
+    raw = json.dumps({"k": key, "d": direction, "p": page}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    """返回 (key, direction, page)；游标无效时返回 None（回到第一页）"""
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        data = json.loads(raw)
+        direction = data["d"]
+        if direction not in ("next", "prev"):
+            return None
+        return str(data["k"]), direction, max(int(data["p"]), 1)
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+def count_students(filters) -> int:
+    key = filters.cache_key()
+    total = _count_cache.get(key)
+    if total is None:
+        stmt = filters.apply(select(func.count()).select_from(Student))
+        total = db.session.execute(stmt).scalar() or 0
+        _count_cache.set(key, total)
+    return total
+
+
+class KeysetPagination:
+    """按 student_id 的 seek 分页；每页代价与页码无关。
+
+    接口与 Flask-SQLAlchemy 的 Pagination 保持一致（items/page/pages/has_prev/has_next），
+    总条数只在模板访问 total/pages 时才计算，并按筛选条件缓存。
+    传入 columns 时只查询这些列，items 为 Core Row（按属性名访问，需包含 student_id），不经过 ORM 实例化和 identity map。
+    """
+
+    def __init__(self, filters, cursor="", per_page=40, columns=None):
+        self.filters = filters
+        self.per_page = per_page
+        decoded = decode_cursor(cursor)
+        stmt = filters.apply(select(*columns).select_from(Student) if columns else select(Student))
+        fetch = (lambda result: result.all()) if columns else (lambda result: result.scalars().all())
+        if decoded is None:
+            self.page = 1
+            rows = fetch(db.session.execute(
+                stmt.order_by(Student.student_id.asc()).limit(per_page + 1)
+            ))
+            self.has_prev = False
+            self.has_next = len(rows) > per_page
+            self.items = rows[:per_page]
+        else:
+            key, direction, self.page = decoded
+            if direction == "next":
+                rows = fetch(db.session.execute(
+                    stmt.where(Student.student_id > key).order_by(Student.student_id.asc()).limit(per_page + 1)
+                ))
+                self.has_prev = True
+                self.has_next = len(rows) > per_page
+                self.items = rows[:per_page]
+            else:
+                rows = fetch(db.session.execute(
+                    stmt.where(Student.student_id < key).order_by(Student.student_id.desc()).limit(per_page + 1)
+                ))
+                self.has_prev = len(rows) > per_page
+                self.has_next = True
+                self.items = list(reversed(rows[:per_page]))
+            if not self.has_prev:
+                self.page = 1
+        self._total = None
+
+    @property
+    def total(self) -> int:
+        if self._total is None:
+            self._total = count_students(self.filters)
+        return self._total
+
+    @property
+    def pages(self) -> int:
+        return max((self.total + self.per_page - 1) // self.per_page, 1)
+
+    @property
+    def prev_cursor(self) -> str:
+        if not (self.has_prev and self.items):
+            return ""
+        return encode_cursor(self.items[0].student_id, "prev", self.page - 1)
+
+    @property
+    def next_cursor(self) -> str:
+        if not (self.has_next and self.items):
+            return ""
+        return encode_cursor(self.items[-1].student_id, "next", self.page + 1)
+
+
+def _on_students_changed(app, student_ids=None):
+    # 任一学生的增删改都可能改变任意筛选条件下的总数
+    _count_cache.clear()
+
+
+def init_app(app):
+    students_changed.connect(_on_students_changed, sender=app, weak=False)
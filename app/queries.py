@@ -0,0 +1,46 @@
+from .models import Student
+from .search import plan_search
+
+
+class StudentFilter:
+    """学生列表/导出共用的筛选条件（搜索词、性别、专业、班级）"""
+
+    def __init__(self, q="", genders=None, majors=None, clazz=""):
+        self.q = (q or "").strip()
+        self.genders = list(genders or [])
+        self.majors = list(majors or [])
+        # 班级保留原始输入用于回填表单，多个班级用逗号分隔
+        self.clazz = (clazz or "").strip()
+        self.clazz_list = [c for c in [x.strip() for x in self.clazz.split(",")] if c]
+
+    @classmethod
+    def from_args(cls, args):
+        return cls(
+            q=args.get("q", ""),
+            genders=[g.strip() for g in args.getlist("gender") if g.strip()],
+            majors=[m.strip() for m in args.getlist("major") if m.strip()],
+            clazz=args.get("clazz", ""),
+        )
+
+    def is_empty(self) -> bool:
+        return not (self.q or self.genders or self.majors or self.clazz_list)
+
+    def apply(self, stmt):
+        """把筛选条件加到 select()/Query 上"""
+        if self.q:
+            stmt = stmt.where(plan_search(self.q).predicate)
+        if self.genders:
+            stmt = stmt.where(Student.gender.in_(self.genders))
+        if self.majors:
+            stmt = stmt.where(Student.major.in_(self.majors))
+        if self.clazz_list:
+            stmt = stmt.where(Student.clazz.in_(self.clazz_list))
+        return stmt
+
+    def cache_key(self) -> tuple:
+        """同一筛选条件（忽略顺序）得到同一个 key，用于缓存总条数等"""
+        return (self.q, tuple(sorted(self.genders)), tuple(sorted(self.majors)), tuple(sorted(self.clazz_list)))
+
+    def to_args(self) -> dict:
+        """用于 url_for 生成分页/导出链接"""
+        return {"q": self.q, "gender": self.genders, "major": self.majors, "clazz": self.clazz}
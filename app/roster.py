@@ -0,0 +1,410 @@
+"""进程内学生名册列式快照（ROSTER_SNAPSHOT=1 开启），在本进程内完成管理端列表的筛选、搜索与 keyset 分页。
+
+- 列式存储：每个字段一列；性别/专业/班级做字典编码（array 存编码），每个取值一个位图（Python int，第 i 位对应槽位 i）；
+  筛选即位图按位与/或，总条数即位计数；搜索在按行拼接的小写文本上做子串查找，与 LIKE '%q%' 一致。
+- 槽位 [0, sorted_end) 按学号有序；之后新增的学号追加在尾部，分页时与有序部分归并；尾部或已删除槽位过多时整体重建。
+- 新鲜度：version 为已应用到的变更日志 id（见 app/changelog.py）。本进程的写入通过 students_changed 立即标脏，
+  其他 worker 的写入在 ROSTER_SNAPSHOT_MAX_LAG 秒内通过变更日志最大 id 发现；同步时只重新加载变化的学号。
+- 内存：构建时按列估算占用，超过 ROSTER_SNAPSHOT_MAX_MB 即停用本进程快照，列表退回数据库查询。
+
+查询词含 LIKE 通配符（% _ \\）时不走快照，保证结果与数据库一致。
+"""
+import heapq
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+from datetime import datetime, timedelta
+from itertools import islice
+from flask import current_app
+from sqlalchemy import select
+from .extensions import db
+from .models import Student, StudentChange
+from . import changelog
+from .pagination import KeysetPagination, decode_cursor
+from .rendering import ROW_COLUMNS, ROW_FIELDS
+from .search import search_columns
+from .signals import students_changed
+
+
+RosterRow = namedtuple("RosterRow", ROW_FIELDS)
+
+ENCODED_FIELDS = ("gender", "major", "clazz")
+SEARCH_FIELDS = tuple(col.key for col in search_columns())
+_LIKE_SPECIAL = ("%", "_", "\\")
+_SEP = "\x00"
+# 增量同步时每条 IN 查询的学号数
+LOAD_CHUNK = 1000
+# 尾部（未排序）槽位超过该数，或已删除槽位超过总数 1/8 时整体重建
+TAIL_MAX = 1024
+
+
+def _to_bitmap(positions, nbits):
+    buf = bytearray((nbits + 7) // 8)
+    for p in positions:
+        buf[p >> 3] |= 1 << (p & 7)
+    return int.from_bytes(buf, "little")
+
+
+def _take_up(bits, start, limit):
+    """从第 start 位起按升序取至多 limit 个置位的位置"""
+    out = []
+    bits >>= start
+    base = start
+    while bits and len(out) < limit:
+        pos = (bits & -bits).bit_length() - 1
+        out.append(base + pos)
+        bits >>= pos + 1
+        base += pos + 1
+    return out
+
+
+def _take_down(bits, limit):
+    """按降序取至多 limit 个置位的位置"""
+    out = []
+    while bits and len(out) < limit:
+        pos = bits.bit_length() - 1
+        out.append(pos)
+        bits ^= 1 << pos
+    return out
+
+
+class SnapshotPagination(KeysetPagination):
+    """由快照得到的一页，接口与 KeysetPagination 一致（游标格式相同，可与数据库分页互换）"""
+
+    def __init__(self, filters, per_page, items, page, has_prev, has_next, total):
+        self.filters = filters
+        self.per_page = per_page
+        self.items = items
+        self.page = page
+        self.has_prev = has_prev
+        self.has_next = has_next
+        self._total = total
+
+
+class RosterSnapshot:
+    def __init__(self, max_bytes, max_lag, feed_lag):
+        self.max_bytes = max_bytes
+        self.max_lag = max_lag
+        self.feed_lag = feed_lag
+        self.enabled = True
+        self.version = 0       # 该 id 及之前的变更都已应用且不会再有未提交的更小 id
+        self.nbytes = 0
+        self.builds = 0
+        self.syncs = 0
+        self._lock = threading.Lock()
+        self._built = False
+        self._seen = 0         # 已应用的最大变更 id（version 之后的变更在下次同步时重新应用）
+        self._dirty_gen = 0
+        self._synced_gen = 0
+        self._checked_at = 0.0
+        self._row_bytes = 0
+        self._reset()
+
+    def _reset(self):
+        self._cols = {field: [] for field in ROW_FIELDS}
+        self._codes = {field: array("I") for field in ENCODED_FIELDS}
+        self._dicts = {field: {} for field in ENCODED_FIELDS}     # 取值 -> 编码
+        self._bitmaps = {field: [] for field in ENCODED_FIELDS}   # 编码 -> 位图
+        self._alive = 0
+        self._slots = {}        # 学号 -> 槽位
+        self._hay = []          # 槽位 -> 小写搜索文本
+        self._text = None       # 全部搜索文本拼接，按需生成
+        self._offsets = None
+        self._sorted_end = 0
+        self._dead = 0
+
+    @property
+    def rows(self) -> int:
+        return len(self._slots)
+
+    def mark_dirty(self):
+        self._dirty_gen += 1
+
+    # ---- 构建与增量同步 ----
+
+    def _encode(self, field, value):
+        codes = self._dicts[field]
+        code = codes.get(value)
+        if code is None:
+            code = codes[value] = len(self._bitmaps[field])
+            self._bitmaps[field].append(0)
+        return code
+
+    @staticmethod
+    def _haystack(row):
+        return _SEP.join(str(getattr(row, field) or "") for field in SEARCH_FIELDS).lower()
+
+    def _settled_head(self):
+        """已过 CHANGE_FEED_LAG 的最大变更 id：更小的 id 不会再有未提交的事务"""
+        cutoff = datetime.utcnow() - timedelta(seconds=self.feed_lag)
+        stmt = select(db.func.max(StudentChange.id)).where(StudentChange.changed_at <= cutoff)
+        return db.session.execute(stmt).scalar() or 0
+
+    def _build(self):
+        started = time.perf_counter()
+        head, settled = changelog.head(), self._settled_head()
+        rows = db.session.execute(select(*ROW_COLUMNS).order_by(Student.student_id.asc())).all()
+        self._reset()
+        cols = [self._cols[field] for field in ROW_FIELDS]
+        positions = {field: [] for field in ENCODED_FIELDS}
+        for slot, row in enumerate(rows):
+            for col, value in zip(cols, row):
+                col.append(value)
+            for field in ENCODED_FIELDS:
+                code = self._encode(field, getattr(row, field))
+                self._codes[field].append(code)
+                positions[field].append(code)
+            self._slots[row.student_id] = slot
+            self._hay.append(self._haystack(row))
+        n = len(rows)
+        for field in ENCODED_FIELDS:
+            by_code = [[] for _ in self._bitmaps[field]]
+            for slot, code in enumerate(positions[field]):
+                by_code[code].append(slot)
+            self._bitmaps[field] = [_to_bitmap(slots, n) for slots in by_code]
+        self._alive = (1 << n) - 1
+        self._sorted_end = n
+        self.version, self._seen = settled, head
+        self._built = True
+        self.builds += 1
+        self.nbytes = self._measure()
+        self._row_bytes = self.nbytes // n if n else 0
+        current_app.logger.info("[ROSTER] Snapshot built: rows=%d, bytes=%d, version=%d, ms=%.1f",
+                                n, self.nbytes, head, (time.perf_counter() - started) * 1000)
+        if self.nbytes > self.max_bytes:
+            self._disable(f"snapshot needs {self.nbytes} bytes, limit {self.max_bytes}")
+
+    def _sync(self):
+        entries = db.session.execute(
+            select(StudentChange.id, StudentChange.student_id, StudentChange.changed_at)
+            .where(StudentChange.id > self.version)
+            .order_by(StudentChange.id.asc())
+        ).all()
+        if not entries:
+            self._seen = self.version
+            return
+        sids = list(dict.fromkeys(e.student_id for e in entries))
+        if len(sids) > max(TAIL_MAX, self.rows // 4):
+            self._build()
+            return
+        found = {}
+        for start in range(0, len(sids), LOAD_CHUNK):
+            chunk = sids[start:start + LOAD_CHUNK]
+            for row in db.session.execute(select(*ROW_COLUMNS).where(Student.student_id.in_(chunk))):
+                found[row.student_id] = row
+        for sid in sids:
+            self._apply(sid, found.get(sid))
+        # version 只推进到连续已过 CHANGE_FEED_LAG 的变更；更新的变更下次同步时重新应用（按当前数据重载，幂等）
+        cutoff = datetime.utcnow() - timedelta(seconds=self.feed_lag)
+        for e in entries:
+            if e.changed_at > cutoff:
+                break
+            self.version = e.id
+        self._seen = entries[-1].id
+        self.syncs += 1
+        self.nbytes = self._row_bytes * len(self._hay)
+        tail = len(self._hay) - self._sorted_end
+        if tail > TAIL_MAX or self._dead * 8 > len(self._hay):
+            self._build()
+
+    def _apply(self, sid, row):
+        slot = self._slots.get(sid)
+        if row is None:
+            if slot is not None:
+                self._alive &= ~(1 << slot)
+                del self._slots[sid]
+                self._hay[slot] = ""
+                self._dead += 1
+                self._text = None
+            return
+        if slot is None:
+            slot = len(self._hay)
+            for field, value in zip(ROW_FIELDS, row):
+                self._cols[field].append(value)
+            for field in ENCODED_FIELDS:
+                code = self._encode(field, getattr(row, field))
+                self._codes[field].append(code)
+                self._bitmaps[field][code] |= 1 << slot
+            self._alive |= 1 << slot
+            self._slots[sid] = slot
+            self._hay.append(self._haystack(row))
+        else:
+            for field, value in zip(ROW_FIELDS, row):
+                self._cols[field][slot] = value
+            for field in ENCODED_FIELDS:
+                old, new = self._codes[field][slot], self._encode(field, getattr(row, field))
+                if old != new:
+                    self._bitmaps[field][old] &= ~(1 << slot)
+                    self._bitmaps[field][new] |= 1 << slot
+                    self._codes[field][slot] = new
+            self._hay[slot] = self._haystack(row)
+        self._text = None
+
+    def _ensure_fresh(self):
+        if not self._built:
+            self._build()
+            return
+        gen = self._dirty_gen
+        now = time.monotonic()
+        if gen == self._synced_gen and now - self._checked_at < self.max_lag:
+            return
+        if gen != self._synced_gen or self.version < self._seen or changelog.head() != self._seen:
+            self._sync()
+        self._synced_gen = gen
+        self._checked_at = now
+
+    def _measure(self) -> int:
+        """按列估算占用字节数（列表本身 + 各不相同的值对象 + 编码数组 + 位图 + 搜索文本）"""
+        seen = set()
+        total = 0
+        for values in list(self._cols.values()) + [self._hay]:
+            total += sys.getsizeof(values)
+            for v in values:
+                if id(v) not in seen:
+                    seen.add(id(v))
+                    total += sys.getsizeof(v)
+        for field in ENCODED_FIELDS:
+            total += self._codes[field].itemsize * len(self._codes[field])
+            total += sum(sys.getsizeof(b) for b in self._bitmaps[field])
+        total += sys.getsizeof(self._slots)
+        return total
+
+    def _disable(self, reason):
+        current_app.logger.warning("[ROSTER] Snapshot disabled: %s", reason)
+        self.enabled = False
+        self._built = False
+        self._reset()
+        self.nbytes = 0
+
+    # ---- 查询 ----
+
+    def _search(self, q):
+        if self._text is None:
+            offsets = []
+            pos = 0
+            for hay in self._hay:
+                offsets.append(pos)
+                pos += len(hay) + 1
+            self._offsets = offsets
+            self._text = _SEP.join(self._hay)
+        text, offsets = self._text, self._offsets
+        needle = q.lower()
+        hits = []
+        pos = text.find(needle)
+        while pos != -1:
+            slot = bisect_right(offsets, pos) - 1
+            hits.append(slot)
+            # 同一行只记一次，从下一行开头继续找
+            if slot + 1 >= len(offsets):
+                break
+            pos = text.find(needle, offsets[slot + 1])
+        return _to_bitmap(hits, len(offsets))
+
+    def _match(self, filters):
+        bits = self._alive
+        for field, wanted in (("gender", filters.genders), ("major", filters.majors), ("clazz", filters.clazz_list)):
+            if wanted:
+                acc = 0
+                for value in wanted:
+                    code = self._dicts[field].get(value)
+                    if code is not None:
+                        acc |= self._bitmaps[field][code]
+                bits &= acc
+        if filters.q and bits:
+            bits &= self._search(filters.q)
+        return bits
+
+    def _row(self, slot):
+        return RosterRow._make(self._cols[field][slot] for field in ROW_FIELDS)
+
+    def _page(self, filters, decoded, per_page):
+        bits = self._match(filters)
+        limit = per_page + 1
+        sids = self._cols["student_id"]
+        end = self._sorted_end
+        head_bits = bits & ((1 << end) - 1)
+        tail = [end + pos for pos in _take_up(bits >> end, 0, len(self._hay))]
+        sort_key = sids.__getitem__
+        if decoded is None or decoded[1] == "next":
+            key = decoded[0] if decoded else None
+            start = bisect_right(sids, key, 0, end) if key is not None else 0
+            ordered = _take_up(head_bits, start, limit)
+            extra = sorted((s for s in tail if key is None or sids[s] > key), key=sort_key)
+            slots = list(islice(heapq.merge(ordered, extra, key=sort_key), limit))
+            has_prev = decoded is not None
+            has_next = len(slots) > per_page
+            slots = slots[:per_page]
+        else:
+            key = decoded[0]
+            stop = bisect_left(sids, key, 0, end)
+            ordered = _take_down(head_bits & ((1 << stop) - 1), limit)
+            extra = sorted((s for s in tail if sids[s] < key), key=sort_key, reverse=True)
+            slots = list(islice(heapq.merge(ordered, extra, key=sort_key, reverse=True), limit))
+            has_prev = len(slots) > per_page
+            has_next = True
+            slots = list(reversed(slots[:per_page]))
+        page = decoded[2] if decoded and has_prev else 1
+        return SnapshotPagination(filters, per_page, [self._row(s) for s in slots], page, has_prev, has_next,
+                                  bits.bit_count())
+
+    def paginate(self, filters, cursor="", per_page=40):
+        """返回与 KeysetPagination 相同接口的一页；快照不可用（停用、正在由其他线程构建、查询词含通配符）时返回 None"""
+        if not self.enabled or any(ch in filters.q for ch in _LIKE_SPECIAL):
+            return None
+        # 首次构建期间其他请求直接走数据库，不排队等待
+        if not self._lock.acquire(timeout=0.05):
+            return None
+        try:
+            self._ensure_fresh()
+            if not self.enabled:
+                return None
+            return self._page(filters, decode_cursor(cursor), per_page)
+        except Exception:
+            current_app.logger.exception("[ROSTER] Snapshot query failed, falling back to database")
+            db.session.rollback()
+            self._built = False
+            return None
+        finally:
+            self._lock.release()
+
+    def render_prometheus(self) -> str:
+        lines = []
+        for name, kind, help_text, value in (
+            ("sis_roster_snapshot_enabled", "gauge", "1 if the in-process roster snapshot is serving list queries.", int(self.enabled)),
+            ("sis_roster_snapshot_rows", "gauge", "Students held by the roster snapshot.", self.rows),
+            ("sis_roster_snapshot_bytes", "gauge", "Estimated memory used by the roster snapshot.", self.nbytes),
+            ("sis_roster_snapshot_version", "gauge", "Last change-log id applied to the roster snapshot.", self._seen),
+            ("sis_roster_snapshot_builds_total", "counter", "Full snapshot (re)builds.", self.builds),
+            ("sis_roster_snapshot_syncs_total", "counter", "Incremental snapshot syncs from the change log.", self.syncs),
+        ):
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}", f"{name} {value}"]
+        return "\n".join(lines) + "\n"
+
+
+def paginate(filters, cursor="", per_page=40):
+    """快照未开启或不可用时返回 None，调用方改用数据库分页"""
+    snapshot = current_app.extensions.get("roster_snapshot")
+    if snapshot is None:
+        return None
+    return snapshot.paginate(filters, cursor, per_page)
+
+
+def _on_students_changed(app, student_ids=None):
+    snapshot = app.extensions.get("roster_snapshot")
+    if snapshot is not None:
+        snapshot.mark_dirty()
+
+
+def init_app(app):
+    """ROSTER_SNAPSHOT=1 开启；ROSTER_SNAPSHOT_MAX_MB 为内存上限，ROSTER_SNAPSHOT_MAX_LAG 为发现其他 worker 写入的最大延迟（秒）"""
+    if not app.config.get("ROSTER_SNAPSHOT"):
+        return
+    app.extensions["roster_snapshot"] = RosterSnapshot(
+        max_bytes=app.config.get("ROSTER_SNAPSHOT_MAX_MB", 64) * 1024 * 1024,
+        max_lag=app.config.get("ROSTER_SNAPSHOT_MAX_LAG", 1),
+        feed_lag=app.config.get("CHANGE_FEED_LAG", 5),
+    )
+    students_changed.connect(_on_students_changed, sender=app, weak=False)
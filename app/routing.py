@@ -0,0 +1,81 @@
+"""读写分离：只读的管理端接口（列表/搜索/导出）可以走只读副本，其余一律走主库。
+
+副本通过 SQLALCHEMY_BINDS 中以 replica_ 开头的 bind 配置（见 create_app）。
+提交过写操作的浏览器会话在 DB_READ_YOUR_WRITES 秒内固定走主库，避免副本延迟导致刚保存的数据“消失”。
+"""
+import random
+import time
+from functools import wraps
+from flask import g, has_request_context, session
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+
+
+REPLICA_PREFIX = "replica_"
+_PRIMARY_UNTIL_KEY = "_db_primary_until"
+
+
+def _replica_allowed() -> bool:
+    return has_request_context() and g.get("db_read_only", False)
+
+
+class RoutingSession(Session):
+    """在只读请求中把查询路由到随机一个副本（每个请求选一次）；flush 和 INSERT/UPDATE/DELETE 始终走主库"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and not getattr(clause, "is_dml", False) and _replica_allowed():
+            # 同一请求内固定一个副本，多条查询（如 ETag 校验值与数据本身）看到同一份数据
+            replica = g.get("db_replica")
+            if replica is None:
+                replicas = [e for key, e in self._db.engines.items() if key and key.startswith(REPLICA_PREFIX)]
+                if replicas:
+                    replica = g.db_replica = random.choice(replicas)
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def read_only(view):
+    """标记只读视图：若配置了副本且当前会话不在“读自己写”窗口内，则查询走副本"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        g.db_read_only = session.get(_PRIMARY_UNTIL_KEY, 0) < time.time()
+        return view(*args, **kwargs)
+    return wrapper
+
+
+# 会话事件挂在 RoutingSession 类上，在模块级注册一次；放进 install_routing 会在每次 create_app() 时重复注册
+@event.listens_for(RoutingSession, "after_flush")
+def _mark_flush(sess, flush_context):
+    sess.info["db_wrote"] = True
+
+
+@event.listens_for(RoutingSession, "do_orm_execute")
+def _mark_dml(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info["db_wrote"] = True
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _mark_write(sess):
+    if sess.info.pop("db_wrote", False) and has_request_context():
+        g.db_wrote = True
+
+
+@event.listens_for(RoutingSession, "after_rollback")
+def _clear_write(sess):
+    sess.info.pop("db_wrote", None)
+
+
+def install_routing(app):
+    """在响应前为提交过写操作的浏览器会话设置读自己写窗口（未配置副本时不需要）"""
+    if not any(key and key.startswith(REPLICA_PREFIX) for key in app.config.get("SQLALCHEMY_BINDS") or {}):
+        return
+
+    window = app.config.get("DB_READ_YOUR_WRITES", 5)
+
+    @app.after_request
+    def _pin_primary(response):
+        if g.get("db_wrote"):
+            session[_PRIMARY_UNTIL_KEY] = time.time() + window
+        return response
@@ -0,0 +1,68 @@
+import re
+from sqlalchemy import and_, inspect, or_
+from sqlalchemy.dialects.mysql import match
+from flask import current_app
+from .extensions import db
+from .models import Student
+
+
+FULLTEXT_INDEX = "ft_students_search"
+
+# MySQL ngram 解析器默认 ngram_token_size=2，短于它的词无法命中索引
+NGRAM_TOKEN_SIZE = 2
+
+# 只对中文/数字查询走全文索引：ngram 会丢弃包含英文停用词（如 in/at/of）的分词，
+# 且布尔模式下 + - " * 等字符有特殊含义，这些查询退回 LIKE 才能保证结果一致
+_FULLTEXT_SAFE_RE = re.compile(r"^[\u4e00-\u9fa5\d]+$")
+
+# engine url -> 是否存在全文索引
+_fulltext_available = {}
+
+
+def search_columns():
+    return (Student.name, Student.student_id, Student.id_card, Student.phone, Student.major, Student.clazz)
+
+
+def like_predicate(q: str):
+    """原有语义：任一列包含 q"""
+    like = f"%{q}%"
+    return or_(*[col.like(like) for col in search_columns()])
+
+
+def has_fulltext_index() -> bool:
+    engine = db.engine
+    key = str(engine.url)
+    if key not in _fulltext_available:
+        available = False
+        if engine.dialect.name == "mysql":
+            try:
+                names = {ix["name"] for ix in inspect(engine).get_indexes(Student.__tablename__)}
+                available = FULLTEXT_INDEX in names
+            except Exception:
+                current_app.logger.exception("[SEARCH] Failed to inspect indexes")
+        _fulltext_available[key] = available
+    return _fulltext_available[key]
+
+
+class SearchPlan:
+    """kind: like / fulltext；predicate 用于 where()"""
+
+    def __init__(self, kind, predicate):
+        self.kind = kind
+        self.predicate = predicate
+
+
+def plan_search(q: str) -> SearchPlan:
+    """根据查询词形态选择代价最低且结果与 LIKE 一致的方案"""
+    like = like_predicate(q)
+    if (
+        current_app.config.get("SEARCH_FULLTEXT", True)
+        and len(q) >= current_app.config.get("SEARCH_NGRAM_TOKEN_SIZE", NGRAM_TOKEN_SIZE)
+        and _FULLTEXT_SAFE_RE.match(q)
+        and has_fulltext_index()
+    ):
+        # 短语匹配：包含 q 的行一定包含 q 的全部连续 ngram，因此全文索引给出的是 LIKE 结果的超集，
+        # 再用 LIKE 作为残余条件过滤，结果与原语义完全一致，但只扫描候选行
+        ft = match(*search_columns(), against=f'"{q}"').in_boolean_mode()
+        return SearchPlan("fulltext", and_(ft, like))
+    return SearchPlan("like", like)
@@ -0,0 +1,15 @@
+from blinker import Namespace
+from flask import current_app
+
+
+_signals = Namespace()
+
+# 学生数据提交后发送；student_ids 为受影响的学号列表，None 表示范围未知（如批量导入），订阅方应整体失效
+students_changed = _signals.signal("students-changed")
+
+
+def notify_students_changed(student_ids=None):
+    """各写路径在 commit 成功后调用"""
+    if student_ids is not None:
+        student_ids = [sid for sid in student_ids if sid]
+    students_changed.send(current_app._get_current_object(), student_ids=student_ids)
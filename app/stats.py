@@ -0,0 +1,185 @@
+"""统计看板：专业/行政班级/性别/政治面貌人数。
+
+student_stats 表保存 GROUP BY 结果（几百行量级），看板只读这张表，按分组数 O(groups) 渲染。
+写路径 commit 后发出 students_changed，本进程的后台线程合并短时间内的多次写入后整表重建；
+另按 STATS_REFRESH_INTERVAL 定时重建，覆盖命令行或直接改库等不经过应用的写入。
+重建先用普通 SELECT 聚合（InnoDB 一致性快照读，不给 students 加锁），再把分组结果写进汇总表，
+不用 INSERT ... SELECT：REPEATABLE READ 下它会给扫描到的每一行 students 加共享 next-key 锁，重建期间阻塞学生写入。
+各 worker 之间按 stats_meta 单行的 refreshed_at 全局限流：任一进程在 STATS_REFRESH_MIN_INTERVAL 秒内重建过就跳过，
+持续写入时整个部署最多每个窗口重建一次，而不是每个 worker 每隔几秒一次。
+"""
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from .extensions import db
+from .models import StatsMeta, Student, StudentStat
+from .signals import students_changed
+
+
+def _lock_meta():
+    """FOR UPDATE 锁住 stats_meta 的唯一一行（不存在时先插入），返回上次重建时间；锁持有到调用方提交
+
+    锁的是固定的一行而不是汇总表：汇总表为空时 FOR UPDATE 只加间隙锁，间隙锁互不冲突，两个 worker 会同时重建。
+    """
+    stmt = select(StatsMeta.refreshed_at).where(StatsMeta.id == 1).with_for_update()
+    row = db.session.execute(stmt).first()
+    if row is None:
+        try:
+            db.session.execute(insert(StatsMeta).values(id=1))
+        except IntegrityError:
+            # 另一个进程先插入了这一行：回滚后排到它的锁后面
+            db.session.rollback()
+        row = db.session.execute(stmt).first()
+    return row.refreshed_at
+
+
+def _rebuild():
+    """聚合并整表替换汇总表，同时更新 stats_meta；返回新的分组行（字段与 StudentStat 相同）"""
+    now = datetime.utcnow()
+    political = func.coalesce(Student.political_status, "")
+    grouped = (
+        select(
+            Student.major.label("major"), Student.admin_class.label("admin_class"), Student.gender.label("gender"),
+            political.label("political_status"), func.count().label("count"), db.literal(now).label("refreshed_at"),
+        )
+        .group_by(Student.major, Student.admin_class, Student.gender, political)
+    )
+    rows = db.session.execute(grouped).all()
+    db.session.execute(delete(StudentStat))
+    if rows:
+        db.session.execute(insert(StudentStat), [row._asdict() for row in rows])
+    db.session.execute(update(StatsMeta).where(StatsMeta.id == 1).values(refreshed_at=now))
+    db.session.commit()
+    return rows
+
+
+def refresh():
+    """立即重建汇总表（等待其他进程正在进行的重建结束），返回新的分组行"""
+    _lock_meta()
+    return _rebuild()
+
+
+def refresh_if_stale(max_age):
+    """汇总表在 max_age 秒内已被（任一进程）重建过时跳过，返回还需等待的秒数；否则重建并返回 0
+
+    检查与重建在同一事务并持有 stats_meta 的行锁：同时到期的两个 worker 中后一个会等前一个提交，再看到新的 refreshed_at 而跳过。
+    """
+    last = _lock_meta()
+    if last is not None:
+        remaining = (last + timedelta(seconds=max_age) - datetime.utcnow()).total_seconds()
+        if remaining > 0:
+            db.session.commit()
+            return remaining
+    _rebuild()
+    return 0
+
+
+class Dashboard:
+    """由汇总表行构建的各维度人数"""
+
+    def __init__(self, rows):
+        self.total = 0
+        self.refreshed_at = None
+        by_major = defaultdict(int)
+        by_gender = defaultdict(int)
+        by_political = defaultdict(int)
+        by_class = defaultdict(lambda: {"major": "", "total": 0, "男": 0, "女": 0})
+        major_gender = defaultdict(lambda: defaultdict(int))
+        for row in rows:
+            self.total += row.count
+            self.refreshed_at = row.refreshed_at
+            by_major[row.major] += row.count
+            by_gender[row.gender] += row.count
+            by_political[row.political_status or "未填写"] += row.count
+            cls = by_class[row.admin_class]
+            cls["major"] = row.major
+            cls["total"] += row.count
+            if row.gender in ("男", "女"):
+                cls[row.gender] += row.count
+            major_gender[row.major][row.gender] += row.count
+        self.by_major = sorted(by_major.items(), key=lambda kv: -kv[1])
+        self.by_gender = sorted(by_gender.items(), key=lambda kv: -kv[1])
+        self.by_political = sorted(by_political.items(), key=lambda kv: -kv[1])
+        self.by_class = sorted(by_class.items())
+        self.major_gender = {major: dict(genders) for major, genders in major_gender.items()}
+
+
+def dashboard():
+    refresher = current_app.extensions.get("stats_refresher")
+    if refresher is not None:
+        refresher.ensure_started()
+    rows = db.session.execute(select(StudentStat)).scalars().all()
+    if not rows and db.session.query(Student.id).limit(1).first() is not None:
+        # 首次部署或汇总表被清空：同步重建一次，直接用重建得到的分组行
+        rows = refresh()
+    return Dashboard(rows)
+
+
+class StatsRefresher:
+    """后台重建线程：标记脏后等待 delay 秒合并后续写入，再整表重建；空闲时每 interval 秒兜底重建一次。
+
+    两种重建都先看汇总表的 refreshed_at：写入触发的在 min_interval 秒内、兜底的在 interval 秒内已有进程重建过就跳过；
+    写入触发而被跳过时，等窗口结束再重建一次，保证这批写入最终计入。
+    """
+
+    def __init__(self, app, delay, interval, min_interval):
+        self.app = app
+        self.delay = delay
+        self.interval = interval
+        self.min_interval = min_interval
+        self._dirty = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def ensure_started(self):
+        # 延迟启动：gunicorn --preload 时线程需在 fork 之后的 worker 中创建
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="stats-refresh", daemon=True)
+                self._thread.start()
+
+    def mark_dirty(self):
+        self._dirty.set()
+        self.ensure_started()
+
+    def _run(self):
+        while True:
+            dirty = self._dirty.wait(timeout=self.interval)
+            if dirty:
+                time.sleep(self.delay)
+            # 先清标记再重建：重建期间的新写入会再触发一轮
+            self._dirty.clear()
+            try:
+                with self.app.app_context():
+                    wait = refresh_if_stale(self.min_interval if dirty else self.interval)
+            except Exception:
+                self.app.logger.exception("[STATS] Refresh failed")
+                continue
+            if dirty and wait:
+                time.sleep(wait)
+                self._dirty.set()
+
+
+def _on_students_changed(app, student_ids=None):
+    mode = app.config.get("STATS_REFRESH")
+    if mode == "inline":
+        refresh()
+    else:
+        app.extensions["stats_refresher"].mark_dirty()
+
+
+def init_app(app):
+    """STATS_REFRESH: background（默认，后台线程合并重建）/ inline（写入后同步重建，用于测试）/ off（只在看板手动刷新）"""
+    mode = app.config.get("STATS_REFRESH", "background")
+    if mode == "off":
+        return
+    if mode == "background":
+        app.extensions["stats_refresher"] = StatsRefresher(
+            app, app.config.get("STATS_REFRESH_DELAY", 2), app.config.get("STATS_REFRESH_INTERVAL", 300),
+            app.config.get("STATS_REFRESH_MIN_INTERVAL", 30),
+        )
+    students_changed.connect(_on_students_changed, sender=app, weak=False)
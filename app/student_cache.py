@@ -0,0 +1,126 @@
+"""按学号查询学生的缓存（学生端登录页与信息更新页）。
+
+缓存的是只读快照（StudentSnapshot），需要写入时仍从数据库加载 ORM 对象。
+键中带有“代数”：失效时只把代数加一，正在进行的读取即使随后写回旧值，也写在旧代数的键上，不会被读到。
+所有写路径在 commit 后通过 signals.notify_students_changed 触发失效。
+后端可选进程内 LRU（local，只收得到本进程的失效，适合单 worker）或共享的 Redis（redis，多 worker 与命令行共用）；
+后端出错（如 Redis 连不上）时读取直接查库、失效跳过并记警告，缓存故障不影响登录和保存，旧快照最多保留 TTL 秒。
+"""
+from datetime import datetime
+from flask import current_app
+from .cache import RedisCache, TTLCache
+from .models import Student
+from .signals import students_changed
+
+
+SNAPSHOT_FIELDS = [c.name for c in Student.__table__.columns]
+_DATETIME_FIELDS = ("created_at", "updated_at")
+
+
+class StudentSnapshot:
+    """Student 的只读副本，字段与模型一致，可直接作为表单 obj 和模板变量使用"""
+
+    __slots__ = SNAPSHOT_FIELDS
+
+    def __init__(self, **values):
+        for field in SNAPSHOT_FIELDS:
+            setattr(self, field, values.get(field))
+
+    @classmethod
+    def from_model(cls, stu):
+        return cls(**{field: getattr(stu, field) for field in SNAPSHOT_FIELDS})
+
+    def to_dict(self):
+        data = {field: getattr(self, field) for field in SNAPSHOT_FIELDS}
+        for field in _DATETIME_FIELDS:
+            if data[field] is not None:
+                data[field] = data[field].isoformat()
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        data = dict(data)
+        for field in _DATETIME_FIELDS:
+            if data.get(field):
+                data[field] = datetime.fromisoformat(data[field])
+        return cls(**data)
+
+    def last4_of_id(self) -> str:
+        return (self.id_card or "")[-4:]
+
+
+class StudentCache:
+    def __init__(self, backend, ttl):
+        self.backend = backend
+        self.ttl = ttl
+
+    def _key(self, student_id):
+        gen_all, gen_one = self.backend.get_many(["gen", f"gen:{student_id}"])
+        return f"student:{student_id}:{gen_all or 0}.{gen_one or 0}"
+
+    def get(self, student_id, loader):
+        try:
+            key = self._key(student_id)
+            data = self.backend.get(key)
+        except Exception:
+            current_app.logger.warning("[CACHE] Student cache read failed, loading from database", exc_info=True)
+            stu = loader(student_id)
+            return StudentSnapshot.from_model(stu) if stu else None
+        if data is None:
+            stu = loader(student_id)
+            # 不存在的学号也缓存（空字典），登录页高峰期大量未录入学号同样不再查库
+            data = StudentSnapshot.from_model(stu).to_dict() if stu else {}
+            try:
+                self.backend.set(key, data, self.ttl)
+            except Exception:
+                current_app.logger.warning("[CACHE] Student cache write failed", exc_info=True)
+        return StudentSnapshot.from_dict(data) if data else None
+
+    def invalidate(self, student_ids=None):
+        try:
+            if student_ids is None:
+                self.backend.incr("gen")
+                return
+            # 单个学号的代数键随学号增长，需要过期；过期前所有旧代数的快照都已过期，代数归零后不会读到旧值
+            for sid in student_ids:
+                self.backend.incr(f"gen:{sid}", self.ttl * 2)
+        except Exception:
+            # 数据已经提交，失效失败不能让写请求报错；缓存中的旧快照在 TTL 后过期
+            current_app.logger.warning("[CACHE] Student cache invalidation skipped", exc_info=True)
+
+
+def _load(student_id):
+    return Student.query.filter_by(student_id=student_id).first()
+
+
+def get_student(student_id):
+    """按学号取学生快照，未启用缓存时直接查库"""
+    cache = current_app.extensions.get("student_cache")
+    if cache is None:
+        stu = _load(student_id)
+        return StudentSnapshot.from_model(stu) if stu else None
+    return cache.get(student_id, _load)
+
+
+def _on_students_changed(app, student_ids=None):
+    cache = app.extensions.get("student_cache")
+    if cache is not None:
+        cache.invalidate(student_ids)
+
+
+def init_app(app):
+    """STUDENT_CACHE: none（默认，直接查库）/ local（进程内 LRU）/ redis（共享，需要 redis 包和 STUDENT_CACHE_REDIS_URL）"""
+    kind = app.config.get("STUDENT_CACHE", "none")
+    ttl = app.config.get("STUDENT_CACHE_TTL", 60)
+    if kind == "redis":
+        try:
+            backend = RedisCache(app.config["STUDENT_CACHE_REDIS_URL"], prefix="sis:stu:", ttl=ttl)
+        except ImportError:
+            app.logger.warning("[CACHE] STUDENT_CACHE=redis but the redis package is not installed, cache disabled")
+            return
+    elif kind == "local":
+        backend = TTLCache(maxsize=app.config.get("STUDENT_CACHE_SIZE", 10000), ttl=ttl)
+    else:
+        return
+    app.extensions["student_cache"] = StudentCache(backend, ttl)
+    students_changed.connect(_on_students_changed, sender=app, weak=False)
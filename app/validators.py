@@ -1,5 +1,21 @@
 import re
 
+try:
+    import numpy as np
+except ImportError:  # numpy 未安装时批量校验退回逐个校验
+    np = None
+
+
+# 与 StudentCreateForm 一致的字段规则，表单和批量导入共用
+NAME_PATTERN = r"^[\u4e00-\u9fa5]{2,4}$"
+STUDENT_ID_PATTERN = r"^\d{10}$"
+PHONE_PATTERN = r"^1\d{10}$"
+CLAZZ_PATTERN = r"^\d{5}$"
+
+_NAME_RE = re.compile(NAME_PATTERN)
+_STUDENT_ID_RE = re.compile(STUDENT_ID_PATTERN)
+_PHONE_RE = re.compile(PHONE_PATTERN)
+_CLAZZ_RE = re.compile(CLAZZ_PATTERN)
 
 _ID18_RE = re.compile(r"^[1-9]\d{5}(19|20)\d{2}(0[1-9]|1[0-2])(0[1-9]|[12]\d|3[01])\d{3}[0-9Xx]$")
 _WEIGHT = [7, 9, 10, 5, 8, 4, 2, 1, 6, 3, 7, 9, 10, 5, 8, 4, 2]
@@ -18,5 +34,123 @@ def is_valid_china_id18(id_card: str) -> bool:
     return check == id_card[-1].upper()
 
 
+# ---- 批量校验（导入用）：按列计算，每行返回一个原因码，0 为合法 ----
+
+REASON_OK = 0
+REASON_REQUIRED = 1
+REASON_STUDENT_ID = 2
+REASON_NAME = 3
+REASON_ID_FORMAT = 4
+REASON_ID_CHECKSUM = 5
+REASON_PHONE = 6
+REASON_CLAZZ = 7
+
+REASON_TEXT = {
+    REASON_REQUIRED: "缺少学号或姓名",
+    REASON_STUDENT_ID: "学号为10位数字",
+    REASON_NAME: "请输入2-4个中文姓名",
+    REASON_ID_FORMAT: "身份证号码格式不正确",
+    REASON_ID_CHECKSUM: "身份证号码校验位错误",
+    REASON_PHONE: "手机号为1开头11位数字",
+    REASON_CLAZZ: "班级为5位数字",
+}
+
+_CHECK_CODES = np.frombuffer("".join(_CHECK_MAP).encode("ascii"), dtype=np.uint8) if np is not None else None
+_WEIGHT_ARR = np.array(_WEIGHT, dtype=np.int32) if np is not None else None
+
+
+class BatchResult:
+    """批量校验结果：codes[i] 为第 i 行的原因码，mask[i] 为 True 表示合法"""
+
+    def __init__(self, codes):
+        self.codes = codes
+
+    @property
+    def mask(self):
+        if np is not None:
+            return np.asarray(self.codes) == REASON_OK
+        return [c == REASON_OK for c in self.codes]
+
+    def reason(self, i) -> str:
+        return REASON_TEXT.get(int(self.codes[i]), "")
+
+
+def _id18_code(value) -> int:
+    if not isinstance(value, str) or not _ID18_RE.match(value.strip()):
+        return REASON_ID_FORMAT
+    return REASON_OK if is_valid_china_id18(value) else REASON_ID_CHECKSUM
+
+
+def _id18_codes_np(values):
+    n = len(values)
+    cand = [v.strip() if isinstance(v, str) else "" for v in values]
+    cand = [v if len(v) == 18 and v.isascii() else "" for v in cand]
+    well_sized = np.fromiter((bool(v) for v in cand), dtype=bool, count=n)
+    # 每行 18 个 ASCII 字节 -> n x 18 的 uint8 矩阵；长度不对的行用占位串填充，稍后按 well_sized 判为格式错误
+    m = np.frombuffer("".join(v or "0" * 18 for v in cand).encode("ascii"), dtype=np.uint8).reshape(n, 18)
+    d = m[:, :17] - np.uint8(48)  # 非数字字符下溢为 >9 的值
+    last = m[:, 17]
+    last = np.where(last == ord("x"), np.uint8(ord("X")), last)
+    year = d[:, 6].astype(np.int16) * 10 + d[:, 7]
+    month = d[:, 10].astype(np.int16) * 10 + d[:, 11]
+    day = d[:, 12].astype(np.int16) * 10 + d[:, 13]
+    well_formed = (
+        well_sized
+        & (d <= 9).all(axis=1)
+        & ((last - np.uint8(48) <= 9) | (last == ord("X")))
+        & (d[:, 0] != 0)
+        & ((year == 19) | (year == 20))
+        & (month >= 1) & (month <= 12)
+        & (day >= 1) & (day <= 31)
+    )
+    # 校验位：17 位本体与权重做一次矩阵乘法
+    expected = _CHECK_CODES[(d.astype(np.int32) @ _WEIGHT_ARR) % 11]
+    codes = np.where(expected == last, REASON_OK, REASON_ID_CHECKSUM).astype(np.uint8)
+    codes[~well_formed] = REASON_ID_FORMAT
+    return codes
+
+
+def validate_id18(values) -> BatchResult:
+    """批量校验身份证号（list 或 NumPy 数组），规则与 is_valid_china_id18 一致"""
+    if len(values) == 0:
+        return BatchResult(np.zeros(0, dtype=np.uint8) if np is not None else [])
+    if np is not None:
+        return BatchResult(_id18_codes_np(values))
+    return BatchResult([_id18_code(v) for v in values])
+
+
+def validate_pattern(values, pattern, code) -> BatchResult:
+    """按正则逐列校验，不匹配的行记为 code"""
+    regex = re.compile(pattern) if isinstance(pattern, str) else pattern
+    codes = [REASON_OK if isinstance(v, str) and regex.match(v) else code for v in values]
+    return BatchResult(np.array(codes, dtype=np.uint8) if np is not None else codes)
 
 
+def validate_student_columns(columns: dict) -> BatchResult:
+    """按 StudentCreateForm 的规则校验整批导入数据，columns 为 字段名 -> 等长的值列；
+    每行取优先级最高的一个原因：必填 > 学号 > 姓名 > 身份证 > 手机号 > 班级（后三项为空时不校验）"""
+    n = len(columns["student_id"])
+    required = [REASON_OK if sid and name else REASON_REQUIRED
+                for sid, name in zip(columns["student_id"], columns["name"])]
+    checks = [
+        (validate_pattern(columns["student_id"], _STUDENT_ID_RE, REASON_STUDENT_ID).codes, None),
+        (validate_pattern(columns["name"], _NAME_RE, REASON_NAME).codes, None),
+        (validate_id18(columns["id_card"]).codes, columns["id_card"]),
+        (validate_pattern(columns["phone"], _PHONE_RE, REASON_PHONE).codes, columns["phone"]),
+        (validate_pattern(columns["clazz"], _CLAZZ_RE, REASON_CLAZZ).codes, columns["clazz"]),
+    ]
+    if np is not None:
+        codes = np.array(required, dtype=np.uint8)
+        for rule_codes, optional_col in checks:
+            failed = rule_codes != REASON_OK
+            if optional_col is not None:
+                failed &= np.fromiter((bool(v) for v in optional_col), dtype=bool, count=n)
+            pick = (codes == REASON_OK) & failed
+            codes[pick] = rule_codes[pick]
+        return BatchResult(codes)
+    codes = required
+    for rule_codes, optional_col in checks:
+        for i in range(n):
+            if codes[i] == REASON_OK and rule_codes[i] != REASON_OK and (optional_col is None or optional_col[i]):
+                codes[i] = rule_codes[i]
+    return BatchResult(codes)
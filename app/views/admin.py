@@ -1,14 +1,18 @@
-import io
 import os
 from datetime import datetime
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session, send_file, current_app
-from sqlalchemy import or_
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session, current_app, Response, stream_with_context, jsonify, send_file
+from sqlalchemy import select
 from ..extensions import db
-from ..models import Student, Admin
-from openpyxl import Workbook
-from ..forms import BulkImportForm, AdminLoginForm, StudentEditForm, StudentCreateForm
+from ..models import Student, Admin, ImportJob
+from .. import importer, exporter, jobs, stats, rendering, roster, bulk
+from ..queries import StudentFilter
+from ..pagination import KeysetPagination
+from ..dbpool import pool_stats
+from ..instrumentation import registry as metrics_registry
+from ..routing import read_only
+from ..signals import notify_students_changed
+from ..forms import BulkImportForm, BulkEditForm, AdminLoginForm, StudentEditForm, StudentCreateForm
 from werkzeug.utils import secure_filename
-import csv
 
 
 bp = Blueprint("admin", __name__)
@@ -37,138 +41,132 @@ def logout():
     return redirect(url_for("admin.login"))
 
 
+@bp.route("/pool")
+def pool_status():
+    """各数据库连接池的当前占用情况"""
+    if not _is_logged_in():
+        return redirect(url_for("admin.login"))
+    return jsonify({str(name or "default"): pool_stats(engine) for name, engine in db.engines.items()})
+
+
+@bp.route("/metrics")
+def metrics():
+    """Prometheus 文本格式的请求/SQL/模板耗时汇总（本进程）"""
+    token = current_app.config.get("METRICS_TOKEN")
+    if not (_is_logged_in() or (token and request.headers.get("Authorization") == f"Bearer {token}")):
+        return redirect(url_for("admin.login"))
+    body = metrics_registry.render_prometheus()
+    snapshot = current_app.extensions.get("roster_snapshot")
+    if snapshot is not None:
+        body += snapshot.render_prometheus()
+    return Response(body, mimetype="text/plain; version=0.0.4")
+
+
+@bp.route("/stats")
+def stats_dashboard():
+    """专业/行政班级/性别/政治面貌人数，读预聚合的 student_stats 表
+
+    不走副本：汇总表只有几百行，而首次访问可能要在主库上重建，重建后立即读副本会因延迟读到空表。
+    """
+    if not _is_logged_in():
+        return redirect(url_for("admin.login"))
+    return render_template("admin_stats.html", dash=stats.dashboard())
+
+
+@bp.route("/stats/refresh", methods=["POST"])
+def stats_refresh():
+    if not _is_logged_in():
+        return redirect(url_for("admin.login"))
+    stats.refresh()
+    flash("统计数据已刷新", "success")
+    return redirect(url_for("admin.stats_dashboard"))
+
+
 @bp.route("/students")
+@read_only
 def list_students():
     if not _is_logged_in():
         return redirect(url_for("admin.login"))
 
-    q = request.args.get("q", "").strip()
-    genders = [g.strip() for g in request.args.getlist("gender") if g.strip()]
-    majors = [m.strip() for m in request.args.getlist("major") if m.strip()]
-    clazz_param = request.args.get("clazz", "").strip()
-    clazz_list = [c for c in [x.strip() for x in clazz_param.split(",")] if c]
-    page = max(int(request.args.get("page", 1) or 1), 1)
+    filters = StudentFilter.from_args(request.args)
     per_page = 40
 
-    query = Student.query
-    if q:
-        like = f"%{q}%"
-        query = query.filter(
-            or_(
-                Student.name.like(like),
-                Student.student_id.like(like),
-                Student.id_card.like(like),
-                Student.phone.like(like),
-                Student.major.like(like),
-                Student.clazz.like(like),
-            )
-        )
-    if genders:
-        query = query.filter(Student.gender.in_(genders))
-    if majors:
-        query = query.filter(Student.major.in_(majors))
-    if clazz_list:
-        query = query.filter(Student.clazz.in_(clazz_list))
-
-    pagination = query.order_by(Student.student_id.asc()).paginate(page=page, per_page=per_page, error_out=False)
+    if current_app.config.get("LIST_PAGINATION") == "offset":
+        page = max(int(request.args.get("page", 1) or 1), 1)
+        query = filters.apply(db.session.query(*rendering.ROW_COLUMNS))
+        pagination = query.order_by(Student.student_id.asc()).paginate(page=page, per_page=per_page, error_out=False)
+    else:
+        # 默认按 student_id 做 seek 分页，深翻页不再有 OFFSET 扫描；开启名册快照时先在本进程内查询
+        cursor = request.args.get("cursor", "")
+        pagination = roster.paginate(filters, cursor, per_page=per_page)
+        if pagination is None:
+            pagination = KeysetPagination(filters, cursor, per_page=per_page, columns=rendering.ROW_COLUMNS)
     import_form = BulkImportForm()
-    current_gender = genders[0] if genders else ""
-    current_major = majors[0] if majors else ""
+    # 最近一次导入任务：未完成时页面轮询进度；已完成的结果只展示一次
+    import_job = None
+    if session.get("import_job"):
+        job = jobs.get_job(session["import_job"])
+        if job is None or job.finished:
+            session.pop("import_job", None)
+        if job is not None:
+            import_job = _job_json(job)
+    current_gender = filters.genders[0] if filters.genders else ""
+    current_major = filters.majors[0] if filters.majors else ""
     return render_template(
         "admin_list.html",
-        students=pagination.items,
-        q=q,
+        student_rows=rendering.render_rows(pagination.items),
+        q=filters.q,
         gender=current_gender,
         major=current_major,
-        clazz=clazz_param,
+        clazz=filters.clazz,
         import_form=import_form,
+        bulk_edit_form=BulkEditForm(),
+        import_job=import_job,
         pagination=pagination,
     )
 
 
 @bp.route("/export")
+@read_only
 def export_excel():
-    import io
     if not _is_logged_in():
         return redirect(url_for("admin.login"))
 
-    q = request.args.get("q", "").strip()
-    gender = request.args.get("gender", "").strip()
-    major = request.args.get("major", "").strip()
-    clazz = request.args.get("clazz", "").strip()
     fmt = (request.args.get("format", "xlsx") or "xlsx").lower()
-
-    all_fields = [
-        "student_id", "name", "gender", "ethnicity", "hometown", "political_status", "id_card", "phone", "major", "clazz", "admin_class", "created_at", "updated_at"
-    ]
-    req_fields = request.args.getlist("fields")
-    if not req_fields:
-        fields = all_fields
-    else:
-        # 只用 intersection 部分, 且用页面顺序排序
-        fields = [f for f in all_fields if f in req_fields]
-
+    fields = exporter.select_fields(request.args.getlist("fields"))
     student_ids = request.args.getlist("student_ids")
-    field_map = {
-        "student_id": "学号",
-        "name": "姓名",
-        "gender": "性别",
-        "ethnicity": "民族",
-        "hometown": "籍贯",
-        "political_status": "政治面貌",
-        "id_card": "身份证号码",
-        "phone": "电话号码",
-        "major": "专业",
-        "clazz": "班级",
-        "admin_class": "行政班级",
-        "created_at": "创建时间",
-        "updated_at": "更新时间"
-    }
-    headers = [field_map.get(field, field) for field in fields]
     if student_ids:
-        query = Student.query.filter(Student.id.in_(student_ids))
-        students = query.order_by(Student.updated_at.desc()).all()
+        # 导出勾选的行
+        stmt = select(Student).where(Student.id.in_(student_ids))
     else:
-        students = []
+        # 未勾选时按筛选条件导出全部匹配行（与列表页同一套查询条件）
+        stmt = StudentFilter.from_args(request.args).apply(select(Student))
+    stmt = stmt.order_by(Student.updated_at.desc())
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
     if fmt == "csv":
-        import csv
-        buf = io.StringIO()
-        w = csv.writer(buf)
-        w.writerow(headers)
-        for s in students:
-            row = []
-            for field in fields:
-                if field == "created_at":
-                    row.append(s.created_at.strftime("%Y-%m-%d %H:%M:%S") if s.created_at else "")
-                elif field == "updated_at":
-                    row.append(s.updated_at.strftime("%Y-%m-%d %H:%M:%S") if s.updated_at else "")
-                else:
-                    row.append(getattr(s, field, ""))
-            w.writerow(row)
-        data = io.BytesIO(buf.getvalue().encode("utf-8-sig"))
-        filename = f"students_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-        return send_file(data, as_attachment=True, download_name=filename, mimetype="text/csv")
+        # 生成器响应，按批从数据库读取并输出
+        filename = f"students_{timestamp}.csv"
+        response = Response(stream_with_context(exporter.stream_csv(stmt, fields)), mimetype="text/csv")
+        response.headers["Content-Disposition"] = f"attachment; filename={filename}"
+        return response
+    elif fmt in exporter.COLUMNAR_FORMATS:
+        if not exporter.columnar_available():
+            flash("服务器未安装 pyarrow，无法导出 Parquet/Arrow 格式", "warning")
+            return redirect(url_for("admin.list_students"))
+        ext, mimetype = exporter.COLUMNAR_FORMATS[fmt]
+        path = exporter.write_columnar(stmt, fields, fmt)
+        filename = f"students_{timestamp}.{ext}"
+        response = Response(exporter.stream_file(path), mimetype=mimetype)
+        response.headers["Content-Disposition"] = f"attachment; filename={filename}"
+        response.headers["Content-Length"] = str(os.path.getsize(path))
+        return response
     else:
-        from openpyxl import Workbook
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "学生信息"
-        ws.append(headers)
-        for s in students:
-            row = []
-            for field in fields:
-                if field == "created_at":
-                    row.append(s.created_at.strftime("%Y-%m-%d %H:%M:%S") if s.created_at else "")
-                elif field == "updated_at":
-                    row.append(s.updated_at.strftime("%Y-%m-%d %H:%M:%S") if s.updated_at else "")
-                else:
-                    row.append(getattr(s, field, ""))
-            ws.append(row)
-        buf = io.BytesIO()
-        wb.save(buf)
-        buf.seek(0)
-        filename = f"students_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-        return send_file(buf, as_attachment=True, download_name=filename, mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+        path = exporter.write_xlsx(stmt, fields)
+        filename = f"students_{timestamp}.xlsx"
+        response = Response(exporter.stream_file(path), mimetype=exporter.XLSX_MIMETYPE)
+        response.headers["Content-Disposition"] = f"attachment; filename={filename}"
+        response.headers["Content-Length"] = str(os.path.getsize(path))
+        return response
 
 
 @bp.route("/import", methods=["POST"])
@@ -187,243 +185,105 @@ def import_bulk():
 
     filename = secure_filename(file.filename)
     ext = os.path.splitext(filename)[1].lower()
-    current_app.logger.info("[IMPORT] Start import: filename=%s, ext=%s", filename, ext)
-
-    # 流式读取，避免占用过多内存
-    try:
-        headers = []
-        row_iter = None
-        is_excel = False
-        MAX_ROWS = 20000
-        if ext in [".xlsx", ".xlsm", ".xltx", ".xltm"]:
-            from openpyxl import load_workbook
-            wb = load_workbook(file, data_only=True, read_only=True)
-            ws = wb.active
-            header_row = next(ws.iter_rows(min_row=1, max_row=1, values_only=True))
-            headers = [ (c or "").strip() if isinstance(c, str) else ("" if c is None else str(c).strip()) for c in header_row ]
-            current_app.logger.info("[IMPORT] Detected headers (xlsx): %s", headers)
-            row_iter = ws.iter_rows(min_row=2, values_only=True)
-            is_excel = True
-        elif ext in [".csv", ".txt"]:
-            import io as _io
-            file.stream.seek(0)
-            text_stream = _io.TextIOWrapper(file.stream, encoding="utf-8-sig", newline="")
-            reader = csv.reader(text_stream)
-            headers = next(reader, [])
-            current_app.logger.info("[IMPORT] Detected headers (csv): %s", headers)
-            row_iter = reader
-        else:
-            flash("不支持的文件格式", "danger")
-            current_app.logger.warning("[IMPORT] Unsupported file extension: %s", ext)
-            return redirect(url_for("admin.list_students"))
-    except Exception as e:
-        flash(f"文件读取失败: {e}", "danger")
-        current_app.logger.exception("[IMPORT] Failed to read file: %s", e)
+    if ext not in importer.EXCEL_EXTS + importer.CSV_EXTS:
+        flash("不支持的文件格式", "danger")
+        current_app.logger.warning("[IMPORT] Unsupported file extension: %s", ext)
         return redirect(url_for("admin.list_students"))
 
-    # 允许缺列为空，多余列忽略；忽略“行政班级”列，自动生成
-    # 支持表头中文：姓名、性别、学号、身份证号码、电话号码/电话、专业、班级、籍贯、行政班级（忽略）
-    key_alias = {
-        "姓名": "name",
-        "性别": "gender",
-        "学号": "student_id",
-        "身份证": "id_card",
-        "身份证号码": "id_card",
-        "电话": "phone",
-        "电话号码": "phone",
-        "专业": "major",
-        "班级": "clazz",
-        "民族": "ethnicity",
-        "籍贯": "hometown",
-        "政治面貌": "political_status",
-        "行政班级": "admin_class_ignored",
-    }
-    # 规范化表头 -> 字段名（去空白、大小写、BOM、常见中英对照）
-    def _norm_str(s):
-        if s is None:
-            return ""
-        s = str(s).strip().lstrip("\ufeff").lower()
-        return s
-    header_alias_ext = {
-        "name": "name",
-        "gender": "gender",
-        "student_id": "student_id",
-        "studentid": "student_id",
-        "id": "student_id",
-        "id_card": "id_card",
-        "idcard": "id_card",
-        "identity": "id_card",
-        "phone": "phone",
-        "mobile": "phone",
-        "tel": "phone",
-        "major": "major",
-        "class": "clazz",
-        "clazz": "clazz",
-        "class_no": "clazz",
-        "ethnicity": "ethnicity",
-        "hometown": "hometown",
-        "political_status": "political_status",
-        "admin_class": "admin_class_ignored",
-        "adminclass": "admin_class_ignored",
-    }
-    norm_headers = []
-    for h in headers:
-        raw = _norm_str(h)
-        # 先中文别名，再英文别名
-        mapped = key_alias.get(h if isinstance(h, str) else h, "")
-        if not mapped:
-            mapped = header_alias_ext.get(raw, "")
-        norm_headers.append(mapped)
-    current_app.logger.info("[IMPORT] Normalized headers: %s", norm_headers)
-    if not any(norm_headers):
-        # 无法识别表头时，按默认顺序做位置推断；使用 headers 的长度作为基准
-        length = len(headers)
-        first_vals = []
-        default_order = ["name", "gender", "student_id", "id_card", "phone", "major", "clazz", "ethnicity", "hometown", "political_status"]
-        lead_empty = 1 if (first_vals and str(first_vals[0]).strip().isdigit() and length >= 2) else 0
-        norm_headers = ([""] * lead_empty) + default_order
-        norm_headers = norm_headers[:length]
-        current_app.logger.warning("[IMPORT] Using positional header mapping: %s", norm_headers)
-
-    inserted, updated, failed = 0, 0, 0
-    processed = 0
-    # 记录本次导入过程中新增但尚未提交的 student_id -> Student 对象，避免同一文件中重复学号导致唯一键冲突
-    pending_new_by_sid = {}
-    BATCH_SIZE = 500
-    for idx, row in enumerate(row_iter, start=2):  # 数据从第2行开始
-        try:
-            values = {}
-            # Excel: row 是值列表；CSV: row 是字符串列表
-            if is_excel:
-                cells = list(row)
-                if not any(cells):
-                    continue
-                for cidx, field in enumerate(norm_headers):
-                    if not field or field == "admin_class_ignored":
-                        continue
-                    if cidx >= len(cells):
-                        values[field] = ""
-                        continue
-                    cv = cells[cidx]
-                    if field in ("student_id", "id_card", "phone", "clazz"):
-                        # 强制转字符串并做必要补零
-                        if cv is None:
-                            s = ""
-                        elif isinstance(cv, (int, float)):
-                            # 避免 1.0 之类格式
-                            iv = int(cv)
-                            s = str(iv)
-                        else:
-                            s = str(cv).strip()
-                        if field == "student_id":
-                            s = s.zfill(10) if s else s
-                        elif field == "id_card":
-                            s = s.zfill(18) if s and len(s) < 18 and s.isdigit() else s
-                        elif field == "phone":
-                            s = s.zfill(11) if s and len(s) < 11 and s.isdigit() else s
-                        elif field == "clazz":
-                            s = s.zfill(5) if s and len(s) < 5 and s.isdigit() else s
-                        values[field] = s
-                    else:
-                        values[field] = "" if cv is None else str(cv).strip()
-            else:  # CSV/TXT
-                cells = ["" if x is None else str(x).strip() for x in row]
-                if not any(cells):
-                    continue
-                for cidx, field in enumerate(norm_headers):
-                    if not field or field == "admin_class_ignored":
-                        continue
-                    v = cells[cidx] if cidx < len(cells) else ""
-                    if field == "student_id":
-                        v = v.zfill(10) if v and v.isdigit() and len(v) < 10 else v
-                    elif field == "id_card":
-                        v = v.zfill(18) if v and v.isdigit() and len(v) < 18 else v
-                    elif field == "phone":
-                        v = v.zfill(11) if v and v.isdigit() and len(v) < 11 else v
-                    elif field == "clazz":
-                        v = v.zfill(5) if v and v.isdigit() and len(v) < 5 else v
-                    values[field] = v
-
-            name = values.get("name", "")
-            gender = values.get("gender", "")
-            student_id = values.get("student_id", "")
-            id_card = values.get("id_card", "")
-            phone = values.get("phone", "")
-            major = values.get("major", "")
-            clazz = values.get("clazz", "")
-            ethnicity = values.get("ethnicity", "")
-            hometown = values.get("hometown", "")
-            political_status = values.get("political_status", "")
-
-            # 仅要求识别标识和基本姓名，其余字段若缺失则留空
-            if not all([student_id, name]):
-                failed += 1
-                current_app.logger.warning(
-                    "[IMPORT] Row %d failed required check: values=%s", idx, values
-                )
-                continue
-
-            # 先检查本批次新增缓存，再查询数据库；使用 no_autoflush 防止查询触发未提交对象的提前 flush
-            stu = pending_new_by_sid.get(student_id)
-            if stu is None:
-                with db.session.no_autoflush:
-                    stu = Student.query.filter_by(student_id=student_id).first()
-            if stu:
-                stu.name = name
-                stu.gender = gender
-                stu.id_card = id_card
-                stu.phone = phone
-                stu.major = major
-                stu.clazz = clazz
-                stu.ethnicity = ethnicity or ""
-                stu.hometown = hometown or ""
-                stu.political_status = political_status or ""
-                stu.update_admin_class()
-                updated += 1
-                current_app.logger.debug("[IMPORT] Row %d -> update student_id=%s", idx, student_id)
-            else:
-                new_stu = Student(
-                name=name,
-                gender=gender,
-                student_id=student_id,
-                id_card=id_card,
-                phone=phone,
-                major=major,
-                clazz=clazz,
-                ethnicity=ethnicity or "",
-                hometown=hometown or "",
-                political_status=political_status or "",
-            )
-                new_stu.update_admin_class()
-                db.session.add(new_stu)
-                pending_new_by_sid[student_id] = new_stu
-                inserted += 1
-                current_app.logger.debug("[IMPORT] Row %d -> insert student_id=%s", idx, student_id)
-            processed += 1
-            if processed % BATCH_SIZE == 0:
-                try:
-                    db.session.flush()
-                except Exception as _e:
-                    current_app.logger.exception("[IMPORT] Flush failed at row %d", idx)
-        except Exception:
-            failed += 1
-            current_app.logger.exception("[IMPORT] Row %d processing error", idx)
-        if processed >= MAX_ROWS:
-            current_app.logger.warning("[IMPORT] Reached MAX_ROWS limit: %d", MAX_ROWS)
-            break
+    # 请求内只保存文件并登记任务，解析和写入由后台线程执行
     try:
-        db.session.commit()
-        current_app.logger.info("[IMPORT] Done. inserted=%d, updated=%d, failed=%d", inserted, updated, failed)
+        job = jobs.submit(file, filename, created_by=session.get("admin_username"), dry_run=form.dry_run.data)
     except Exception as e:
         db.session.rollback()
-        flash(f"导入提交失败: {e}", "danger")
-        current_app.logger.exception("[IMPORT] Commit failed: %s", e)
+        flash(f"文件保存失败: {e}", "danger")
+        current_app.logger.exception("[IMPORT] Failed to save upload: %s", e)
         return redirect(url_for("admin.list_students"))
+    current_app.logger.info("[IMPORT] Job %s queued: filename=%s", job.id, filename)
+    session["import_job"] = job.id
+    _flash_job_started(job)
+    return redirect(url_for("admin.list_students"))
+
+
+def _flash_job_started(job):
+    if job.status == ImportJob.STATUS_DONE and job.dry_run:
+        flash(f"预览完成：将新增 {job.inserted} 条，更新 {job.updated} 条，{job.unchanged} 条无变化，失败 {job.failed} 条", "info")
+    elif job.status == ImportJob.STATUS_DONE:
+        flash(f"导入完成：新增 {job.inserted} 条，更新 {job.updated} 条，{job.unchanged} 条无变化，失败 {job.failed} 条", "success")
+    elif not job.finished:
+        flash("文件已上传，正在后台" + ("预览" if job.dry_run else "导入") + "，可在本页查看进度", "info")
 
-    flash(f"导入完成：新增 {inserted} 条，更新 {updated} 条，失败 {failed} 条", "success")
+
+@bp.route("/import/jobs/<job_id>/confirm", methods=["POST"])
+def import_job_confirm(job_id):
+    """按预览过的文件执行导入，只写入有变化的行"""
+    if not _is_logged_in():
+        return redirect(url_for("admin.login"))
+    job = jobs.confirm(job_id, created_by=session.get("admin_username"))
+    if job is None:
+        flash("预览已失效或已确认，请重新上传", "warning")
+        return redirect(url_for("admin.list_students"))
+    current_app.logger.info("[IMPORT] Job %s queued from preview %s", job.id, job_id)
+    session["import_job"] = job.id
+    _flash_job_started(job)
     return redirect(url_for("admin.list_students"))
 
 
+def _job_json(job):
+    data = job.to_dict()
+    if jobs.has_error_report(job):
+        data["error_report_url"] = url_for("admin.import_job_errors", job_id=job.id)
+    if jobs.has_diff_report(job):
+        data["diff_report_url"] = url_for("admin.import_job_diff", job_id=job.id)
+        data["diff_sample"] = jobs.diff_sample(job)
+    if jobs.can_confirm(job):
+        data["confirm_url"] = url_for("admin.import_job_confirm", job_id=job.id)
+    return data
+
+
+@bp.route("/import/jobs/<job_id>")
+def import_job_status(job_id):
+    if not _is_logged_in():
+        return jsonify({"error": "unauthorized"}), 401
+    job = jobs.get_job(job_id)
+    if job is None:
+        return jsonify({"error": "not found"}), 404
+    return jsonify(_job_json(job))
+
+
+@bp.route("/import/jobs/<job_id>/cancel", methods=["POST"])
+def import_job_cancel(job_id):
+    if not _is_logged_in():
+        return jsonify({"error": "unauthorized"}), 401
+    job = jobs.cancel(job_id)
+    if job is None:
+        return jsonify({"error": "not found"}), 404
+    return jsonify(_job_json(job))
+
+
+@bp.route("/import/jobs/<job_id>/errors")
+def import_job_errors(job_id):
+    if not _is_logged_in():
+        return redirect(url_for("admin.login"))
+    job = jobs.get_job(job_id)
+    if job is None or not jobs.has_error_report(job):
+        flash("没有可下载的错误报告", "warning")
+        return redirect(url_for("admin.list_students"))
+    return send_file(jobs.error_report_path(current_app, job), mimetype="text/csv",
+                     as_attachment=True, download_name=f"import_errors_{job.id}.csv")
+
+
+@bp.route("/import/jobs/<job_id>/diff")
+def import_job_diff(job_id):
+    if not _is_logged_in():
+        return redirect(url_for("admin.login"))
+    job = jobs.get_job(job_id)
+    if job is None or not jobs.has_diff_report(job):
+        flash("没有可下载的差异明细", "warning")
+        return redirect(url_for("admin.list_students"))
+    return send_file(jobs.diff_report_path(current_app, job), mimetype="text/csv",
+                     as_attachment=True, download_name=f"import_diff_{job.id}.csv")
+
+
 @bp.route("/students/delete", methods=["POST"])
 def delete_students():
     if not _is_logged_in():
@@ -434,17 +294,72 @@ def delete_students():
         flash("请选择要删除的学生", "warning")
         return redirect(url_for("admin.list_students"))
     
+    # 按主键分块删除，每块一个短事务（写删除墓碑并通知），大批量删除不会长时间锁住其他写入
+    result = None
+
+    def _progress(r):
+        nonlocal result
+        result = r
+
     try:
-        deleted_count = Student.query.filter(Student.id.in_(student_ids)).delete(synchronize_session=False)
-        db.session.commit()
-        flash(f"已删除 {deleted_count} 条记录", "success")
+        result = bulk.purge(select(Student).where(Student.id.in_(student_ids)),
+                            chunk_size=current_app.config["PURGE_CHUNK_SIZE"], on_chunk=_progress)
+        flash(f"已删除 {result.deleted} 条记录", "success")
     except Exception as e:
         db.session.rollback()
-        flash(f"删除失败: {e}", "danger")
+        done = f"（已删除 {result.deleted} 条）" if result is not None and result.deleted else ""
+        flash(f"删除失败{done}: {e}", "danger")
     
     return redirect(url_for("admin.list_students"))
 
 
+@bp.route("/students/bulk-edit", methods=["POST"])
+def bulk_edit_students():
+    """批量修改专业/班级：勾选的行或当前筛选结果（筛选条件在查询串中，与导出一致），一条集合 UPDATE 完成"""
+    if not _is_logged_in():
+        return redirect(url_for("admin.login"))
+    wants_json = request.accept_mimetypes.best == "application/json"
+    filters = StudentFilter.from_args(request.args)
+    back = url_for("admin.list_students", **filters.to_args())
+    form = BulkEditForm()
+
+    def fail(message):
+        if wants_json:
+            return jsonify({"error": message}), 400
+        flash(message, "warning")
+        return redirect(back)
+
+    if not form.validate_on_submit():
+        return fail("；".join(e for errors in form.errors.values() for e in errors))
+    if form.scope.data == "filter":
+        if filters.is_empty():
+            return fail("请先设置筛选条件，不支持修改全部学生")
+        stmt = filters.apply(select(Student))
+    else:
+        student_ids = request.form.getlist("student_ids")
+        if not student_ids:
+            return fail("请选择要修改的学生")
+        stmt = select(Student).where(Student.id.in_(student_ids))
+
+    try:
+        result = bulk.edit_class(stmt, major=form.new_major.data or None, clazz=(form.new_clazz.data or "").strip() or None)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.exception("[BULK] Edit failed: %s", e)
+        if wants_json:
+            return jsonify({"error": f"修改失败: {e}"}), 500
+        flash(f"修改失败: {e}", "danger")
+        return redirect(back)
+    if result.student_ids:
+        notify_students_changed(result.student_ids)
+    current_app.logger.info("[BULK] Edit by %s: selected=%d, updated=%d", session.get("admin_username"), result.selected, result.updated)
+    if wants_json:
+        return jsonify(result.to_dict())
+    flash(f"已修改 {result.updated} 条记录" + (f"，{result.unchanged} 条无需修改" if result.unchanged else ""), "success")
+    return redirect(back)
+
+
 @bp.route("/students/<int:student_pk>/edit", methods=["GET", "POST"])
 def edit_student(student_pk: int):
     if not _is_logged_in():
@@ -454,6 +369,7 @@ def edit_student(student_pk: int):
     form = StudentCreateForm(obj=stu)
     messages = []
     if form.validate_on_submit():
+        old_sid = stu.student_id
         new_sid = form.student_id.data.strip()
         if new_sid != stu.student_id:
             exists = Student.query.filter_by(student_id=new_sid).first()
@@ -473,6 +389,7 @@ def edit_student(student_pk: int):
         stu.update_admin_class()
         try:
             db.session.commit()
+            notify_students_changed([old_sid, new_sid])
             messages.append(("success", "已保存"))
         except Exception as e:
             db.session.rollback()
@@ -507,6 +424,7 @@ def create_student():
         try:
             db.session.add(stu)
             db.session.commit()
+            notify_students_changed([stu.student_id])
             flash("新增成功", "success")
             return redirect(url_for("admin.list_students"))
         except Exception as e:
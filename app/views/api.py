@@ -0,0 +1,187 @@
+"""JSON API（/api/v1）：学生列表/搜索、单个学生、按 updated_at 的增量变更、含删除墓碑的变更流（/changes）。
+
+所有接口支持 ETag/If-None-Match 与 Last-Modified/If-Modified-Since：先用一条聚合查询（max(updated_at) + count）
+得到校验值，未变化时直接返回 304，不再查询明细和序列化。列表类接口的 Last-Modified 取变更日志最新的 changed_at
+（含删除墓碑），删除后 If-Modified-Since 也会失效。
+鉴权：管理员登录会话，或 API_TOKENS 中任一令牌（Authorization: Bearer <token>）。
+"""
+import hashlib
+import hmac
+from datetime import datetime, timedelta, timezone
+from flask import Blueprint, current_app, jsonify, request, session
+from sqlalchemy import and_, func, or_, select
+from ..extensions import db
+from ..models import Student, StudentChange
+from .. import changelog
+from ..pagination import KeysetPagination
+from ..queries import StudentFilter
+from ..routing import read_only
+from ..student_cache import StudentSnapshot
+
+
+bp = Blueprint("api", __name__)
+
+DEFAULT_PER_PAGE = 40
+MAX_PER_PAGE = 200
+
+
+@bp.before_request
+def _require_auth():
+    if session.get("admin_logged_in"):
+        return None
+    auth = request.headers.get("Authorization", "")
+    if auth.startswith("Bearer "):
+        token = auth[len("Bearer "):].strip()
+        if any(hmac.compare_digest(token, t) for t in current_app.config.get("API_TOKENS") or ()):
+            return None
+    return jsonify({"error": "unauthorized"}), 401
+
+
+def _per_page():
+    return min(max(request.args.get("per_page", DEFAULT_PER_PAGE, type=int), 1), MAX_PER_PAGE)
+
+
+def _serialize(stu) -> dict:
+    return StudentSnapshot.from_model(stu).to_dict()
+
+
+def _etag(*parts) -> str:
+    return hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()
+
+
+def _http_time(value):
+    # updated_at 为 UTC 的 naive datetime；HTTP 日期只精确到秒
+    return value.replace(tzinfo=timezone.utc, microsecond=0) if value else None
+
+
+def _not_modified(etag, last_modified):
+    """客户端缓存仍有效时返回 304 响应，否则返回 None；有 If-None-Match 时忽略 If-Modified-Since"""
+    if request.if_none_match:
+        fresh = request.if_none_match.contains(etag)
+    else:
+        since = request.if_modified_since
+        fresh = bool(since and last_modified and _http_time(last_modified) <= since)
+    if not fresh:
+        return None
+    return _with_validators(current_app.response_class(status=304), etag, last_modified)
+
+
+def _with_validators(response, etag, last_modified):
+    response.set_etag(etag)
+    # Last-Modified 只精确到秒：所在的这一秒还没过完时不发送，否则同一秒内随后的修改会被 If-Modified-Since 当成未变化
+    if last_modified and last_modified + timedelta(seconds=1) <= datetime.utcnow():
+        response.last_modified = _http_time(last_modified)
+    # 允许缓存但每次都要回源校验
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
+
+
+def _version(stmt):
+    """筛选范围内的 (max(updated_at), count, 变更日志最大 id, 变更日志最新 changed_at)
+
+    删除不会改变 max(updated_at)，count 用来兜住这种情况；updated_at 在 MySQL 上只精确到秒，
+    同一秒内的多次修改靠变更日志 id 区分。这三项都进入 ETag；Last-Modified 用最后一项，它随删除前进。
+    """
+    head = select(func.max(StudentChange.id)).scalar_subquery()
+    changed_at = select(func.max(StudentChange.changed_at)).scalar_subquery()
+    return db.session.execute(stmt.add_columns(head, changed_at)).one()
+
+
+@bp.route("/students")
+@read_only
+def list_students():
+    """筛选参数与管理端列表一致（q/gender/major/clazz），按学号 keyset 分页"""
+    filters = StudentFilter.from_args(request.args)
+    cursor = request.args.get("cursor", "")
+    per_page = _per_page()
+    updated_at, total, head, last_modified = _version(
+        filters.apply(select(func.max(Student.updated_at), func.count()).select_from(Student))
+    )
+    etag = _etag("students", filters.cache_key(), cursor, per_page, updated_at, total, head)
+    cached = _not_modified(etag, last_modified)
+    if cached is not None:
+        return cached
+    page = KeysetPagination(filters, cursor, per_page=per_page)
+    response = jsonify({
+        "items": [_serialize(stu) for stu in page.items],
+        "total": total,
+        "prev_cursor": page.prev_cursor or None,
+        "next_cursor": page.next_cursor or None,
+    })
+    return _with_validators(response, etag, last_modified)
+
+
+@bp.route("/students/<student_id>")
+@read_only
+def get_student(student_id):
+    stu = db.session.execute(select(Student).where(Student.student_id == student_id)).scalar_one_or_none()
+    if stu is None:
+        return jsonify({"error": "not found"}), 404
+    data = _serialize(stu)
+    # 单行直接按内容生成 ETag，同一秒内的多次修改也能区分
+    etag = _etag("student", sorted(data.items()))
+    cached = _not_modified(etag, stu.updated_at)
+    if cached is not None:
+        return cached
+    return _with_validators(jsonify(data), etag, stu.updated_at)
+
+
+def _parse_since(value):
+    if not value:
+        return datetime(1970, 1, 1)
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+@bp.route("/students/changes")
+@read_only
+def student_changes():
+    """updated_at 晚于 since 的学生（按 updated_at, id 排序）；用返回的 next 参数继续拉取，直到 has_more 为 false。
+
+    同一时间戳的多行用 after_id 区分，翻页不会漏行或重复。
+    """
+    try:
+        since = _parse_since(request.args.get("since", ""))
+    except ValueError:
+        return jsonify({"error": "since must be an ISO 8601 timestamp"}), 400
+    after_id = request.args.get("after_id", 0, type=int)
+    limit = _per_page()
+    cond = or_(Student.updated_at > since, and_(Student.updated_at == since, Student.id > after_id))
+    updated_at, total, head, last_modified = _version(select(func.max(Student.updated_at), func.count()).where(cond))
+    etag = _etag("changes", since, after_id, limit, updated_at, total, head)
+    cached = _not_modified(etag, last_modified)
+    if cached is not None:
+        return cached
+    rows = db.session.execute(
+        select(Student).where(cond).order_by(Student.updated_at.asc(), Student.id.asc()).limit(limit + 1)
+    ).scalars().all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    nxt = None
+    if rows:
+        nxt = {"since": rows[-1].updated_at.isoformat(), "after_id": rows[-1].id}
+    response = jsonify({"items": [_serialize(stu) for stu in rows], "has_more": has_more, "next": nxt})
+    return _with_validators(response, etag, last_modified)
+
+
+@bp.route("/changes")
+@read_only
+def change_feed():
+    """按变更日志 id 游标增量拉取，包括删除墓碑（action=delete, student=null）。
+
+    首次同步：先取 head，再全量拉取 /students，之后以 head 为 cursor 调用本接口；
+    每次用返回的 next_cursor 继续，直到 has_more 为 false，并保存最后的 next_cursor。
+    """
+    cursor = max(request.args.get("cursor", 0, type=int), 0)
+    limit = _per_page()
+    visible, head = changelog.visible_head(cursor), changelog.head()
+    etag = _etag("feed", cursor, limit, visible, head)
+    cached = _not_modified(etag, None)
+    if cached is not None:
+        return cached
+    page = changelog.read_page(cursor, limit)
+    data = page.to_dict()
+    data["head"] = head
+    return _with_validators(jsonify(data), etag, None)
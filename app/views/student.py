@@ -3,6 +3,8 @@ from sqlalchemy.exc import IntegrityError
 from ..extensions import db
 from ..forms import StudentCreateForm, StudentEditForm, StudentLoginForm
 from ..models import Student
+from ..signals import notify_students_changed
+from ..student_cache import get_student
 
 
 bp = Blueprint("student", __name__)
@@ -15,7 +17,7 @@ def index():
     if form.validate_on_submit():
         student_id = form.student_id.data.strip()
         verify_last4 = form.verify_last4.data.strip().upper()
-        stu = Student.query.filter_by(student_id=student_id).first()
+        stu = get_student(student_id)
         if stu:
             if verify_last4 != stu.last4_of_id().upper():
                 flash("校验码不匹配", "danger")
@@ -80,6 +82,7 @@ def create():
         db.session.add(student)
         try:
             db.session.commit()
+            notify_students_changed([student.student_id])
             flask_session["student_id"] = student.student_id
             flash("🎉 信息提交成功！系统已自动生成您的行政班级。", "success")
             return redirect(url_for("student.edit"))
@@ -94,14 +97,19 @@ def edit():
     sid = _require_student_session()
     if not sid:
         return redirect(url_for("student.index"))
-    stu = Student.query.filter_by(student_id=sid).first()
-    if not stu:
+    # 展示用快照走缓存；只有提交且校验通过时才加载 ORM 对象写入
+    snapshot = get_student(sid)
+    if not snapshot:
         flash("未找到信息，请先填写", "warning")
         return redirect(url_for("student.create"))
     
-    form = StudentEditForm(obj=stu)
+    form = StudentEditForm(obj=snapshot)
     
     if form.validate_on_submit():
+        stu = Student.query.filter_by(student_id=sid).first()
+        if not stu:
+            flash("未找到信息，请先填写", "warning")
+            return redirect(url_for("student.create"))
         stu.name = form.name.data.strip()
         stu.gender = form.gender.data.strip()
         stu.id_card = form.id_card.data.strip()
@@ -115,11 +123,12 @@ def edit():
         stu.update_admin_class()
         try:
             db.session.commit()
+            notify_students_changed([sid])
             flash("✅ 信息更新成功！您可继续更新或退出。", "success")
             return redirect(url_for("student.edit"))
         except IntegrityError:
             db.session.rollback()
             flash("更新失败", "danger")
-    return render_template("student_edit.html", form=form, stu=stu)
+    return render_template("student_edit.html", form=form, stu=snapshot)
 
 
@@ -0,0 +1 @@
+"""热点接口基准测试：python -m benchmarks --students 5000"""
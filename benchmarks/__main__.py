@@ -0,0 +1,35 @@
+import argparse
+import json
+import os
+import tempfile
+from .runner import format_table, run
+
+
+def main():
+    parser = argparse.ArgumentParser(description="学生信息系统热点接口基准测试")
+    parser.add_argument("--db", default="", help="数据库连接串，默认使用临时 SQLite 文件；也可指向本地 MySQL 空库")
+    parser.add_argument("--students", type=int, default=5000, help="合成学生数量")
+    parser.add_argument("--repeat", type=int, default=20, help="每个场景的请求次数")
+    parser.add_argument("--import-rows", type=int, default=2000, help="导入场景的文件行数")
+    parser.add_argument("--reset", action="store_true", help="清空并重建目标库中的表")
+    parser.add_argument("--json", action="store_true", help="输出 JSON，便于与历史结果比较")
+    args = parser.parse_args()
+
+    tmpdir = None
+    database_uri = args.db
+    if not database_uri:
+        tmpdir = tempfile.TemporaryDirectory(prefix="sis_bench_")
+        database_uri = "sqlite:///" + os.path.join(tmpdir.name, "bench.db")
+    try:
+        results = run(database_uri, students=args.students, repeat=args.repeat, import_rows=args.import_rows, reset=args.reset)
+    finally:
+        if tmpdir is not None:
+            tmpdir.cleanup()
+    if args.json:
+        print(json.dumps([r.as_dict() for r in results], ensure_ascii=False, indent=2))
+    else:
+        print(format_table(results))
+
+
+if __name__ == "__main__":
+    main()
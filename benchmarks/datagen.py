@@ -0,0 +1,63 @@
+"""合成学生数据：身份证号校验位合法、性别与身份证一致、专业/班级取值与表单一致"""
+import csv
+import io
+import random
+from datetime import date, timedelta
+from app.models import Student
+from app.validators import _CHECK_MAP, _WEIGHT
+
+
+MAJORS = ["物理学", "光电信息科学与工程", "量子信息科学"]
+_MAJOR_CODES = {"物理学": "1", "光电信息科学与工程": "2", "量子信息科学": "3"}
+
+_SURNAMES = "王李张刘陈杨黄赵吴周徐孙马朱胡郭何高林罗郑梁谢宋唐许韩冯邓曹彭曾肖田董袁潘于蒋蔡余杜叶程苏魏吕丁任沈姚卢"
+_GIVEN = "伟芳娜敏静丽强磊军洋勇艳杰娟涛明超秀霞平刚桂英华玉兰萍鹏辉宇浩然子轩欣怡梓涵思远俊杰一诺雨泽晨阳"
+_REGIONS = ["110101", "310104", "320102", "330106", "340104", "370102", "420106", "440106", "510107", "610113"]
+_ETHNICITIES = ["汉族"] * 18 + ["回族", "满族", "壮族", "蒙古族"]
+_HOMETOWNS = ["北京市", "上海市", "江苏省南京市", "浙江省杭州市", "安徽省合肥市", "山东省济南市", "湖北省武汉市", "广东省广州市", "四川省成都市", "陕西省西安市"]
+_POLITICAL = ["共青团员"] * 8 + ["群众", "中共党员"]
+
+
+def id18(rng, birth, male):
+    """生成带正确校验位的 18 位身份证号（第 17 位奇数为男）"""
+    seq = rng.randrange(0, 100) * 10 + rng.choice([1, 3, 5, 7, 9] if male else [0, 2, 4, 6, 8])
+    body = f"{rng.choice(_REGIONS)}{birth:%Y%m%d}{seq:03d}"
+    check = _CHECK_MAP[sum(w * int(d) for w, d in zip(_WEIGHT, body)) % 11]
+    return body + check
+
+
+def generate_students(n, seed=42, start_year=2021):
+    """产出 n 条学生字典（字段与 Student 一致，含 admin_class）"""
+    rng = random.Random(seed)
+    for i in range(n):
+        year = start_year + i % 4
+        major = MAJORS[rng.randrange(len(MAJORS))]
+        male = rng.random() < 0.6
+        birth = date(year - 18, 1, 1) + timedelta(days=rng.randrange(365))
+        clazz = f"{year % 100:02d}{_MAJOR_CODES[major]}{rng.randrange(1, 9):02d}"
+        record = {
+            "name": rng.choice(_SURNAMES) + "".join(rng.choice(_GIVEN) for _ in range(rng.choice([1, 2]))),
+            "gender": "男" if male else "女",
+            "student_id": f"{year}{i:06d}",
+            "id_card": id18(rng, birth, male),
+            "phone": "1" + rng.choice("3456789") + f"{rng.randrange(10 ** 9):09d}",
+            "major": major,
+            "clazz": clazz,
+            "ethnicity": rng.choice(_ETHNICITIES),
+            "hometown": rng.choice(_HOMETOWNS),
+            "political_status": rng.choice(_POLITICAL),
+        }
+        record["admin_class"] = Student.generate_admin_class(major, clazz)
+        yield record
+
+
+def roster_csv(records):
+    """按导入模板（中文表头）生成 CSV 字节串"""
+    headers = ["姓名", "性别", "学号", "身份证号码", "电话号码", "专业", "班级", "民族", "籍贯", "政治面貌"]
+    fields = ["name", "gender", "student_id", "id_card", "phone", "major", "clazz", "ethnicity", "hometown", "political_status"]
+    buf = io.StringIO()
+    w = csv.writer(buf)
+    w.writerow(headers)
+    for rec in records:
+        w.writerow([rec[f] for f in fields])
+    return buf.getvalue().encode("utf-8-sig")
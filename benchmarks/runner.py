@@ -0,0 +1,180 @@
+"""用 Flask test client 驱动热点接口，统计延迟 p50/p95、每请求 SQL 条数和峰值内存"""
+import gc
+import io
+import statistics
+import time
+import tracemalloc
+from sqlalchemy import event, insert
+from app import create_app
+from app.extensions import db
+from app.migrations import upgrade
+from app.models import Student
+from .datagen import generate_students, roster_csv
+
+
+class QueryCounter:
+    """统计 engine 上执行的 SQL 条数"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, *args, **kwargs):
+        self.count += 1
+
+
+class ScenarioResult:
+    def __init__(self, name, timings, queries, peak_bytes, status):
+        self.name = name
+        self.timings = timings
+        self.queries = queries
+        self.peak_bytes = peak_bytes
+        self.status = status
+
+    def percentile(self, p):
+        ordered = sorted(self.timings)
+        if not ordered:
+            return 0.0
+        k = min(int(round(p / 100.0 * (len(ordered) - 1))), len(ordered) - 1)
+        return ordered[k]
+
+    def as_dict(self):
+        return {
+            "scenario": self.name,
+            "requests": len(self.timings),
+            "p50_ms": round(self.percentile(50) * 1000, 2),
+            "p95_ms": round(self.percentile(95) * 1000, 2),
+            "queries_per_request": round(statistics.mean(self.queries), 1) if self.queries else 0,
+            "peak_kib": round(self.peak_bytes / 1024, 1),
+            "status": self.status,
+        }
+
+
+def build_app(database_uri):
+    return create_app({
+        "SQLALCHEMY_DATABASE_URI": database_uri,
+        "SQLALCHEMY_BINDS": {},
+        "WTF_CSRF_ENABLED": False,
+        "TESTING": True,
+        # 导入在请求内同步执行，才能测到完整的导入耗时
+        "IMPORT_EXECUTOR": "inline",
+    })
+
+
+def seed(app, n, reset=False, seed_value=42):
+    """建表并写入 n 条合成数据；非空库需 reset=True 才会清空重建"""
+    with app.app_context():
+        if reset:
+            db.drop_all()
+        db.create_all()
+        upgrade(log=lambda *_: None)
+        if db.session.query(Student.id).limit(1).first() is not None:
+            raise SystemExit("students 表非空：请使用空库，或加 --reset 清空重建")
+        batch = []
+        for rec in generate_students(n, seed=seed_value):
+            batch.append(rec)
+            if len(batch) >= 1000:
+                db.session.execute(insert(Student), batch)
+                batch = []
+        if batch:
+            db.session.execute(insert(Student), batch)
+        db.session.commit()
+        return db.session.execute(db.select(Student.student_id, Student.id_card).order_by(Student.id).limit(50)).all()
+
+
+def _drain(response):
+    """逐块读完响应体但不保留，流式导出的峰值内存才不会被测试客户端的缓冲放大"""
+    for _ in response.iter_encoded():
+        pass
+    response.close()
+
+
+def _measure(app, name, make_request, repeat):
+    """先跑 repeat 次统计延迟和 SQL 条数，再单独跑一次开启 tracemalloc 统计峰值内存"""
+    counter = QueryCounter()
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", counter)
+    timings, queries, status = [], [], None
+    try:
+        for i in range(repeat):
+            counter.count = 0
+            start = time.perf_counter()
+            response = make_request(i)
+            _drain(response)
+            timings.append(time.perf_counter() - start)
+            queries.append(counter.count)
+            status = response.status_code
+    finally:
+        event.remove(engine, "before_cursor_execute", counter)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        _drain(make_request(repeat))
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return ScenarioResult(name, timings, queries, peak, status)
+
+
+def run(database_uri, students=5000, repeat=20, import_rows=2000, reset=False):
+    app = build_app(database_uri)
+    sample = seed(app, students, reset=reset)
+    admin = app.test_client()
+    with admin.session_transaction() as sess:
+        sess["admin_logged_in"] = True
+        sess["admin_username"] = "bench"
+    results = []
+
+    results.append(_measure(app, "list_students", lambda i: admin.get("/admin/students"), repeat))
+    results.append(_measure(app, "list_students q=name", lambda i: admin.get("/admin/students", query_string={"q": "王"}), repeat))
+    results.append(_measure(app, "list_students q=digits", lambda i: admin.get("/admin/students", query_string={"q": "2022000"}), repeat))
+    results.append(_measure(app, "list_students major+clazz", lambda i: admin.get("/admin/students", query_string={"major": "物理学", "clazz": "22101,22102"}), repeat))
+    results.append(_measure(app, "export csv (all)", lambda i: admin.get("/admin/export", query_string={"format": "csv"}), max(repeat // 5, 2)))
+    results.append(_measure(app, "export xlsx (all)", lambda i: admin.get("/admin/export", query_string={"format": "xlsx"}), max(repeat // 5, 2)))
+
+    # 导入：一半为已有学号（更新），一半为新学号（新增）
+    existing = list(generate_students(import_rows // 2, seed=42))
+    fresh = list(generate_students(import_rows - len(existing), seed=7, start_year=2030))
+    payload = roster_csv(existing + fresh)
+    results.append(_measure(
+        app, f"import_bulk csv ({import_rows} rows)",
+        lambda i: admin.post("/admin/import", data={"file": (io.BytesIO(payload), "roster.csv")}, content_type="multipart/form-data"),
+        max(repeat // 5, 2),
+    ))
+
+    # 学生端：登录 -> 打开更新页 -> 提交
+    student = app.test_client()
+
+    def _login(i):
+        sid, id_card = sample[i % len(sample)]
+        return student.post("/", data={"student_id": sid, "verify_last4": id_card[-4:]})
+
+    def _edit_get(i):
+        with student.session_transaction() as sess:
+            sess["student_id"] = sample[i % len(sample)][0]
+        return student.get("/edit")
+
+    def _edit_post(i):
+        sid, id_card = sample[i % len(sample)]
+        with student.session_transaction() as sess:
+            sess["student_id"] = sid
+        return student.post("/edit", data={
+            "name": "测试", "gender": "男", "id_card": id_card, "phone": "13800000000",
+            "major": "物理学", "clazz": "22101", "ethnicity": "汉族", "hometown": "北京市", "political_status": "群众",
+        })
+
+    results.append(_measure(app, "student login", _login, repeat))
+    results.append(_measure(app, "student edit GET", _edit_get, repeat))
+    results.append(_measure(app, "student edit POST", _edit_post, repeat))
+    return results
+
+
+def format_table(results):
+    rows = [r.as_dict() for r in results]
+    cols = ["scenario", "requests", "p50_ms", "p95_ms", "queries_per_request", "peak_kib", "status"]
+    widths = {c: max(len(c), *(len(str(r[c])) for r in rows)) for c in cols}
+    lines = ["  ".join(c.ljust(widths[c]) for c in cols)]
+    lines.append("  ".join("-" * widths[c] for c in cols))
+    for r in rows:
+        lines.append("  ".join(str(r[c]).ljust(widths[c]) for c in cols))
+    return "\n".join(lines)
@@ -1,16 +1,28 @@
+import os
+import shutil
 import sys
+import click
 from app import create_app, db
+from sqlalchemy import select
 from app.models import Student, Admin
+from app.queries import StudentFilter
+from app import bulk, bulk_import, changelog, explain, exporter, importer, jobs, migrations, stats
+from app.signals import notify_students_changed
 
 app = create_app()
 
+# Excel 单个工作表最多 1048576 行（含表头）
+XLSX_MAX_ROWS = 1048576
+
 
 @app.cli.command("db")
 def init_db():
-    """初始化数据库表"""
+    """初始化数据库表并执行结构迁移"""
     with app.app_context():
         db.create_all()
         print("Tables created.")
+        applied = migrations.upgrade()
+        print(f"Migrations applied: {', '.join(applied) if applied else 'none'}")
         
         # 为现有记录更新行政班级
         students = Student.query.filter(Student.admin_class.is_(None)).all()
@@ -21,6 +33,150 @@ def init_db():
             print(f"Updated admin_class for {len(students)} existing students.")
 
 
+@app.cli.command("explain")
+def explain_queries():
+    """用 EXPLAIN 检查列表/导出查询是否命中索引"""
+    with app.app_context():
+        if not explain.run_checks():
+            sys.exit(1)
+
+
+@app.cli.command("changes")
+@click.option("--cursor", default=0, type=int, help="上次同步保存的游标（变更日志 id），0 为从头开始")
+@click.option("--limit", default=1000, type=int, help="每页读取的条数")
+@click.option("--output", type=click.File("w", encoding="utf-8"), default="-", help="输出文件，默认标准输出")
+def export_changes(cursor, limit, output):
+    """按游标导出增量变更（每行一条 JSON，含删除墓碑），新游标输出到标准错误"""
+    with app.app_context():
+        count, cursor = changelog.dump(output, cursor, limit)
+        click.echo(f"{count} changes, next cursor: {cursor}", err=True)
+
+
+@app.cli.command("prune-changes")
+@click.option("--days", default=30, type=int, help="保留最近多少天的变更记录")
+def prune_changes(days):
+    """清理过期的变更日志"""
+    with app.app_context():
+        print(f"Pruned {changelog.prune(days)} change records older than {days} days.")
+
+
+@app.cli.command("purge-students")
+@click.option("--major", "majors", multiple=True, help="按专业删除，可重复")
+@click.option("--clazz", default="", help="按班级删除，多个用逗号分隔")
+@click.option("--gender", "genders", multiple=True, help="按性别筛选，可重复")
+@click.option("--q", default="", help="搜索词（与列表页搜索相同）")
+@click.option("--ids-file", type=click.File("r", encoding="utf-8"), help="学号列表文件，每行一个")
+@click.option("--chunk-size", default=None, type=int, help="每个事务删除的行数，默认 PURGE_CHUNK_SIZE")
+@click.option("--pause", default=0.1, type=float, help="每块之间暂停的秒数，让出给在线写入")
+@click.option("--dry-run", is_flag=True, help="只统计匹配条数，不删除")
+@click.option("--yes", is_flag=True, help="不再确认")
+def purge_students(majors, clazz, genders, q, ids_file, chunk_size, pause, dry_run, yes):
+    """按筛选条件或学号列表分块删除学生（如毕业年级），每块一个短事务"""
+    with app.app_context():
+        filters = StudentFilter(q=q, genders=genders, majors=majors, clazz=clazz)
+        stmt = filters.apply(select(Student))
+        if ids_file is not None:
+            sids = [line.strip() for line in ids_file if line.strip()]
+            stmt = stmt.where(Student.student_id.in_(sids))
+        elif filters.is_empty():
+            raise click.UsageError("请指定筛选条件或 --ids-file，不支持删除全部学生")
+        total = bulk.count(stmt)
+        if dry_run or not total:
+            click.echo(f"{total} students match.")
+            return
+        if not yes:
+            click.confirm(f"Delete {total} students?", abort=True)
+        with click.progressbar(length=total, label="Purging") as bar:
+            state = {"deleted": 0}
+
+            def _progress(result):
+                bar.update(result.deleted - state["deleted"])
+                state["deleted"] = result.deleted
+
+            result = bulk.purge(stmt, chunk_size=chunk_size or app.config["PURGE_CHUNK_SIZE"], pause=pause, on_chunk=_progress)
+        click.echo(f"Deleted {result.deleted} students in {result.chunks} chunks.")
+        # 每块提交后的通知只会启动本进程的后台刷新线程，命令行退出时随之结束，这里直接重建统计表
+        if result.deleted and app.config["STATS_REFRESH"] != "off":
+            stats.refresh()
+
+
+@app.cli.command("import-roster")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--load-infile", is_flag=True, help="用 LOAD DATA LOCAL INFILE 暂存（仅 MySQL，需服务端开启 local_infile）")
+@click.option("--errors", "errors_path", type=click.Path(dir_okay=False), help="失败行报告（CSV）输出路径")
+def import_roster(path, load_infile, errors_path):
+    """离线导入名册（CSV/Excel，不限行数）：暂存到临时表后集合合并到 students"""
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in importer.CSV_EXTS + importer.EXCEL_EXTS:
+        raise click.UsageError("仅支持 CSV/Excel 文件")
+    with app.app_context():
+        total = importer.count_rows(path, ext)
+        # 两个阶段各一个进度条；合并阶段的行数（去重后的暂存行数）在暂存结束后才知道
+        labels = {"stage": "Staging", "merge": "Merging"}
+        state = {"phase": None, "bar": None}
+
+        def _progress(phase, rows, length):
+            if phase != state["phase"]:
+                if state["bar"] is not None:
+                    state["bar"].render_finish()
+                state["phase"] = phase
+                state["bar"] = click.progressbar(length=length or total or 0, label=labels[phase])
+            state["bar"].update(rows)
+
+        try:
+            result = bulk_import.import_roster(path, load_infile=load_infile, on_progress=_progress)
+        except ValueError as e:
+            raise click.UsageError(str(e))
+        finally:
+            if state["bar"] is not None:
+                state["bar"].render_finish()
+        click.echo(f"Inserted {result.inserted}, updated {result.updated}, unchanged {result.unchanged}, failed {result.failed}.")
+        if result.errors and errors_path:
+            jobs.write_error_report(errors_path, result.errors)
+            click.echo(f"Error report: {errors_path}")
+        if result.inserted or result.updated:
+            # 本进程内的缓存；其他进程的名册快照按变更日志同步，统计表在这里直接重建
+            notify_students_changed()
+            if app.config["STATS_REFRESH"] != "off":
+                stats.refresh()
+
+
+@app.cli.command("export-roster")
+@click.argument("path", type=click.Path(dir_okay=False))
+@click.option("--field", "fields", multiple=True, help="导出字段（英文字段名），可重复，默认全部")
+@click.option("--major", "majors", multiple=True, help="按专业筛选，可重复")
+@click.option("--clazz", default="", help="按班级筛选，多个用逗号分隔")
+@click.option("--gender", "genders", multiple=True, help="按性别筛选，可重复")
+@click.option("--q", default="", help="搜索词（与列表页搜索相同）")
+def export_roster(path, fields, majors, clazz, genders, q):
+    """离线导出名册，按扩展名选择格式（.csv/.xlsx/.parquet/.arrows），不限行数，按学号排序"""
+    ext = os.path.splitext(path)[1].lower().lstrip(".")
+    fmt = {"arrows": "arrow"}.get(ext, ext)
+    if fmt not in ("csv", "xlsx") and fmt not in exporter.COLUMNAR_FORMATS:
+        raise click.UsageError("扩展名需为 .csv、.xlsx、.parquet 或 .arrows")
+    if fmt in exporter.COLUMNAR_FORMATS and not exporter.columnar_available():
+        raise click.UsageError("未安装 pyarrow，无法导出 Parquet/Arrow 格式")
+    with app.app_context():
+        stmt = StudentFilter(q=q, genders=genders, majors=majors, clazz=clazz).apply(select(Student))
+        total = bulk.count(stmt)
+        if fmt == "xlsx" and total >= XLSX_MAX_ROWS:
+            raise click.UsageError(f"{total} 行超出 Excel 单表上限，请导出为 CSV 或 Parquet")
+        stmt = stmt.order_by(Student.student_id)
+        fields = exporter.select_fields(fields)
+        with click.progressbar(length=total, label="Exporting") as bar:
+            if fmt == "csv":
+                with open(path, "wb") as fh:
+                    for chunk in exporter.stream_csv(stmt, fields, on_progress=bar.update):
+                        fh.write(chunk)
+            else:
+                if fmt == "xlsx":
+                    tmp = exporter.write_xlsx(stmt, fields, on_progress=bar.update)
+                else:
+                    tmp = exporter.write_columnar(stmt, fields, fmt, on_progress=bar.update)
+                shutil.move(tmp, path)
+        click.echo(f"Exported {total} students to {path}.")
+
+
 @app.cli.command("create-admin")
 def create_admin():
     """创建默认管理员（如已存在则跳过）"""
@@ -36,13 +192,36 @@ def create_admin():
 
 
 if __name__ == "__main__":
-    # 支持：python run.py db | python run.py create-admin | python run.py
+    # 支持：python run.py db | python run.py create-admin | python run.py changes [cursor] | python run.py prune-changes [days] | python run.py purge-students --help | python run.py import-roster/export-roster PATH | python run.py
     if len(sys.argv) > 1:
         cmd = sys.argv[1]
         if cmd == "db":
             with app.app_context():
                 db.create_all()
                 print("Tables created.")
+                applied = migrations.upgrade()
+                print(f"Migrations applied: {', '.join(applied) if applied else 'none'}")
+        elif cmd == "explain":
+            with app.app_context():
+                if not explain.run_checks():
+                    sys.exit(1)
+        elif cmd == "changes":
+            with app.app_context():
+                count, cursor = changelog.dump(sys.stdout, int(sys.argv[2]) if len(sys.argv) > 2 else 0)
+                print(f"{count} changes, next cursor: {cursor}", file=sys.stderr)
+        elif cmd == "prune-changes":
+            days = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+            with app.app_context():
+                print(f"Pruned {changelog.prune(days)} change records older than {days} days.")
+        elif cmd == "purge-students":
+            # 参数较多，直接交给 click 解析：python run.py purge-students --major 物理学 --clazz 20101 --dry-run
+            from flask.cli import ScriptInfo
+            purge_students.main(args=sys.argv[2:], prog_name="run.py purge-students", obj=ScriptInfo(create_app=lambda: app))
+        elif cmd in ("import-roster", "export-roster"):
+            # python run.py import-roster roster.csv | python run.py export-roster students.parquet --major 物理学
+            from flask.cli import ScriptInfo
+            command = import_roster if cmd == "import-roster" else export_roster
+            command.main(args=sys.argv[2:], prog_name=f"run.py {cmd}", obj=ScriptInfo(create_app=lambda: app))
         elif cmd == "create-admin":
             with app.app_context():
                 if not Admin.query.filter_by(username="admin").first():
@@ -0,0 +1,59 @@
+"""测试使用临时 SQLite 文件库；每个测试一个新库，合成数据来自 benchmarks.datagen"""
+import pytest
+from app import create_app
+from app.extensions import db
+from app.migrations import upgrade
+from app import pagination
+from benchmarks.runner import seed
+
+
+TEST_CONFIG = {
+    "SQLALCHEMY_BINDS": {},
+    "TESTING": True,
+    "WTF_CSRF_ENABLED": False,
+    "IMPORT_EXECUTOR": "inline",
+    "STATS_REFRESH": "off",
+    "CHANGE_FEED_LAG": 0,
+    "SEARCH_FULLTEXT": False,
+    "JINJA_BYTECODE_CACHE_DIR": "off",
+    "API_TOKENS": ["test-token"],
+}
+
+
+@pytest.fixture
+def make_app(tmp_path):
+    """按需创建应用（同一个库可以创建多个实例，模拟多 worker）；overrides 覆盖 TEST_CONFIG"""
+    db_path = tmp_path / "sis.db"
+
+    def factory(**overrides):
+        app = create_app({**TEST_CONFIG, "SQLALCHEMY_DATABASE_URI": f"sqlite:///{db_path}",
+                          "IMPORT_DIR": str(tmp_path / "imports"), **overrides})
+        with app.app_context():
+            db.create_all()
+            upgrade(log=lambda *_: None)
+        return app
+
+    # 总条数缓存是模块级的，不同测试的库之间不能共用
+    pagination._count_cache.clear()
+    yield factory
+    pagination._count_cache.clear()
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app()
+
+
+@pytest.fixture
+def seeded(app):
+    """写入 300 条合成学生"""
+    seed(app, 300)
+    return app
+
+
+@pytest.fixture
+def admin_client(seeded):
+    client = seeded.test_client()
+    with client.session_transaction() as sess:
+        sess["admin_logged_in"] = True
+    return client
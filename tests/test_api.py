@@ -0,0 +1,115 @@
+from datetime import timedelta
+from sqlalchemy import select
+from app.extensions import db
+from app.models import Student, StudentChange
+
+
+AUTH = {"Authorization": "Bearer test-token"}
+
+
+def _age_change_log(app, seconds=10):
+    """把变更日志时间往前挪，使 Last-Modified 所在的那一秒已经过去"""
+    with app.app_context():
+        for change in db.session.execute(select(StudentChange)).scalars():
+            change.changed_at -= timedelta(seconds=seconds)
+        db.session.commit()
+
+
+def _edit(app, student_pk, **values):
+    with app.app_context():
+        stu = db.session.get(Student, student_pk)
+        for key, value in values.items():
+            setattr(stu, key, value)
+        db.session.commit()
+
+
+def test_requires_token(seeded):
+    client = seeded.test_client()
+    assert client.get("/api/v1/students").status_code == 401
+    assert client.get("/api/v1/students", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    assert client.get("/api/v1/students", headers=AUTH).status_code == 200
+
+
+def test_list_etag_revalidation(seeded):
+    client = seeded.test_client()
+    first = client.get("/api/v1/students?major=物理学&per_page=10", headers=AUTH)
+    assert first.status_code == 200 and len(first.get_json()["items"]) == 10
+    etag = first.headers["ETag"]
+    cached = client.get("/api/v1/students?major=物理学&per_page=10", headers={**AUTH, "If-None-Match": etag})
+    assert cached.status_code == 304 and cached.data == b""
+    # 分页参数不同，ETag 不同
+    other = client.get("/api/v1/students?major=物理学&per_page=11", headers={**AUTH, "If-None-Match": etag})
+    assert other.status_code == 200
+
+    _edit(seeded, 1, phone="13900000000")
+    assert client.get("/api/v1/students?major=物理学&per_page=10", headers={**AUTH, "If-None-Match": etag}).status_code == 200
+
+
+def test_list_last_modified_moves_on_delete(seeded):
+    client = seeded.test_client()
+    _edit(seeded, 1, phone="13900000000")
+    _age_change_log(seeded)
+    response = client.get("/api/v1/students", headers=AUTH)
+    last_modified = response.headers["Last-Modified"]
+    assert client.get("/api/v1/students", headers={**AUTH, "If-Modified-Since": last_modified}).status_code == 304
+
+    with seeded.app_context():
+        db.session.delete(db.session.get(Student, 2))
+        db.session.commit()
+    response = client.get("/api/v1/students", headers={**AUTH, "If-Modified-Since": last_modified})
+    assert response.status_code == 200
+    assert response.get_json()["total"] == 299
+    # 最后一次修改所在的这一秒还没过完，不发送 Last-Modified
+    assert "Last-Modified" not in response.headers
+
+
+def test_single_student(seeded):
+    client = seeded.test_client()
+    with seeded.app_context():
+        sid = db.session.get(Student, 1).student_id
+    response = client.get(f"/api/v1/students/{sid}", headers=AUTH)
+    assert response.get_json()["student_id"] == sid
+    etag = response.headers["ETag"]
+    assert client.get(f"/api/v1/students/{sid}", headers={**AUTH, "If-None-Match": etag}).status_code == 304
+    _edit(seeded, 1, name="王五")
+    response = client.get(f"/api/v1/students/{sid}", headers={**AUTH, "If-None-Match": etag})
+    assert response.status_code == 200 and response.get_json()["name"] == "王五"
+    assert client.get("/api/v1/students/0000000000", headers=AUTH).status_code == 404
+
+
+def test_change_feed_revalidation(seeded):
+    client = seeded.test_client()
+    _edit(seeded, 1, name="王五")
+    response = client.get("/api/v1/changes?cursor=0", headers=AUTH)
+    data = response.get_json()
+    assert [item["student"]["name"] for item in data["items"]] == ["王五"]
+    cursor = data["next_cursor"]
+    assert cursor == data["head"] and not data["has_more"]
+
+    empty = client.get(f"/api/v1/changes?cursor={cursor}", headers=AUTH)
+    assert empty.get_json()["items"] == []
+    etag = empty.headers["ETag"]
+    assert client.get(f"/api/v1/changes?cursor={cursor}", headers={**AUTH, "If-None-Match": etag}).status_code == 304
+
+    with seeded.app_context():
+        db.session.delete(db.session.get(Student, 1))
+        db.session.commit()
+    response = client.get(f"/api/v1/changes?cursor={cursor}", headers={**AUTH, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert [(i["action"], i["student"]) for i in response.get_json()["items"]] == [("delete", None)]
+
+
+def test_students_changed_since(seeded):
+    client = seeded.test_client()
+    url = "/api/v1/students/changes?per_page=200"
+    seen = 0
+    while True:
+        data = client.get(url, headers=AUTH).get_json()
+        seen += len(data["items"])
+        url = f"/api/v1/students/changes?since={data['next']['since']}&after_id={data['next']['after_id']}&per_page=200"
+        if not data["has_more"]:
+            break
+    assert seen == 300
+    assert client.get(url, headers=AUTH).get_json()["items"] == []
+    _edit(seeded, 5, name="赵六")
+    assert [item["name"] for item in client.get(url, headers=AUTH).get_json()["items"]] == ["赵六"]
@@ -0,0 +1,76 @@
+from sqlalchemy import event, select
+from app import bulk
+from app.extensions import db
+from app.models import Student, StudentChange
+
+
+def _changes(action):
+    return db.session.execute(
+        select(StudentChange.student_id).where(StudentChange.action == action).order_by(StudentChange.id)
+    ).scalars().all()
+
+
+def test_edit_class_recomputes_admin_class(seeded):
+    with seeded.app_context():
+        ids = db.session.execute(select(Student.id).order_by(Student.id).limit(30)).scalars().all()
+        stmt = select(Student).where(Student.id.in_(ids))
+        result = bulk.edit_class(stmt, major="量子信息科学", clazz="21301")
+        db.session.commit()
+        assert (result.selected, result.updated) == (30, 30)
+        students = db.session.execute(stmt).scalars().all()
+        assert {(s.major, s.clazz, s.admin_class) for s in students} == \
+            {("量子信息科学", "21301", Student.generate_admin_class("量子信息科学", "21301"))}
+        assert sorted(_changes("upsert")) == sorted(result.student_ids)
+
+        # 已是目标值的行不再更新，也不写变更日志
+        again = bulk.edit_class(stmt, major="量子信息科学")
+        db.session.commit()
+        assert (again.selected, again.updated, again.unchanged) == (30, 0, 30)
+        assert len(_changes("upsert")) == 30
+
+
+def test_edit_class_only_clazz_keeps_each_major(seeded):
+    with seeded.app_context():
+        stmt = select(Student).where(Student.id <= 40)
+        before = {s.id: s.major for s in db.session.execute(stmt).scalars()}
+        bulk.edit_class(stmt, clazz="22105")
+        db.session.commit()
+        db.session.expire_all()
+        for stu in db.session.execute(stmt).scalars():
+            assert stu.major == before[stu.id]
+            assert stu.clazz == "22105"
+            assert stu.admin_class == Student.generate_admin_class(stu.major, "22105")
+
+
+def test_purge_deletes_in_chunks(seeded):
+    with seeded.app_context():
+        ids = db.session.execute(select(Student.id).order_by(Student.id).limit(20)).scalars().all()
+        sids = db.session.execute(select(Student.student_id).where(Student.id.in_(ids))).scalars().all()
+        commits, progress = [], []
+        event.listen(db.engine, "commit", lambda conn: commits.append(1))
+        result = bulk.purge(select(Student).where(Student.id.in_(ids)), chunk_size=7,
+                            on_chunk=lambda r: progress.append(r.deleted))
+        assert (result.matched, result.deleted, result.chunks) == (20, 20, 3)
+        assert progress == [7, 14, 20]
+        assert len(commits) == 3
+        assert db.session.execute(select(Student.id).where(Student.id.in_(ids))).first() is None
+        assert bulk.count(select(Student)) == 280
+        assert sorted(_changes("delete")) == sorted(sids)
+
+
+def test_bulk_edit_endpoint_by_filter(admin_client, seeded):
+    headers = {"Accept": "application/json"}
+    response = admin_client.post("/admin/students/bulk-edit", data={"new_major": "物理学", "scope": "filter"},
+                                 headers=headers)
+    assert response.status_code == 400
+    assert "筛选条件" in response.get_json()["error"]
+
+    with seeded.app_context():
+        matched = bulk.count(select(Student).where(Student.clazz == "21104"))
+    response = admin_client.post("/admin/students/bulk-edit?clazz=21104", data={"new_major": "物理学", "scope": "filter"},
+                                 headers=headers)
+    assert response.status_code == 200
+    assert matched and response.get_json()["selected"] == matched
+    with seeded.app_context():
+        rows = db.session.execute(select(Student.major, Student.admin_class).where(Student.clazz == "21104")).all()
+        assert set(rows) == {("物理学", Student.generate_admin_class("物理学", "21104"))}
@@ -0,0 +1,91 @@
+import io
+import json
+from sqlalchemy import select
+from app import bulk, changelog
+from app.extensions import db
+from app.models import Student, StudentChange
+
+
+def _entries():
+    return [(c.student_id, c.action) for c in db.session.execute(select(StudentChange).order_by(StudentChange.id)).scalars()]
+
+
+def _new_student(sid, **values):
+    data = dict(name="张三", gender="男", student_id=sid, id_card="", phone="", major="物理学", clazz="21101", hometown="")
+    data.update(values)
+    stu = Student(**data)
+    stu.update_admin_class()
+    return stu
+
+
+def test_orm_writes_record_upserts_and_tombstones(app):
+    with app.app_context():
+        db.session.add(_new_student("2021000001"))
+        db.session.commit()
+        stu = db.session.execute(select(Student)).scalar_one()
+        stu.phone = "13800000000"
+        db.session.commit()
+        stu.student_id = "2021000009"
+        db.session.commit()
+        db.session.delete(stu)
+        db.session.commit()
+        entries = _entries()
+        assert entries[:2] == [("2021000001", "upsert"), ("2021000001", "upsert")]
+        # 改学号：旧学号记删除墓碑，新学号记 upsert（同一次 flush，顺序不定）
+        assert set(entries[2:4]) == {("2021000001", "delete"), ("2021000009", "upsert")}
+        assert entries[4:] == [("2021000009", "delete")]
+
+
+def test_feed_pages_collapse_and_continue(app):
+    with app.app_context():
+        for i in range(5):
+            db.session.add(_new_student(f"202100000{i}"))
+        db.session.commit()
+        students = db.session.execute(select(Student).order_by(Student.student_id)).scalars().all()
+        students[0].name = "李四"
+        db.session.delete(students[1])
+        db.session.commit()
+        bulk.purge(select(Student).where(Student.student_id == "2021000002"))
+
+        first = changelog.read_page(0, limit=4)
+        assert first.has_more
+        assert [(i["student_id"], i["action"]) for i in first.items] == [
+            ("2021000000", "upsert"),
+            # 同一页里 2021000001 先新增后删除，只保留删除
+            ("2021000001", "delete"),
+            ("2021000002", "delete"),
+            ("2021000003", "upsert"),
+        ]
+        assert first.items[0]["student"]["name"] == "李四"
+        assert first.items[1]["student"] is None
+
+        items, cursor = [], 0
+        while True:
+            page = changelog.read_page(cursor, limit=3)
+            items += page.items
+            cursor = page.next_cursor
+            if not page.has_more:
+                break
+        assert cursor == changelog.head()
+        assert changelog.read_page(cursor).items == []
+        latest = {}
+        for item in items:
+            latest[item["student_id"]] = item["action"]
+        assert latest == {"2021000000": "upsert", "2021000001": "delete", "2021000002": "delete",
+                          "2021000003": "upsert", "2021000004": "upsert"}
+
+        out = io.StringIO()
+        count, end = changelog.dump(out, 0, limit=2)
+        assert end == changelog.head()
+        assert count == len(out.getvalue().splitlines())
+        assert json.loads(out.getvalue().splitlines()[-1])["student_id"] == "2021000002"
+
+
+def test_feed_holds_back_recent_changes(make_app):
+    app = make_app(CHANGE_FEED_LAG=3600)
+    with app.app_context():
+        db.session.add(_new_student("2021000001"))
+        db.session.commit()
+        assert changelog.head() == 1
+        assert changelog.visible_head(0) == 0
+        assert changelog.read_page(0).items == []
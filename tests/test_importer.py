@@ -0,0 +1,109 @@
+import io
+from sqlalchemy import select
+from app import bulk_import, importer
+from app.extensions import db
+from app.models import Student
+from benchmarks.datagen import generate_students, roster_csv
+
+
+def _run(records):
+    headers, row_iter, is_excel = importer.open_rows(io.BytesIO(roster_csv(records)), ".csv")
+    result = importer.run_import(row_iter, importer.normalize_headers(headers), is_excel)
+    db.session.commit()
+    return result
+
+
+def _students():
+    return {s.student_id: s for s in db.session.execute(select(Student)).scalars()}
+
+
+def test_duplicate_student_id_last_row_wins(app):
+    records = list(generate_students(20))
+    records.append(dict(records[3], name="新名字"))
+    records.append(dict(records[4], id_card="110101200001011234"))  # 校验位错误
+    with app.app_context():
+        result = _run(records)
+        # 网页导入逐块写入：重复行对前面刚插入的同学号记为一次更新
+        assert (result.inserted, result.updated, result.unchanged, result.failed) == (20, 1, 0, 1)
+        assert result.errors == [(23, records[4]["student_id"], "身份证号码校验位错误")]
+        students = _students()
+        assert len(students) == 20
+        assert students[records[3]["student_id"]].name == "新名字"
+
+
+def test_reimport_counts_updates_and_unchanged(app):
+    records = list(generate_students(50))
+    with app.app_context():
+        _run(records)
+        records[0] = dict(records[0], phone="13900000000")
+        records[1] = dict(records[1], major="物理学", clazz="21101")
+        result = _run(records + list(generate_students(55))[50:])
+        assert (result.inserted, result.updated, result.unchanged, result.failed) == (5, 2, 48, 0)
+        stu = _students()[records[1]["student_id"]]
+        assert stu.admin_class == Student.generate_admin_class("物理学", "21101")
+
+
+def test_header_alias_and_zero_padding():
+    norm = importer.normalize_headers(["StudentID", "姓名", "班级"])
+    assert norm == ["student_id", "name", "clazz"]
+    assert importer.normalize_row(["123456789", "张三", "1101"], norm, False) == \
+        {"student_id": "0123456789", "name": "张三", "clazz": "01101"}
+    # Excel 数字单元格：先去掉小数部分再补零
+    assert importer.normalize_row([123456789.0, "张三", 1101], norm, True) == \
+        {"student_id": "0123456789", "name": "张三", "clazz": "01101"}
+
+
+def test_web_and_offline_import_agree(make_app, tmp_path):
+    """网页导入（逐块 upsert）与离线导入（临时表 + 集合合并）写入的数据与失败行一致
+
+    离线导入在合并前按学号去重，文件内的重复行不计为更新。
+    """
+    records = list(generate_students(120))
+    records.append(dict(records[7], hometown="浙江省杭州市"))
+    records.append(dict(records[8], phone="123"))
+    path = tmp_path / "roster.csv"
+    path.write_bytes(roster_csv(records))
+
+    web = make_app(SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'web.db'}")
+    offline = make_app(SQLALCHEMY_DATABASE_URI=f"sqlite:///{tmp_path / 'offline.db'}")
+    columns = ("student_id",) + importer.COMPARE_FIELDS
+    with web.app_context():
+        expected = _run(records)
+        web_rows = db.session.execute(select(*[getattr(Student, c) for c in columns]).order_by(Student.student_id)).all()
+    with offline.app_context():
+        result = bulk_import.import_roster(str(path))
+        offline_rows = db.session.execute(select(*[getattr(Student, c) for c in columns]).order_by(Student.student_id)).all()
+    assert (expected.inserted, expected.updated, expected.unchanged, expected.failed) == (120, 1, 0, 1)
+    assert (result.inserted, result.updated, result.unchanged, result.failed) == (120, 0, 0, 1)
+    assert result.errors == expected.errors
+    assert offline_rows == web_rows
+
+    records[0] = dict(records[0], name="改名字")
+    path.write_bytes(roster_csv(records))
+    with offline.app_context():
+        result = bulk_import.import_roster(str(path))
+    assert (result.inserted, result.updated, result.unchanged, result.failed) == (0, 1, 119, 1)
+
+
+def test_offline_merge_retags_rows_inserted_during_merge(app, tmp_path, monkeypatch):
+    """合并期间其他写入新增了文件里后面块的学号：这些行按 update 合并，不报唯一键冲突"""
+    monkeypatch.setattr(bulk_import, "MERGE_CHUNK", 10)
+    records = list(generate_students(30))
+    path = tmp_path / "roster.csv"
+    path.write_bytes(roster_csv(records))
+    concurrent = [records[15], records[25]]
+    state = {"inserted": False}
+
+    def on_progress(phase, rows, total):
+        if phase == "merge" and not state["inserted"]:
+            state["inserted"] = True
+            for record in concurrent:
+                db.session.add(Student(**dict(record, phone="13900000000")))
+            db.session.commit()
+
+    with app.app_context():
+        result = bulk_import.import_roster(str(path), on_progress=on_progress)
+        assert (result.inserted, result.updated, result.unchanged, result.failed) == (28, 2, 0, 0)
+        students = _students()
+        assert len(students) == 30
+        assert all(students[r["student_id"]].phone == r["phone"] for r in concurrent)
@@ -0,0 +1,65 @@
+import time
+import pytest
+from flask import g
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from app import instrumentation
+from app.extensions import db
+
+
+@pytest.fixture
+def inst_app(make_app):
+    from benchmarks.runner import seed
+    app = make_app(INSTRUMENTATION=True, INSTRUMENTATION_SAMPLE_RATE=1.0)
+    seed(app, 30)
+    return app
+
+
+def _client(app):
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess["admin_logged_in"] = True
+    return client
+
+
+def test_sampled_request_reports_server_timing(inst_app):
+    response = _client(inst_app).get("/admin/students")
+    assert response.status_code == 200
+    timing = dict(part.strip().split(";", 1) for part in response.headers["Server-Timing"].split(","))
+    assert set(timing) == {"db", "tpl", "total"}
+    queries = int(timing["db"].split('desc="')[1].split()[0])
+    assert queries > 0
+
+
+def test_metrics_endpoint(inst_app):
+    client = _client(inst_app)
+    client.get("/admin/students")
+    body = client.get("/admin/metrics").data.decode()
+    assert 'sis_requests_total{endpoint="admin.list_students"}' in body
+    assert 'sis_request_duration_seconds_bucket{endpoint="admin.list_students",le="+Inf"}' in body
+    assert "sis_db_queries_total" in body
+
+
+def test_failed_statement_does_not_leak_start_time(inst_app):
+    """出错的语句没有 after_cursor_execute，不计入；之后的查询照常计数、计时"""
+    with inst_app.test_request_context():
+        g._metrics = metrics = instrumentation.RequestMetrics()
+        with pytest.raises(OperationalError):
+            db.session.execute(text("SELECT * FROM no_such_table"))
+        db.session.rollback()
+        time.sleep(0.2)
+        db.session.execute(text("SELECT 1"))
+        assert metrics.queries == 1
+        assert metrics.db_time < 0.1
+
+
+def test_registry_histogram():
+    registry = instrumentation.Registry()
+    registry.observe("x", 200, 0.02, 100)
+    registry.observe("x", 503, 3.0, 0)
+    body = registry.render_prometheus()
+    assert 'sis_requests_total{endpoint="x"} 2' in body
+    assert 'sis_request_errors_total{endpoint="x"} 1' in body
+    assert 'sis_request_duration_seconds_bucket{endpoint="x",le="0.025"} 1' in body
+    assert 'sis_request_duration_seconds_bucket{endpoint="x",le="5.0"} 2' in body
+    assert 'sis_response_bytes_total{endpoint="x"} 100' in body
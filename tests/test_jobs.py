@@ -0,0 +1,114 @@
+import csv
+import io
+import os
+from datetime import datetime, timedelta
+import pytest
+from sqlalchemy import func, select, update
+from app import importer, jobs
+from app.extensions import db
+from app.models import ImportJob, Student
+from benchmarks.datagen import generate_students, roster_csv
+
+
+@pytest.fixture
+def client(app):
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess["admin_logged_in"] = True
+    return client
+
+
+def _upload(client, records, dry_run=False):
+    data = {"file": (io.BytesIO(roster_csv(records)), "roster.csv")}
+    if dry_run:
+        data["dry_run"] = "y"
+    response = client.post("/admin/import", data=data, content_type="multipart/form-data")
+    assert response.status_code == 302
+    with client.session_transaction() as sess:
+        job_id = sess["import_job"]
+    return client.get(f"/admin/import/jobs/{job_id}").get_json()
+
+
+def _count_students(app):
+    with app.app_context():
+        return db.session.execute(select(func.count()).select_from(Student)).scalar()
+
+
+def test_error_report_csv(app, client):
+    records = list(generate_students(10))
+    records.append(dict(records[2], student_id="2021abc"))
+    job = _upload(client, records)
+    assert job["status"] == ImportJob.STATUS_DONE
+    assert (job["inserted"], job["failed"]) == (10, 1)
+    response = client.get(job["error_report_url"])
+    assert response.status_code == 200
+    rows = list(csv.reader(io.StringIO(response.data.decode("utf-8-sig"))))
+    assert rows[0] == ["行号", "学号", "原因"]
+    assert len(rows) == 2 and rows[1][:2] == ["12", "2021abc"]
+
+
+def test_dry_run_then_confirm(app, client):
+    records = list(generate_students(30))
+    preview = _upload(client, records, dry_run=True)
+    assert preview["status"] == ImportJob.STATUS_DONE and preview["dry_run"] is True
+    assert preview["inserted"] == 30 and preview["diff_sample"]
+    assert _count_students(app) == 0
+
+    assert client.post(preview["confirm_url"]).status_code == 302
+    with client.session_transaction() as sess:
+        job = client.get(f"/admin/import/jobs/{sess['import_job']}").get_json()
+    assert job["status"] == ImportJob.STATUS_DONE and not job["dry_run"]
+    assert job["inserted"] == 30
+    assert _count_students(app) == 30
+    # 同一预览只能确认一次
+    with app.test_request_context():
+        assert jobs.confirm(preview["id"]) is None
+
+
+def test_cancel_while_running_keeps_committed_chunks(app, client, monkeypatch):
+    write_chunk = importer.write_chunk
+
+    def cancel_after_first_chunk(rows, result, known, logger=None, dry_run=False):
+        write_chunk(rows, result, known, logger, dry_run)
+        db.session.execute(update(ImportJob).values(status=ImportJob.STATUS_CANCELLING))
+
+    monkeypatch.setattr(importer, "write_chunk", cancel_after_first_chunk)
+    job = _upload(client, list(generate_students(importer.CHUNK_SIZE * 2 + 10)))
+    assert job["status"] == ImportJob.STATUS_CANCELLED
+    assert job["processed"] == importer.CHUNK_SIZE
+    assert _count_students(app) == importer.CHUNK_SIZE
+
+
+def _make_job(app, status, age):
+    with app.app_context():
+        job = ImportJob(id=f"{status}{age}", filename="roster.csv", status=status,
+                        updated_at=datetime.utcnow() - timedelta(seconds=age))
+        db.session.add(job)
+        db.session.commit()
+        with open(jobs.upload_path(app, job), "wb") as fh:
+            fh.write(b"x")
+        return job.id
+
+
+def test_cancel_queued_job(app, client):
+    job_id = _make_job(app, ImportJob.STATUS_QUEUED, 0)
+    data = client.post(f"/admin/import/jobs/{job_id}/cancel").get_json()
+    assert data["status"] == ImportJob.STATUS_CANCELLED
+    with app.app_context():
+        assert not os.path.exists(jobs.upload_path(app, db.session.get(ImportJob, job_id)))
+
+
+def test_stale_only_for_running_jobs(app):
+    stale = app.config["IMPORT_JOB_STALE"] + 60
+    running = _make_job(app, ImportJob.STATUS_RUNNING, stale)
+    queued = _make_job(app, ImportJob.STATUS_QUEUED, stale)
+    fresh = _make_job(app, ImportJob.STATUS_RUNNING, 0)
+    with app.app_context():
+        job = jobs.get_job(running)
+        assert job.status == ImportJob.STATUS_FAILED and job.finished_at is not None
+        assert not os.path.exists(jobs.upload_path(app, job))
+        # 排在其他导入后面等待不算中断
+        job = jobs.get_job(queued)
+        assert job.status == ImportJob.STATUS_QUEUED
+        assert os.path.exists(jobs.upload_path(app, job))
+        assert jobs.get_job(fresh).status == ImportJob.STATUS_RUNNING
@@ -0,0 +1,30 @@
+from sqlalchemy import inspect, text
+from app import migrations
+from app.extensions import db
+
+
+def test_upgrade_is_idempotent(app):
+    with app.app_context():
+        assert migrations.upgrade(log=lambda *_: None) == []
+        assert migrations.pending() == []
+
+
+def test_reapplying_migrations_on_current_schema(app):
+    """版本记录丢失（或新库 create_all 之后）重新执行全部迁移不报错，也不重复建索引/列"""
+    with app.app_context():
+        with db.engine.begin() as conn:
+            conn.execute(text("DELETE FROM schema_migrations"))
+        assert [v for v, _ in migrations.pending()] == [v for v, _, _ in migrations.MIGRATIONS]
+        applied = migrations.upgrade(log=lambda *_: None)
+        assert applied == [v for v, _, _ in migrations.MIGRATIONS]
+        assert migrations.pending() == []
+
+
+def test_missing_index_is_recreated(app):
+    with app.app_context():
+        with db.engine.begin() as conn:
+            conn.execute(text("DROP INDEX ix_students_admin_class"))
+            conn.execute(text("DELETE FROM schema_migrations WHERE version = '0002'"))
+        assert migrations.upgrade(log=lambda *_: None) == ["0002"]
+        with db.engine.connect() as conn:
+            assert "ix_students_admin_class" in {ix["name"] for ix in inspect(conn).get_indexes("students")}
@@ -0,0 +1,46 @@
+import pytest
+from sqlalchemy import select
+from app.extensions import db
+from app.models import Student
+from app.pagination import KeysetPagination, decode_cursor, encode_cursor
+from app.queries import StudentFilter
+from app.rendering import ROW_COLUMNS
+
+
+def test_cursor_round_trip():
+    for key, direction, page in (("2021000001", "next", 2), ("", "prev", 1), ("学号", "next", 99)):
+        assert decode_cursor(encode_cursor(key, direction, page)) == (key, direction, page)
+
+
+@pytest.mark.parametrize("cursor", ["", "not-base64!", encode_cursor("x", "sideways", 2)[:-1], "e30"])
+def test_invalid_cursor_starts_from_first_page(cursor):
+    assert decode_cursor(cursor) is None
+
+
+@pytest.mark.parametrize("columns", [None, ROW_COLUMNS])
+@pytest.mark.parametrize("args", [{}, {"majors": ["物理学"]}, {"q": "王"}])
+def test_walk_forward_and_back(seeded, columns, args):
+    with seeded.app_context():
+        filters = StudentFilter(**args)
+        expected = db.session.execute(
+            filters.apply(select(Student.student_id)).order_by(Student.student_id)
+        ).scalars().all()
+        per_page = 23
+        pages, cursor = [], ""
+        while True:
+            page = KeysetPagination(filters, cursor, per_page=per_page, columns=columns)
+            pages.append([row.student_id for row in page.items])
+            assert page.page == len(pages)
+            assert page.total == len(expected)
+            if not page.next_cursor:
+                break
+            cursor = page.next_cursor
+        assert [sid for chunk in pages for sid in chunk] == expected
+        assert len(pages) == page.pages
+
+        back = []
+        while page.prev_cursor:
+            page = KeysetPagination(filters, page.prev_cursor, per_page=per_page, columns=columns)
+            back.append([row.student_id for row in page.items])
+        assert back[::-1] == pages[:-1]
+        assert page.page == 1 and not page.has_prev
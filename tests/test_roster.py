@@ -0,0 +1,102 @@
+import pytest
+from sqlalchemy import select
+from app import pagination, roster
+from app.extensions import db
+from app.models import Student
+from app.pagination import KeysetPagination
+from app.queries import StudentFilter
+from app.rendering import ROW_COLUMNS
+from app.signals import notify_students_changed
+from benchmarks.runner import seed
+
+
+FILTERS = [
+    {}, {"genders": ["男"]}, {"majors": ["物理学"]}, {"majors": ["量子信息科学"], "genders": ["女"]},
+    {"clazz": "21104,22301"}, {"q": "王"}, {"q": "2021"}, {"q": "王", "majors": ["物理学"]},
+    {"q": "zz"}, {"majors": ["不存在"]},
+]
+
+
+@pytest.fixture
+def snapshot_app(make_app):
+    app = make_app(ROSTER_SNAPSHOT=True, ROSTER_SNAPSHOT_MAX_LAG=0)
+    seed(app, 400)
+    return app
+
+
+def _walk(paginate, filters, per_page=37):
+    """从第一页向后翻到底再翻回第一页，返回 (总数, 向后各页, 向前各页)"""
+    forward, page = [], paginate(filters, "", per_page)
+    if page is None:
+        return None
+    total = page.total
+    while True:
+        forward.append([tuple(row) for row in page.items])
+        if not page.next_cursor:
+            break
+        page = paginate(filters, page.next_cursor, per_page)
+    backward = []
+    while page.prev_cursor:
+        page = paginate(filters, page.prev_cursor, per_page)
+        backward.append([tuple(row) for row in page.items])
+    return total, forward, backward[::-1]
+
+
+def _db_page(filters, cursor, per_page):
+    return KeysetPagination(filters, cursor, per_page=per_page, columns=ROW_COLUMNS)
+
+
+def _assert_matches_db(app):
+    with app.test_request_context():
+        for args in FILTERS:
+            filters = StudentFilter(**args)
+            from_snapshot = _walk(roster.paginate, filters)
+            pagination._count_cache.clear()
+            assert from_snapshot is not None, args
+            assert from_snapshot == _walk(_db_page, filters), args
+
+
+def test_snapshot_pages_match_database(snapshot_app):
+    _assert_matches_db(snapshot_app)
+    assert snapshot_app.extensions["roster_snapshot"].rows == 400
+
+
+def test_snapshot_follows_writes(snapshot_app, make_app):
+    _assert_matches_db(snapshot_app)
+    # 本进程的写入：通知后立即同步
+    with snapshot_app.app_context():
+        students = db.session.execute(select(Student).order_by(Student.student_id).limit(20)).scalars().all()
+        for stu in students[:5]:
+            stu.major = "物理学"
+            stu.update_admin_class()
+        db.session.delete(students[5])
+        students[6].student_id = "2000000001"
+        db.session.commit()
+        notify_students_changed()
+    _assert_matches_db(snapshot_app)
+    # 另一个 worker 的写入：经变更日志发现
+    other = make_app()
+    with other.app_context():
+        for i in range(30):
+            stu = Student(name="王新生", gender="女", student_id=f"2019{i:06d}", id_card="", phone="",
+                          major="物理学", clazz="19101", hometown="")
+            stu.update_admin_class()
+            db.session.add(stu)
+        db.session.delete(db.session.execute(select(Student).where(Student.student_id == "2000000001")).scalar_one())
+        db.session.commit()
+    _assert_matches_db(snapshot_app)
+    assert snapshot_app.extensions["roster_snapshot"].rows == 399 + 30 - 1
+
+
+def test_like_wildcards_fall_back_to_database(snapshot_app):
+    with snapshot_app.test_request_context():
+        assert roster.paginate(StudentFilter(q="王%"), "", 40) is None
+        assert roster.paginate(StudentFilter(q="王"), "", 40) is not None
+
+
+def test_disabled_over_memory_limit(make_app):
+    app = make_app(ROSTER_SNAPSHOT=True, ROSTER_SNAPSHOT_MAX_MB=0)
+    seed(app, 50)
+    with app.test_request_context():
+        assert roster.paginate(StudentFilter(), "", 40) is None
+    assert not app.extensions["roster_snapshot"].enabled
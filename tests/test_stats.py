@@ -0,0 +1,69 @@
+from collections import Counter
+from sqlalchemy import select
+from app import stats
+from app.extensions import db
+from app.models import StatsMeta, Student, StudentStat
+from app.signals import notify_students_changed
+
+
+def _students(app):
+    with app.app_context():
+        return db.session.execute(select(Student)).scalars().all()
+
+
+def test_refresh_matches_group_by(seeded):
+    students = _students(seeded)
+    with seeded.app_context():
+        rows = stats.refresh()
+        stored = db.session.execute(select(StudentStat)).scalars().all()
+        meta = db.session.get(StatsMeta, 1)
+        assert meta.refreshed_at == rows[0].refreshed_at
+    expected = Counter((s.major, s.admin_class, s.gender, s.political_status or "") for s in students)
+    assert {(r.major, r.admin_class, r.gender, r.political_status): r.count for r in rows} == expected
+    assert {(r.major, r.admin_class, r.gender, r.political_status): r.count for r in stored} == expected
+
+
+def test_dashboard_totals(seeded):
+    students = _students(seeded)
+    with seeded.app_context():
+        dash = stats.Dashboard(stats.refresh())
+    assert dash.total == len(students)
+    assert dict(dash.by_major) == Counter(s.major for s in students)
+    assert dict(dash.by_gender) == Counter(s.gender for s in students)
+    assert dict(dash.by_political) == Counter(s.political_status or "未填写" for s in students)
+    classes = dict(dash.by_class)
+    for admin_class, group in Counter(s.admin_class for s in students).items():
+        assert classes[admin_class]["total"] == group
+    assert [count for _, count in dash.by_major] == sorted((count for _, count in dash.by_major), reverse=True)
+
+
+def test_refresh_if_stale(seeded):
+    with seeded.app_context():
+        assert stats.refresh_if_stale(60) == 0  # 还没有重建过
+        assert 0 < stats.refresh_if_stale(60) <= 60
+        assert stats.refresh_if_stale(0) == 0
+
+
+def test_dashboard_page_builds_on_first_visit(seeded, admin_client):
+    response = admin_client.get("/admin/stats")
+    assert response.status_code == 200
+    with seeded.app_context():
+        assert db.session.query(StudentStat).count() > 0
+
+
+def test_inline_refresh_after_write(make_app):
+    from benchmarks.runner import seed
+    app = make_app(STATS_REFRESH="inline")
+    seed(app, 50)
+    with app.app_context():
+        stats.refresh()
+        stu = db.session.get(Student, 1)
+        stu.major, stu.clazz = "物理学", "21101"
+        stu.update_admin_class()
+        db.session.commit()
+        notify_students_changed([stu.student_id])
+        stat = db.session.execute(
+            select(StudentStat).where(StudentStat.admin_class == stu.admin_class, StudentStat.gender == stu.gender)
+        ).scalars().all()
+        assert sum(s.count for s in stat) == db.session.query(Student).filter_by(
+            admin_class=stu.admin_class, gender=stu.gender).count()
@@ -0,0 +1,196 @@
+import importlib.util
+import time
+import pytest
+from sqlalchemy import event
+from app import student_cache
+from app.cache import RedisCache
+from app.extensions import db
+from app.models import Student
+from app.signals import notify_students_changed
+from app.student_cache import get_student
+
+
+class FakeRedis:
+    """redis.Redis 的替身：只实现 RedisCache 用到的命令；down=True 时每个命令抛 ConnectionError，模拟 Redis 宕机"""
+
+    def __init__(self):
+        self.data = {}
+        self.expires = {}
+        self.down = False
+
+    def _check(self):
+        if self.down:
+            raise ConnectionError("redis unavailable")
+
+    def _live(self, key):
+        if key in self.expires and self.expires[key] < time.monotonic():
+            self.data.pop(key, None)
+            self.expires.pop(key, None)
+        return self.data.get(key)
+
+    def get(self, key):
+        self._check()
+        return self._live(key)
+
+    def mget(self, keys):
+        self._check()
+        return [self._live(key) for key in keys]
+
+    def set(self, key, value, ex=None):
+        self._check()
+        self.data[key] = value.encode() if isinstance(value, str) else value
+        if ex is not None:
+            self.expires[key] = time.monotonic() + ex
+
+    def delete(self, key):
+        self._check()
+        self.data.pop(key, None)
+
+    def incr(self, key):
+        self._check()
+        value = int(self._live(key) or 0) + 1
+        self.data[key] = str(value).encode()
+        return value
+
+    def expire(self, key, seconds):
+        self._check()
+        self.expires[key] = time.monotonic() + seconds
+
+    def scan_iter(self, match):
+        self._check()
+        return [key for key in list(self.data) if key.startswith(match.rstrip("*"))]
+
+    def pipeline(self):
+        return _FakePipeline(self)
+
+
+class _FakePipeline:
+    def __init__(self, client):
+        self.client = client
+        self.calls = []
+
+    def __getattr__(self, name):
+        return lambda *args: self.calls.append((name, args))
+
+    def execute(self):
+        return [getattr(self.client, name)(*args) for name, args in self.calls]
+
+
+@pytest.fixture
+def fake_redis():
+    return FakeRedis()
+
+
+@pytest.fixture
+def redis_app(make_app, monkeypatch, fake_redis):
+    monkeypatch.setattr(student_cache, "RedisCache", lambda url, **kwargs: RedisCache(url, client=fake_redis, **kwargs))
+    app = make_app(STUDENT_CACHE="redis")
+    seed_student(app)
+    return app
+
+
+def seed_student(app, student_id="2024000001", name="张三"):
+    with app.app_context():
+        stu = Student(name=name, gender="男", student_id=student_id, id_card="11010519491231002X", phone="13800000000",
+                      major="物理学", clazz="24101", hometown="北京")
+        stu.update_admin_class()
+        db.session.add(stu)
+        db.session.commit()
+
+
+def _rename(app, student_id, name):
+    stu = Student.query.filter_by(student_id=student_id).first()
+    stu.name = name
+    db.session.commit()
+
+
+class QueryCounter:
+    def __init__(self, app):
+        self.count = 0
+        with app.app_context():
+            event.listen(db.engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if "FROM students" in statement:
+            self.count += 1
+
+
+def test_cache_hit_skips_database(redis_app):
+    queries = QueryCounter(redis_app)
+    with redis_app.app_context():
+        assert get_student("2024000001").name == "张三"
+        assert get_student("2024000001").name == "张三"
+        # 不存在的学号同样缓存
+        assert get_student("2099999999") is None
+        assert get_student("2099999999") is None
+    assert queries.count == 2
+
+
+def test_write_invalidates(redis_app, fake_redis):
+    with redis_app.app_context():
+        assert get_student("2024000001").name == "张三"
+        _rename(redis_app, "2024000001", "张三丰")
+        notify_students_changed(["2024000001"])
+        assert get_student("2024000001").name == "张三丰"
+        # 范围未知的写入（如批量导入）整体失效
+        _rename(redis_app, "2024000001", "张四")
+        notify_students_changed()
+        assert get_student("2024000001").name == "张四"
+    # 单个学号的代数键带过期时间
+    assert "sis:stu:gen:2024000001" in fake_redis.expires
+
+
+def test_generation_race(redis_app):
+    """读取查库期间另一个请求提交并失效：读到的旧值写在旧代数的键上，之后的读取拿到新值"""
+    with redis_app.app_context():
+        cache = redis_app.extensions["student_cache"]
+
+        def racing_loader(student_id):
+            stale = student_cache._load(student_id)
+            old_name = stale.name
+            db.session.expunge(stale)
+            _rename(redis_app, student_id, "李四")
+            cache.invalidate([student_id])
+            stale.name = old_name
+            return stale
+
+        assert cache.get("2024000001", racing_loader).name == "张三"
+        assert get_student("2024000001").name == "李四"
+
+
+def test_backend_outage_falls_back_to_database(redis_app, fake_redis):
+    with redis_app.app_context():
+        assert get_student("2024000001").name == "张三"
+        fake_redis.down = True
+        assert get_student("2024000001").name == "张三"
+        _rename(redis_app, "2024000001", "王五")
+        notify_students_changed(["2024000001"])
+        assert get_student("2024000001").name == "王五"
+
+    client = redis_app.test_client()
+    response = client.post("/", data={"student_id": "2024000001", "verify_last4": "002x"})
+    assert response.status_code == 302 and response.headers["Location"].endswith("/edit")
+    assert client.get("/edit").status_code == 200
+
+
+def test_local_backend(make_app):
+    app = make_app(STUDENT_CACHE="local")
+    seed_student(app)
+    queries = QueryCounter(app)
+    with app.app_context():
+        assert get_student("2024000001").name == "张三"
+        assert get_student("2024000001").name == "张三"
+        assert queries.count == 1
+        _rename(app, "2024000001", "赵六")
+        notify_students_changed(["2024000001"])
+        assert get_student("2024000001").name == "赵六"
+
+
+def test_cache_disabled_by_default(app):
+    assert "student_cache" not in app.extensions
+
+
+@pytest.mark.skipif(importlib.util.find_spec("redis") is not None, reason="redis 已安装")
+def test_redis_without_package_disables_cache(make_app):
+    app = make_app(STUDENT_CACHE="redis")
+    assert "student_cache" not in app.extensions
@@ -0,0 +1,71 @@
+import random
+import pytest
+from app import validators
+from app.importer import VALIDATED_FIELDS
+from app.validators import (REASON_ID_CHECKSUM, REASON_ID_FORMAT, REASON_OK, REASON_CLAZZ, REASON_NAME,
+                            REASON_REQUIRED, is_valid_china_id18, validate_id18, validate_student_columns)
+from benchmarks.datagen import generate_students
+
+
+def _id_samples():
+    valid = [rec["id_card"] for rec in generate_students(200, seed=7)]
+    rng = random.Random(3)
+    samples = list(valid)
+    for v in valid[:100]:
+        # 改校验位
+        samples.append(v[:-1] + rng.choice([c for c in "0123456789X" if c != v[-1]]))
+        # 改本体一位（校验位随之不符，或格式出错）
+        i = rng.randrange(17)
+        samples.append(v[:i] + str((int(v[i]) + 1) % 10) + v[i + 1:])
+    samples += [v.lower() for v in valid if v.endswith("X")]
+    samples += [
+        "", " ", None, 12345, "11010119900307803", "1101011990030780300", "01010119900307803X",
+        "110101189003078038", "110101199013078038", "110101199002328036", "11010119900307803x",
+        "１１０１０１１９９００３０７８０３８", "11010119900307803Y", " 110101199003078038 ",
+    ]
+    return samples
+
+
+def _scalar_code(value):
+    if not isinstance(value, str) or not validators._ID18_RE.match(value.strip()):
+        return REASON_ID_FORMAT
+    return REASON_OK if is_valid_china_id18(value) else REASON_ID_CHECKSUM
+
+
+@pytest.fixture(params=["numpy", "python"])
+def backend(request, monkeypatch):
+    if request.param == "numpy":
+        if validators.np is None:
+            pytest.skip("numpy 未安装")
+    else:
+        monkeypatch.setattr(validators, "np", None)
+    return request.param
+
+
+def test_batch_id_check_matches_scalar(backend):
+    samples = _id_samples()
+    codes = [int(c) for c in validate_id18(samples).codes]
+    assert codes == [_scalar_code(v) for v in samples]
+    assert REASON_OK in codes and REASON_ID_CHECKSUM in codes and REASON_ID_FORMAT in codes
+
+
+def test_empty_batch(backend):
+    assert len(validate_id18([]).codes) == 0
+
+
+def test_student_columns_reason_priority(backend):
+    rec = next(generate_students(1))
+    rows = [
+        dict(rec),
+        dict(rec, name=""),                                # 必填优先
+        dict(rec, name="A", id_card="bad"),                # 姓名优先于身份证
+        dict(rec, id_card="", phone="", clazz=""),         # 选填项为空不校验
+        dict(rec, clazz="123"),
+        dict(rec, id_card=rec["id_card"][:-1] + ("0" if rec["id_card"][-1] != "0" else "1")),
+    ]
+    result = validate_student_columns({f: [r[f] for r in rows] for f in VALIDATED_FIELDS})
+    assert [int(c) for c in result.codes] == [
+        REASON_OK, REASON_REQUIRED, REASON_NAME, REASON_OK, REASON_CLAZZ, REASON_ID_CHECKSUM,
+    ]
+    assert list(result.mask) == [True, False, False, True, False, False]
+    assert result.reason(1) == "缺少学号或姓名"